@@ -0,0 +1,347 @@
+# analytics/query.py
+"""
+DuckDB views over the parquet trees, plus canned queries that return Arrow.
+
+    raw         data/raw/<day>.parquet/park=<p>/*.parquet   one row per *change*
+    raw_filled  raw, forward-filled                         one row per ride per tick
+    weather     data/weather/weather_*.parquet              one row per hour
+    rollup      data/rollup/<day>.parquet                   30-min bins (jobs.daily_rollup)
+
+The harvester writes only rides whose wait or status moved (ingest.dedup),
+so ``raw`` rows are weighted by how often a ride changed, not by time.  It
+is right for finding changes, the latest value or min/max; averages, open
+shares and counts over time need ``raw_filled``, which repeats each ride's
+latest row at every tick of its park; ``ride_filled(ride_id, ride_name)``
+is the same for one ride, filtered before the fill (ride_history uses it).
+
+The views normalise types. Timestamps are naive UTC ``TIMESTAMP`` (the
+training convention) and ``park`` comes from the hive path, so SQLite-export
+parts and current harvest parts query alike. A connection covers only the
+days it is asked for: the raw manifest and the rollup file names give each
+file's day, so a question about June never opens July. DuckDB scans on
+every core and spills to ``data/.cache/duckdb`` when an aggregate outgrows
+memory.
+
+    python -m analytics.query sql "SELECT park, count(*) FROM raw GROUP BY 1"
+    python -m analytics.query history "Space Mountain" --start 2025-06-01 --end 2025-06-30
+    python -m analytics.query profile "Space Mountain" --weekday Saturday --start 2025-06-01
+    python -m analytics.query heatmap "Space Mountain" [--out heatmap.parquet]
+"""
+
+from datetime import date
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+import typer
+
+from ingest.manifest import RAW, raw_files
+
+app = typer.Typer(add_completion=False)
+
+WEATHER = Path("data/weather")
+ROLLUP = Path("data/rollup")
+SPILL = Path("data/.cache/duckdb")
+PARK_TZ = "America/Los_Angeles"  # profiles and heatmaps group by local clock time
+
+# view column → (DuckDB type, source columns in order of preference); a column no
+# file in range has becomes a typed NULL, so old and new layouts share one view
+RAW_VIEW = {
+    "timestamp": ("TIMESTAMP", ["timestamp"]),
+    "park": ("VARCHAR", ["park"]),
+    "ride_id": ("INTEGER", ["ride_id"]),
+    "ride_name": ("VARCHAR", ["ride_name", "ride"]),
+    "status": ("BOOLEAN", ["status"]),
+    "posted_wait": ("SMALLINT", ["posted_wait", "wait_time"]),
+    "last_update": ("TIMESTAMP", ["last_update"]),
+}
+WEATHER_VIEW = {
+    "timestamp": ("TIMESTAMP", ["timestamp"]),
+    "temp_f": ("DOUBLE", ["temp_f", "temperature"]),
+    "precip_prob": ("DOUBLE", ["precip_prob"]),
+    "humidity": ("DOUBLE", ["humidity"]),
+    "wind_speed": ("DOUBLE", ["wind_speed"]),
+    "condition": ("VARCHAR", ["condition"]),
+}
+ROLLUP_VIEW = {
+    "date": ("DATE", ["date"]),
+    "park": ("VARCHAR", ["park"]),
+    "ride": ("VARCHAR", ["ride"]),
+    "time_bin": ("TIMESTAMP", ["time_bin"]),
+    **{
+        c: ("DOUBLE", [c])
+        for c in ["wait_mean", "wait_std", "wait_p50", "wait_p90", "wait_max"]
+    },
+    "sample_size": ("BIGINT", ["sample_size"]),
+    "temp_f": ("DOUBLE", ["temp_f"]),
+    "precip_prob": ("DOUBLE", ["precip_prob"]),
+    "is_holiday": ("BOOLEAN", ["is_holiday"]),
+    "holiday_name": ("VARCHAR", ["holiday_name"]),
+    "is_school_break": ("BOOLEAN", ["is_school_break"]),
+    "season": ("VARCHAR", ["season"]),
+}
+
+# every tick of a park × every ride seen by then, carrying the ride's latest row;
+# SQLite-export parts have no ride_id, so rides are keyed by id, else by name
+FILLED = """
+WITH keyed AS (
+    SELECT *, coalesce(ride_id::VARCHAR, ride_name) AS ride_key FROM raw
+),
+rows AS (SELECT * FROM keyed {rides}),
+ticks AS (SELECT DISTINCT park, timestamp FROM raw {parks}),
+rides AS (SELECT park, ride_key, min(timestamp) AS first_seen FROM rows GROUP BY ALL),
+grid AS (
+    SELECT t.park, t.timestamp, r.ride_key
+    FROM ticks t JOIN rides r ON r.park = t.park AND t.timestamp >= r.first_seen
+)
+SELECT g.timestamp, g.park, o.ride_id, o.ride_name, o.status, o.posted_wait, o.last_update
+FROM grid g ASOF JOIN rows o
+  ON o.park = g.park AND o.ride_key = g.ride_key AND o.timestamp <= g.timestamp
+{match}
+"""
+RAW_FILLED = "CREATE VIEW raw_filled AS " + FILLED.format(rides="", parks="", match="")
+# raw_filled WHERE ride_id = rid OR ride_name = rname, with the rides (and their
+# parks' ticks) narrowed before the fill instead of filling every ride first
+RIDE_MATCH = "ride_id = rid OR ride_name = rname"
+RIDE_FILLED = "CREATE MACRO ride_filled(rid, rname) AS TABLE " + FILLED.format(
+    rides=f"WHERE ride_key IN (SELECT ride_key FROM keyed WHERE {RIDE_MATCH})",
+    parks="WHERE park IN (SELECT park FROM rows)",
+    match="WHERE o.ride_id = rid OR o.ride_name = rname",
+)
+
+
+# --- Views ---
+def _files(paths) -> str:
+    return "[" + ", ".join("'" + str(p).replace("'", "''") + "'" for p in paths) + "]"
+
+
+def _day(path: Path) -> date | None:
+    try:
+        return date.fromisoformat(path.name.removeprefix("weather_")[:10])
+    except ValueError:
+        return None
+
+
+def _in_range(paths, start: date | None, end: date | None) -> list[Path]:
+    return [
+        p
+        for p in paths
+        if (d := _day(p)) is not None and (not start or d >= start) and (not end or d <= end)
+    ]
+
+
+def _cast(expr: str, column: str, sql_type: str) -> str:
+    if column == "last_update":  # ISO strings in SQLite exports, UTC timestamps since
+        return f"CAST(TRY_CAST({expr} AS TIMESTAMPTZ) AS TIMESTAMP)"
+    return f"CAST({expr} AS {sql_type})"
+
+
+def _view(con, name: str, spec: dict, files: list[Path], options: str = "", tail: str = ""):
+    """``CREATE VIEW name`` over ``files`` with the columns and types of ``spec``."""
+    if files:
+        source = f"read_parquet({_files(files)}, union_by_name = true{options})"
+        present = {row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+    else:
+        source, present, tail = "(SELECT 1) AS empty", set(), "LIMIT 0"
+    columns = []
+    for column, (sql_type, candidates) in spec.items():
+        found = [c for c in candidates if c in present]
+        expr = f"COALESCE({', '.join(found)})" if len(found) > 1 else (found or [None])[0]
+        columns.append(
+            f"{_cast(expr, column, sql_type) if expr else f'NULL::{sql_type}'} AS {column}"
+        )
+    con.execute(f"CREATE VIEW {name} AS SELECT {', '.join(columns)} FROM {source} {tail}")
+
+
+def connect(
+    start: date | None = None,
+    end: date | None = None,
+    parks: list[str] | None = None,
+    memory_limit: str | None = None,
+) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB with ``raw``, ``weather`` and ``rollup`` views over ``[start, end]``."""
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")  # TIMESTAMPTZ → TIMESTAMP keeps the UTC wall clock
+    SPILL.mkdir(parents=True, exist_ok=True)
+    con.execute(f"SET temp_directory = '{SPILL}'")
+    if memory_limit:
+        con.execute(f"SET memory_limit = '{memory_limit}'")
+
+    # ``park`` is read from the hive path of each part
+    _view(con, "raw", RAW_VIEW, raw_files(RAW, start, end, parks), ", hive_partitioning = true")
+    con.execute(RAW_FILLED)
+    con.execute(RIDE_FILLED)
+    # forecasts for a day can land in the previous day's file; the newest file wins
+    first = start and date.fromordinal(start.toordinal() - 1)
+    _view(
+        con,
+        "weather",
+        WEATHER_VIEW,
+        _in_range(sorted(WEATHER.glob("weather_*.parquet")), first, end),
+        ", filename = true",
+        "QUALIFY row_number() OVER (PARTITION BY timestamp ORDER BY filename DESC) = 1",
+    )
+    _view(con, "rollup", ROLLUP_VIEW, _in_range(sorted(ROLLUP.glob("*.parquet")), start, end))
+    return con
+
+
+def query(sql: str, params=None, **scope) -> pa.Table:
+    """Run ``sql`` against the views (``scope`` is passed to ``connect``) → Arrow."""
+    with connect(**scope) as con:
+        return con.execute(sql, params).arrow().read_all()
+
+
+# --- Canned queries ---
+def ride_history(ride: str, start=None, end=None, every: str = "30 minutes") -> pa.Table:
+    """Mean / max posted wait and share of time open per ``every`` bucket, one ride.
+
+    Over ``ride_filled`` (``raw_filled`` for the one ride), so a wait that
+    held for an hour counts for an hour.
+    """
+    by_id = ride.isdigit()
+    return query(
+        """
+        SELECT time_bucket($every::INTERVAL, timestamp)  AS bucket,
+               any_value(park)                            AS park,
+               any_value(ride_name)                       AS ride_name,
+               avg(posted_wait)                           AS wait_mean,
+               max(posted_wait)                           AS wait_max,
+               avg(status::INTEGER)                       AS open_share,
+               count(*)                                   AS samples
+        FROM ride_filled($id, $name)
+        GROUP BY bucket
+        ORDER BY bucket
+        """,
+        {"id": int(ride) if by_id else None, "name": None if by_id else ride, "every": every},
+        start=start,
+        end=end,
+    )
+
+
+def daily_profile(
+    ride: str, start=None, end=None, weekday: str | None = None, tz: str = PARK_TZ
+) -> pa.Table:
+    """Average wait by local time of day from the rollup, optionally one weekday only."""
+    return query(
+        """
+        WITH bins AS (
+            SELECT timezone($tz, time_bin AT TIME ZONE 'UTC') AS local, *
+            FROM rollup
+            WHERE ride = $ride
+        )
+        SELECT strftime(local, '%H:%M')                          AS time_of_day,
+               sum(wait_mean * sample_size) / sum(sample_size)   AS wait_mean,
+               avg(wait_p90)                                     AS wait_p90,
+               count(DISTINCT local::DATE)                       AS days,
+               sum(sample_size)                                  AS samples
+        FROM bins
+        WHERE $weekday IS NULL OR dayname(local) = $weekday
+        GROUP BY time_of_day
+        ORDER BY time_of_day
+        """,
+        {"ride": ride, "tz": tz, "weekday": weekday},
+        start=start,
+        end=end,
+    )
+
+
+def heatmap(ride: str, start=None, end=None, tz: str = PARK_TZ) -> pa.Table:
+    """Average wait per (local weekday, hour) from the rollup, in long form."""
+    return query(
+        """
+        WITH bins AS (
+            SELECT timezone($tz, time_bin AT TIME ZONE 'UTC') AS local, *
+            FROM rollup
+            WHERE ride = $ride
+        )
+        SELECT isodow(local)                                     AS dow,
+               dayname(local)                                    AS day_of_week,
+               hour(local)                                       AS hour,
+               sum(wait_mean * sample_size) / sum(sample_size)   AS wait_mean,
+               sum(sample_size)                                  AS samples
+        FROM bins
+        GROUP BY ALL
+        ORDER BY dow, hour
+        """,
+        {"ride": ride, "tz": tz},
+        start=start,
+        end=end,
+    )
+
+
+# --- CLI ---
+def _parse(day: str | None) -> date | None:
+    return date.fromisoformat(day) if day else None
+
+
+def _emit(table: pa.Table, out: Path | None) -> None:
+    if out:
+        pq.write_table(table, out)
+        typer.echo(f"✅ wrote {table.num_rows:,} rows → {out}")
+    else:
+        typer.echo(table.to_pandas().to_string(index=False, max_rows=200))
+
+
+@app.command()
+def sql(
+    statement: str,
+    start: str = typer.Option(None, help="first day to scan (YYYY-MM-DD)"),
+    end: str = typer.Option(None, help="last day to scan"),
+    park: list[str] = typer.Option(None, help="raw parks to scan (repeatable)"),
+    memory_limit: str = typer.Option(None, help="e.g. 4GB; beyond it DuckDB spills"),
+    out: Path = typer.Option(None, help="write the result as parquet"),
+):
+    """Ad-hoc SQL over the raw, weather and rollup views."""
+    table = query(
+        statement,
+        start=_parse(start),
+        end=_parse(end),
+        parks=park or None,
+        memory_limit=memory_limit,
+    )
+    _emit(table, out)
+
+
+@app.command()
+def history(
+    ride: str = typer.Argument(..., help="ride name or ride_id"),
+    start: str = typer.Option(None),
+    end: str = typer.Option(None),
+    every: str = typer.Option("30 minutes", help="bucket width"),
+    out: Path = typer.Option(None),
+):
+    _emit(ride_history(ride, _parse(start), _parse(end), every), out)
+
+
+@app.command()
+def profile(
+    ride: str = typer.Argument(..., help="ride name as in the rollup"),
+    start: str = typer.Option(None),
+    end: str = typer.Option(None),
+    weekday: str = typer.Option(None, help="e.g. Saturday"),
+    tz: str = typer.Option(PARK_TZ),
+    out: Path = typer.Option(None),
+):
+    _emit(daily_profile(ride, _parse(start), _parse(end), weekday, tz), out)
+
+
+@app.command("heatmap")
+def heatmap_cmd(
+    ride: str = typer.Argument(..., help="ride name as in the rollup"),
+    start: str = typer.Option(None),
+    end: str = typer.Option(None),
+    tz: str = typer.Option(PARK_TZ),
+    out: Path = typer.Option(None),
+):
+    table = heatmap(ride, _parse(start), _parse(end), tz)
+    if out:
+        return _emit(table, out)
+    grid = table.to_pandas().pivot(
+        index=["dow", "day_of_week"], columns="hour", values="wait_mean"
+    )
+    typer.echo(grid.round(0).to_string())
+
+
+if __name__ == "__main__":
+    app()
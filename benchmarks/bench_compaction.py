@@ -0,0 +1,72 @@
+# benchmarks/bench_compaction.py
+"""
+Read-time benchmark for raw parquet before and after compaction.
+
+Copies ``data/raw`` into a temporary directory, times the two read patterns
+our jobs use (per-file ``pd.read_parquet`` + concat, and a pyarrow dataset
+scan) over every finished day, compacts the copy and times them again.
+
+    python -m benchmarks.bench_compaction [--repeat 5]
+"""
+
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.dataset as ds
+import typer
+
+from jobs import compact
+
+app = typer.Typer(add_completion=False)
+
+
+def _per_file(root: Path) -> int:
+    parts = list(root.glob("*.parquet/park=*/*.parquet"))
+    return len(pd.concat(pd.read_parquet(p) for p in parts))
+
+
+def _dataset(root: Path) -> int:
+    return ds.dataset(root, format="parquet", partitioning="hive").count_rows()
+
+
+def _time(fn, root: Path, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(root)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+@app.command()
+def main(
+    src: Path = typer.Option(compact.RAW, help="raw parquet root to copy"),
+    repeat: int = typer.Option(5, help="timings per reader; best is reported"),
+):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "raw"
+        shutil.copytree(src, root)
+
+        before_files = len(list(root.glob("*.parquet/park=*/*.parquet")))
+        before = {f.__name__: _time(f, root, repeat) for f in (_per_file, _dataset)}
+        rows = _per_file(root)
+
+        for day in compact.finished_days(root):
+            compact.compact_day(day, root)
+
+        after_files = len(list(root.glob("*.parquet/park=*/*.parquet")))
+        after = {f.__name__: _time(f, root, repeat) for f in (_per_file, _dataset)}
+        assert _per_file(root) == rows, "compaction changed the row count"
+
+    print(f"{rows:,} rows, {before_files} → {after_files} files")
+    print(f"{'reader':<12}{'before s':>10}{'after s':>10}{'speedup':>9}")
+    for name in before:
+        b, a = before[name], after[name]
+        print(f"{name:<12}{b:>10.3f}{a:>10.3f}{b / a:>8.1f}x")
+
+
+if __name__ == "__main__":
+    app()
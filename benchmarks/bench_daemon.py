@@ -0,0 +1,162 @@
+# benchmarks/bench_daemon.py
+"""
+Simulated day of the harvester daemon against a local queue-times stub.
+
+The stub serves ``--rides`` rides per park over HTTP on 127.0.0.1 and
+refreshes them every ``--cadence`` seconds of *simulated* time while the
+park is open (``OPEN``, narrower than the daemon's polling window).
+``ingest.daemon.run`` polls it on a ``FakeClock`` from 03:00 local to 03:00
+the next day, writing into a temporary ``data/raw``; the same stub is then
+sampled on the workflow's 30-minute cron for comparison.
+
+    python -m benchmarks.bench_daemon [--day 2025-07-04] [--rides 60] [--cadence 300]
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pyarrow.dataset as ds
+import typer
+
+from ingest import daemon
+from ingest.schema import PARK_IDS
+
+app = typer.Typer(add_completion=False)
+
+CRON_HOURS_UTC = [*range(15, 24), *range(0, 7)]  # .github/workflows/harvest.yml
+OPEN = {"dl": (8, 24), "dca": (8, 22)}  # local opening and closing hour served by the stub
+
+
+class Stub(ThreadingHTTPServer):
+    """queue_times.json for every park, as of ``clock.now()``."""
+
+    daemon_threads = True
+
+    def __init__(self, clock: daemon.Clock, rides: int, cadence: int, hours: dict = OPEN):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.clock, self.rides, self.cadence, self.open = clock, rides, cadence, hours
+        self.parks = {pid: park for park, pid in PARK_IDS.items()}
+        self.polls = {p: 0 for p in PARK_IDS}
+        # refresh index → clock time of the first poll that saw it
+        self.seen: dict[str, dict[int, float]] = {p: {} for p in PARK_IDS}
+
+    def hours(self, park: str, t: float) -> tuple[float, float]:
+        """The park's opening and closing time on the local day of ``t``."""
+        local = datetime.fromtimestamp(t, daemon.PARK_TZ)
+        midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        return tuple((midnight + timedelta(hours=h)).timestamp() for h in self.open[park])
+
+    def refresh(self, park: str, t: float) -> int | None:
+        """Index of the newest refresh at ``t`` (None before the park opens)."""
+        opened, closed = self.hours(park, t)
+        return None if t < opened else int(min(t, closed) // self.cadence)
+
+    def payload(self, park: str, t: float) -> dict:
+        k = self.refresh(park, t) or 0
+        opened, closed = self.hours(park, t)
+        is_open = opened <= t < closed
+        updated = datetime.fromtimestamp(k * self.cadence, timezone.utc)
+        rides = [
+            {
+                "id": PARK_IDS[park] * 1000 + r,
+                "name": f"{park} ride {r}",
+                "is_open": is_open,
+                "wait_time": 5 * ((r * 7 + k // (1 + r % 4)) % 20) if is_open else 0,
+                "last_updated": updated.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            }
+            for r in range(self.rides)
+        ]
+        return {"lands": [{"id": 1, "name": "Land", "rides": rides}]}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        park, t = server.parks[int(self.path.split("/")[2])], server.clock.now()
+        server.polls[park] += 1
+        if (k := server.refresh(park, t)) is not None:
+            server.seen[park].setdefault(k, t)
+        body = json.dumps(server.payload(park, t)).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client went away (daemon stopped) mid-poll
+
+    def log_message(self, *args):
+        pass
+
+
+def _published(stub: Stub, park: str, t: float) -> dict[int, float]:
+    """Refresh index → the moment it went live, for the local day of ``t``."""
+    opened, closed = stub.hours(park, t)
+    first = -(-int(opened) // stub.cadence)
+    return {k: k * stub.cadence for k in range(first, int(closed) // stub.cadence)}
+
+
+def _row(label: str, park: str, polls: int, seen: dict, published: dict) -> None:
+    lags = [seen[k] - published[k] for k in seen if k in published]
+    lag = sum(lags) / len(lags) / 60 if lags else float("nan")
+    print(f"{label:<8}{park:<6}{polls:>7}{len(lags):>7} / {len(published):<5}{lag:>10.1f}")
+
+
+@app.command()
+def main(
+    day: str = typer.Option("2025-07-04", help="local day to simulate"),
+    rides: int = typer.Option(60, help="rides per park"),
+    cadence: int = typer.Option(300, help="stub refresh interval, seconds"),
+):
+    midnight = datetime.combine(date.fromisoformat(day), datetime.min.time(), daemon.PARK_TZ)
+    start = (midnight + timedelta(hours=3)).timestamp()
+    end = (midnight + timedelta(hours=27)).timestamp()
+    clock = daemon.FakeClock(start)
+    stub = Stub(clock, rides, cadence)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{stub.server_address[1]}/parks/{{pid}}/queue_times.json"
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            t0, c0 = time.perf_counter(), time.process_time()
+            stats = asyncio.run(
+                daemon.run(list(PARK_IDS), clock, url=url, until=end, log=lambda *a: None)
+            )
+            wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+            rows = ds.dataset("data/raw", format="parquet", partitioning="hive").count_rows()
+        finally:
+            os.chdir(cwd)
+    stub.shutdown()
+
+    print(f"simulated {day} 03:00 → +24h local in {wall:.1f}s wall, {cpu:.1f}s CPU")
+    print(
+        f"daemon: {stats['polls']} polls, {stats['errors']} errors, "
+        f"{stats['kept']:,} of {stats['fetched']:,} rows kept, "
+        f"{rows:,} on disk in {stats['files']} files"
+    )
+    print(f"{'':<8}{'park':<6}{'polls':>7}{'refreshes seen':>15}{'lag min':>10}")
+    for park in PARK_IDS:
+        published = _published(stub, park, start + 12 * 3600)
+        _row("daemon", park, stub.polls[park], stub.seen[park], published)
+
+        cron: dict[int, float] = {}
+        polls = 0
+        for t in range(int(start) // 1800 * 1800 + 1800, int(end), 1800):
+            if datetime.fromtimestamp(t, timezone.utc).hour in CRON_HOURS_UTC:
+                polls += 1
+                if (k := stub.refresh(park, t)) is not None:
+                    cron.setdefault(k, t)
+        _row("cron", park, polls, cron, published)
+
+
+if __name__ == "__main__":
+    app()
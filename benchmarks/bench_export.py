@@ -0,0 +1,112 @@
+# benchmarks/bench_export.py
+"""
+Peak-memory / throughput benchmark for the SQLite → Parquet queue export.
+
+Builds a synthetic ``queue_times.db`` with ``--rows`` rows, then runs each
+export path in a fresh interpreter and reports its peak RSS and rows/s:
+
+* ``pandas``    – the previous exporter: ``pd.read_sql`` of the whole table,
+                  split by park, ``DataFrame.to_parquet``
+* ``streaming`` – ``export_full``: cursor batches → RecordBatch → ParquetWriter
+
+    python -m benchmarks.bench_export [--rows 3000000] [--batch-rows 50000]
+"""
+
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import typer
+
+from ingest import sqlite_store
+
+app = typer.Typer(add_completion=False)
+PATHS = ["pandas", "streaming"]
+
+
+def build_db(path: Path, rows: int) -> None:
+    conn = sqlite_store.connect(str(path))
+    rides = [
+        ("disneyland" if i < 45 else "california_adventure", f"Land {i % 9}", f"Attraction {i}")
+        for i in range(80)
+    ]
+    rng = random.Random(0)
+    batch, ts = [], 1_748_736_000
+    with conn:
+        while rows > 0:
+            tick = rides[: min(rows, len(rides))]
+            batch += [(ts, p, land, r, rng.randint(0, 120), 0) for p, land, r in tick]
+            rows -= len(tick)
+            ts += 300
+            if len(batch) >= 100_000 or rows == 0:
+                sqlite_store.insert_ride_data(conn, batch)
+                batch = []
+    conn.close()
+
+
+def _pandas_export(db: Path, out: Path) -> int:
+    import pandas as pd
+
+    conn = sqlite_store.connect(str(db))
+    df = pd.read_sql("SELECT * FROM queue_times_flat", conn)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    for park in df["park"].unique():
+        part = out / f"park={park}" / "part-0.parquet"
+        part.parent.mkdir(parents=True, exist_ok=True)
+        df[df["park"] == park].to_parquet(part, index=False)
+    return len(df)
+
+
+def _streaming_export(db: Path, out: Path, batch_rows: int) -> int:
+    from scripts import export_queue_to_parquet
+
+    conn = sqlite_store.connect(str(db))
+    return export_queue_to_parquet.export_full(conn, out, batch_rows)
+
+
+def run_one(path: str, db: str, out: str, batch_rows: int) -> None:
+    """Run a single export path and print its metrics as JSON (used in a subprocess)."""
+    db, out = Path(db), Path(out)
+    t0 = time.perf_counter()
+    if path == "pandas":
+        rows = _pandas_export(db, out)
+    else:
+        rows = _streaming_export(db, out, batch_rows)
+    elapsed = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"rows": rows, "seconds": elapsed, "peak_rss_mb": peak_mb}))
+
+
+@app.command()
+def main(
+    rows: int = typer.Option(3_000_000, help="synthetic queue_times rows"),
+    batch_rows: int = typer.Option(50_000, help="cursor batch size for the streaming path"),
+):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "queue_times.db"
+        print(f"building {rows:,}-row database …")
+        build_db(db, rows)
+
+        print(f"{'path':<10}{'peak RSS MB':>13}{'seconds':>10}{'rows/s':>12}")
+        for path in PATHS:
+            call = f"run_one({path!r}, {str(db)!r}, {str(Path(tmp) / path)!r}, {batch_rows})"
+            proc = subprocess.run(
+                [sys.executable, "-c", f"from benchmarks.bench_export import run_one; {call}"],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            m = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{path:<10}{m['peak_rss_mb']:>13.0f}{m['seconds']:>10.2f}"
+                f"{m['rows'] / m['seconds']:>12,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,92 @@
+# benchmarks/bench_online.py
+"""
+Latency benchmark for whole-park online lookups.
+
+Applies ``feature_repo/features.py`` to a throwaway registry and online
+store (SQLite, or ``--online redis`` against ``$REDIS_URL`` – a local
+redis-server or any stand-in speaking the protocol), writes ``--rides``
+synthetic ride entities per park through ``serving.online.write_rides``
+and then times ``--requests`` calls of ``serving.online.lookup``: one
+``get_online_features`` per request covering every ride of the park.
+
+    python -m benchmarks.bench_online [--rides 60] [--requests 500] [--online sqlite|redis]
+"""
+
+import importlib.util
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import typer
+
+from serving import online
+
+app = typer.Typer(add_completion=False)
+
+
+def _definitions():
+    spec = importlib.util.spec_from_file_location("features", online.REPO / "features.py")
+    features = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(features)
+    return [
+        features.ride,
+        features.park,
+        features.queue_hourly,
+        features.weather_hourly,
+        features.park_rides,
+    ]
+
+
+def _pct(values, q) -> float:
+    return float(np.percentile(values, q)) * 1000
+
+
+@app.command()
+def main(
+    rides: int = typer.Option(60, help="ride entities per park"),
+    requests: int = typer.Option(500, help="lookups per park"),
+    kind: str = typer.Option("sqlite", "--online", help="sqlite or redis"),
+):
+    if importlib.util.find_spec("feast") is None:
+        raise typer.Exit("feast is not installed – nothing to benchmark")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fs = online.store(kind, root=Path(tmp))
+        fs.apply(_definitions())
+
+        rng = np.random.default_rng(0)
+        now = datetime.now(timezone.utc)
+        parks = {
+            park: list(range(base, base + rides))
+            for park, base in (("dl", 1000), ("dca", 5000))
+        }
+        rows = pd.DataFrame(
+            {
+                "ride_id": np.concatenate(list(parks.values())).astype("int64"),
+                "timestamp": now,
+                "posted_wait": rng.integers(0, 120, 2 * rides).astype("int32"),
+            }
+        )
+        t0 = time.perf_counter()
+        writes = online.write_rides(fs, rows)
+        write_s = time.perf_counter() - t0
+
+        online.lookup("dl", fs, parks["dl"])  # warm the registry cache and connection
+        print(f"{len(rows)} rides in {writes} batch writes, {write_s * 1000:.1f} ms ({kind})")
+        print(f"{'park':<6}{'rides':>7}{'n':>7}{'p50 ms':>10}{'p99 ms':>10}")
+        for park, ids in parks.items():
+            lat = []
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                features = online.lookup(park, fs, ids)
+                lat.append(time.perf_counter() - t0)
+            assert len(features["ride_id"]) == len(ids)
+            p50, p99 = _pct(lat, 50), _pct(lat, 99)
+            print(f"{park:<6}{len(ids):>7}{requests:>7}{p50:>10.2f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,94 @@
+# benchmarks/bench_rollup.py
+"""
+Aggregation benchmark for the daily rollup over a synthetic season.
+
+Builds ``--days`` of 5-minute observations for ``--rides`` rides and times:
+
+* ``groupby``      – the previous engine: pandas groupby mean/std/count
+* ``groupby+q``    – pandas groupby with the new stats (adds p50/p90/max)
+* ``segmented``    – ``jobs.daily_rollup.aggregate``: one sort, reduceat
+
+and checks that ``segmented`` matches ``groupby+q``.
+
+    python -m benchmarks.bench_rollup [--days 120] [--rides 80]
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import typer
+
+from jobs.daily_rollup import KEYS, aggregate, observations
+
+app = typer.Typer(add_completion=False)
+
+
+def season(days: int, rides: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    ticks = pd.date_range("2025-03-01 15:00", periods=days * 24 * 12, freq="5min")
+    ticks = ticks[(ticks.hour >= 15) | (ticks.hour < 7)]  # park hours in UTC
+    names = np.array([f"Attraction {i}" for i in range(rides)])
+    return pd.DataFrame(
+        {
+            "park": np.tile(np.where(np.arange(rides) < rides // 2, "dl", "dca"), len(ticks)),
+            "ride": np.tile(names, len(ticks)),
+            "wait_time": rng.integers(0, 120, len(ticks) * rides).astype("float64"),
+            "timestamp": np.repeat(ticks.to_numpy(), rides),
+        }
+    )
+
+
+def _binned(qdf: pd.DataFrame) -> pd.DataFrame:
+    qdf = qdf.copy()
+    qdf["time_bin"] = qdf["timestamp"].dt.floor("30min")
+    qdf["date"] = qdf["time_bin"].dt.date
+    return qdf
+
+
+def groupby(qdf: pd.DataFrame) -> pd.DataFrame:
+    return (
+        _binned(qdf)
+        .groupby(KEYS)["wait_time"]
+        .agg(wait_mean="mean", wait_std="std", sample_size="count")
+        .reset_index()
+    )
+
+
+def groupby_q(qdf: pd.DataFrame) -> pd.DataFrame:
+    grouped = _binned(qdf).groupby(KEYS)["wait_time"]
+    out = grouped.agg(wait_mean="mean", wait_std="std")
+    out["wait_p50"] = grouped.quantile(0.5)
+    out["wait_p90"] = grouped.quantile(0.9)
+    out["wait_max"] = grouped.max()
+    out["sample_size"] = grouped.count()
+    return out.reset_index()
+
+
+def segmented(qdf: pd.DataFrame) -> pd.DataFrame:
+    return aggregate(observations(qdf))
+
+
+@app.command()
+def main(
+    days: int = typer.Option(120, help="days in the synthetic season"),
+    rides: int = typer.Option(80, help="rides observed every 5 minutes"),
+):
+    qdf = season(days, rides)
+    print(f"{len(qdf):,} observations")
+    print(f"{'engine':<12}{'seconds':>9}{'groups':>10}")
+    frames = {}
+    for name, fn in [("groupby", groupby), ("groupby+q", groupby_q), ("segmented", segmented)]:
+        t0 = time.perf_counter()
+        frames[name] = fn(qdf)
+        print(f"{name:<12}{time.perf_counter() - t0:>9.2f}{len(frames[name]):>10,}")
+    pd.testing.assert_frame_equal(
+        frames["segmented"].sort_values(KEYS, ignore_index=True),
+        frames["groupby+q"].sort_values(KEYS, ignore_index=True),
+        check_dtype=False,
+    )
+    print("✅ segmented matches groupby+q")
+
+
+if __name__ == "__main__":
+    app()
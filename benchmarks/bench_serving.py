@@ -0,0 +1,116 @@
+# benchmarks/bench_serving.py
+"""
+Latency benchmark for the online prediction service.
+
+Trains a small booster on synthetic rows into a temp file, starts
+``serving.predict`` on an ephemeral port over the local raw tree and fires
+``--requests`` GETs from ``--clients`` threads.  Half the requests ask for
+one ride, half for a whole park.  Reports p50/p99 per request (HTTP round
+trip) and per batch (the single ``predict`` call behind it), and rewrites
+the model halfway through to show the reload does not stall requests.
+
+    python -m benchmarks.bench_serving [--requests 2000] [--clients 16]
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import typer
+
+from serving import predict
+
+app = typer.Typer(add_completion=False)
+
+
+def train_model(path: Path, rounds: int = 100, seed: int = 0) -> None:
+    rng, n = np.random.default_rng(seed), 20_000
+    X = np.column_stack(  # same columns as predict.FEATURES
+        [
+            rng.integers(0, 120, n),
+            rng.normal(75, 10, n),
+            rng.integers(0, 100, n),
+            rng.integers(1, 15_000, n),
+            rng.choice([16, 17], n),
+        ]
+    )
+    y = X[:, 0] * 0.9 + rng.normal(0, 5, len(X))
+    params = dict(objective="regression", learning_rate=0.1, num_leaves=31, verbose=-1)
+    dataset = lgb.Dataset(X, label=y, categorical_feature=[3, 4])
+    model = lgb.train(params, dataset, num_boost_round=rounds)
+    tmp = path.with_suffix(".tmp")
+    joblib.dump(model, tmp)
+    os.replace(tmp, path)
+
+
+def _pct(values, q) -> float:
+    return float(np.percentile(values, q)) * 1000 if len(values) else float("nan")
+
+
+@app.command()
+def main(
+    requests: int = typer.Option(2000, help="total HTTP requests"),
+    clients: int = typer.Option(16, help="concurrent client threads"),
+):
+    with tempfile.TemporaryDirectory() as tmp:
+        model = Path(tmp) / "model.joblib"
+        train_model(model)
+
+        predictor = predict.Predictor(model)
+        predictor.state.refresh()
+        predictor.models.get()
+        rides = predictor.state.rides
+        if rides.empty:
+            raise typer.Exit("no raw parts under data/raw – nothing to serve")
+        ride_ids, parks = rides.index.tolist(), rides["park"].unique().tolist()
+
+        server = predict.Server(("127.0.0.1", 0), predict.handler(predictor))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}/predict"
+
+        def call(i: int) -> tuple[str, float]:
+            kind = "ride" if i % 2 else "park"
+            query = (
+                f"ride_id={ride_ids[i % len(ride_ids)]}"
+                if i % 2
+                else f"park={parks[i % len(parks)]}"
+            )
+            t0 = time.perf_counter()
+            with urllib.request.urlopen(f"{base}?{query}") as r:
+                json.load(r)
+            return kind, time.perf_counter() - t0
+
+        def reload_midway():
+            time.sleep(0.5)
+            train_model(model, rounds=150, seed=1)
+
+        threading.Thread(target=reload_midway, daemon=True).start()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            results = list(pool.map(call, range(requests)))
+        elapsed = time.perf_counter() - t0
+        server.shutdown()
+
+    print(
+        f"{len(ride_ids)} rides / {len(parks)} parks, {requests:,} requests in {elapsed:.2f}s"
+    )
+    print(f"{'scope':<8}{'n':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for kind in ("ride", "park"):
+        lat = [s for k, s in results if k == kind]
+        print(f"{kind:<8}{len(lat):>8,}{_pct(lat, 50):>10.2f}{_pct(lat, 99):>10.2f}")
+    sizes = [n for n, _ in predictor.batcher.batches]
+    batch_s = [s for _, s in predictor.batcher.batches]
+    print(f"{'batch':<8}{len(batch_s):>8,}{_pct(batch_s, 50):>10.2f}{_pct(batch_s, 99):>10.2f}")
+    print(f"mean rows/batch {np.mean(sizes):.1f}, model reloads {predictor.models.reloads}")
+
+
+if __name__ == "__main__":
+    app()
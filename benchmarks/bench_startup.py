@@ -0,0 +1,139 @@
+# benchmarks/bench_startup.py
+"""
+Startup benchmark and regression guard for the ingest entry points.
+
+For each module in ``ENTRY_POINTS`` a fresh interpreter runs
+``python -X importtime -c "import <module>"`` in an empty directory:
+the module's cumulative import time (median of ``--repeat``), its
+heaviest direct imports, whether any of ``FORBIDDEN`` got loaded and
+whether the import created files.  Then ``--ticks`` full harvest
+processes (``python -m ingest.harvest --no-weather``) run against the
+local queue-times stub from bench_daemon and are timed end to end
+(importtime on, so a forbidden module loaded mid-tick shows up too).
+
+Exits 1 when an entry point or a tick loads a forbidden module, an import
+touches the filesystem or (with ``--max-import-ms``) goes over budget.
+
+    python -m benchmarks.bench_startup [--repeat 5] [--ticks 5] [--max-import-ms 500]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import typer
+
+from benchmarks.bench_daemon import Stub
+from ingest import daemon
+from ingest.schema import PARK_IDS
+
+app = typer.Typer(add_completion=False)
+
+ROOT = Path(__file__).resolve().parents[1]
+ENTRY_POINTS = [
+    "ingest.harvest",
+    "ingest.pull_queue_times",
+    "ingest.pull_weather",
+    "ingest.daemon",
+]
+FORBIDDEN = ["pandas", "typer"]  # httpx's own CLI may pull in click/rich; that is httpx's cost
+
+
+def _env() -> dict:
+    return {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONDONTWRITEBYTECODE": "1"}
+
+
+def _import(module: str, cwd: str) -> tuple[float, list[tuple[float, str]], list[str]]:
+    """Cumulative ms, (ms, name) of direct imports, forbidden modules loaded."""
+    check = f"import sys, {module}; print(*[m for m in {FORBIDDEN!r} if m in sys.modules])"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=cwd,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, direct = 0.0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name.strip() == module and depth == 0:
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            direct.append((int(cumulative) / 1000, name.strip()))
+    return total, sorted(direct, reverse=True), proc.stdout.split()
+
+
+def _wall(args: list[str], cwd: str) -> tuple[float, list[str]]:
+    """Seconds for ``python <args>`` and the forbidden modules it loaded on the way."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds = time.perf_counter() - t0
+    loaded = {line.rsplit("|", 1)[-1].strip() for line in proc.stderr.splitlines()}
+    return seconds, [m for m in FORBIDDEN if m in loaded]
+
+
+@app.command()
+def main(
+    repeat: int = typer.Option(5, help="fresh interpreters per entry point; median reported"),
+    ticks: int = typer.Option(5, help="harvest processes to time against the local stub"),
+    rides: int = typer.Option(60, help="rides per park served by the stub"),
+    max_import_ms: float = typer.Option(0, help="fail above this import time (0 = no budget)"),
+):
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = statistics.median(_wall(["-c", "pass"], tmp)[0] for _ in range(repeat)) * 1000
+        print(f"bare interpreter: {bare:.0f} ms\n")
+        print(f"{'entry point':<26}{'import ms':>10}  heaviest direct imports (ms)")
+        for module in ENTRY_POINTS:
+            runs = [_import(module, tmp) for _ in range(repeat)]
+            ms = statistics.median(r[0] for r in runs)
+            heavy = ", ".join(f"{name} {t:.0f}" for t, name in runs[-1][1][:4])
+            print(f"{module:<26}{ms:>10.0f}  {heavy}")
+            if runs[-1][2]:
+                failures.append(f"{module} imports {', '.join(runs[-1][2])}")
+            if max_import_ms and ms > max_import_ms:
+                failures.append(f"{module} takes {ms:.0f} ms to import (> {max_import_ms:.0f})")
+            if created := sorted(p.name for p in Path(tmp).iterdir()):
+                failures.append(f"importing {module} created {', '.join(created)}")
+
+    stub = Stub(daemon.Clock(), rides, 300)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{stub.server_address[1]}/parks/{{pid}}/queue_times.json"
+    with tempfile.TemporaryDirectory() as tmp:
+        args = ["-m", "ingest.harvest", "--no-weather", "--url", url]
+        runs = [_wall(args, tmp) for _ in range(ticks)]
+        parts = sum(1 for _ in Path(tmp).glob("data/raw/*.parquet/park=*/*.parquet"))
+    stub.shutdown()
+    walls = [seconds * 1000 for seconds, _ in runs]
+    print(
+        f"\nharvest tick ({len(PARK_IDS)} parks × {rides} rides, local stub): "
+        f"median {statistics.median(walls):.0f} ms, min {min(walls):.0f} ms "
+        f"over {ticks} processes, {parts} parts written"
+    )
+    if runs[-1][1]:
+        failures.append(f"a harvest tick imports {', '.join(runs[-1][1])}")
+
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    if failures:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,122 @@
+# benchmarks/bench_training.py
+"""
+Peak-memory / time benchmark for building the LightGBM training Dataset.
+
+Writes a synthetic ``hourly_train.parquet`` with ``--rows`` rows in
+100k-row row groups, then runs each mode of ``training.train_baseline`` in
+a fresh interpreter (``--rounds`` boosting rounds) and reports its peak RSS:
+
+* ``memory``       – pandas frame → Dataset
+* ``stream``       – row-group Sequences → train/valid Datasets, binned
+                    datasets saved to the (temporary) cache
+* ``stream-cached``– second stream run, loads the saved binary datasets
+
+    python -m benchmarks.bench_training [--rows 4000000] [--rounds 20]
+"""
+
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import typer
+
+app = typer.Typer(add_completion=False)
+ROW_GROUP = 100_000
+
+
+def build_file(path: Path, rows: int) -> None:
+    rng = np.random.default_rng(0)
+    with pq.ParquetWriter(path, _schema()) as writer:
+        for start in range(0, rows, ROW_GROUP):
+            n = min(ROW_GROUP, rows - start)
+            wait = rng.integers(0, 120, n)
+            target = np.where(rng.random(n) < 0.2, np.nan, wait + rng.normal(0, 5, n))
+            writer.write_table(
+                pa.table(
+                    {
+                        "event_timestamp": np.datetime64("2025-01-01", "s")
+                        + np.arange(start, start + n) * 30,
+                        "ride_id": rng.integers(1, 120, n),
+                        "park_id": rng.choice([16, 17], n),
+                        "posted_wait": wait.astype(float),
+                        "temp_f": rng.normal(75, 10, n),
+                        "precip_prob": rng.integers(0, 100, n).astype(float),
+                        "target": target,
+                    },
+                    schema=_schema(),
+                )
+            )
+
+
+def _schema() -> pa.Schema:
+    ints = ["ride_id", "park_id"]
+    floats = ["posted_wait", "temp_f", "precip_prob", "target"]
+    return pa.schema(
+        [("event_timestamp", pa.timestamp("s"))]
+        + [(c, pa.int64()) for c in ints]
+        + [(c, pa.float64()) for c in floats]
+    )
+
+
+def run_one(mode: str, infile: str, cache: str, rounds: int) -> None:
+    """Train once and print metrics as JSON (used in a subprocess)."""
+    import lightgbm as lgb
+
+    from training import train_baseline
+
+    train_baseline.CACHE = Path(cache)
+    t0 = time.perf_counter()
+    dataset, _ = train_baseline._datasets(mode, Path(infile), train_baseline.VALID_FRACTION)
+    dataset.construct()
+    built = time.perf_counter() - t0
+    lgb.train(train_baseline.params, dataset, num_boost_round=rounds)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        json.dumps(
+            {"dataset_s": built, "total_s": time.perf_counter() - t0, "peak_mb": peak_mb}
+        )
+    )
+
+
+@app.command()
+def main(
+    rows: int = typer.Option(4_000_000, help="synthetic training rows"),
+    rounds: int = typer.Option(20, help="boosting rounds per run"),
+):
+    with tempfile.TemporaryDirectory() as tmp:
+        infile = Path(tmp) / "hourly_train.parquet"
+        print(f"writing {rows:,}-row training file …")
+        build_file(infile, rows)
+
+        print(f"{'mode':<15}{'peak RSS MB':>13}{'dataset s':>11}{'total s':>9}")
+        for label, mode in [
+            ("memory", "memory"),
+            ("stream", "stream"),
+            ("stream-cached", "stream"),
+        ]:
+            call = f"run_one({mode!r}, {str(infile)!r}, {str(Path(tmp) / 'cache')!r}, {rounds})"
+            proc = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    f"from benchmarks.bench_training import run_one; {call}",
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            m = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{label:<15}{m['peak_mb']:>13.0f}{m['dataset_s']:>11.2f}{m['total_s']:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,73 @@
+# benchmarks/bench_training_set.py
+"""
+Wall-clock / equality benchmark for the training-set feature join.
+
+Runs ``training.make_dataset.build`` with each engine over the same window
+and reports their time and row counts, then checks that the frames agree
+column for column (after sorting by ride and timestamp):
+
+* ``feast``  – ``get_historical_features`` on the file offline store
+* ``native`` – sorted ``merge_asof`` over the raw parquet and weather files
+
+    python -m benchmarks.bench_training_set [--start 2025-06-01] [--end 2025-06-07]
+
+Feast is imported only when it is installed; otherwise the native engine is
+timed on its own.
+"""
+
+import importlib.util
+import resource
+import time
+
+import pandas as pd
+import typer
+
+from training import make_dataset
+
+app = typer.Typer(add_completion=False)
+KEYS = ["ride_id", "event_timestamp"]
+LABELS = [make_dataset.label_column(h) for h in make_dataset.HORIZONS]
+COLUMNS = KEYS + ["park_id", "posted_wait", "temp_f", "precip_prob", "target"] + LABELS
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[COLUMNS].sort_values(KEYS).reset_index(drop=True)
+    ts = pd.to_datetime(df["event_timestamp"])
+    df["event_timestamp"] = ts.dt.tz_localize(None) if ts.dt.tz is not None else ts
+    ints = {"ride_id": "int64", "park_id": "int64"}
+    return df.astype(ints).astype({c: "float64" for c in COLUMNS[3:]})
+
+
+def _time(engine: str, start: str, end: str) -> tuple[pd.DataFrame, float]:
+    t0 = time.perf_counter()
+    df = make_dataset.build(engine, start, end)
+    return df, time.perf_counter() - t0
+
+
+@app.command()
+def main(
+    start: str = typer.Option("2025-06-01", help="first entity timestamp (UTC)"),
+    end: str = typer.Option("2025-06-07 23:30", help="last entity timestamp (UTC)"),
+):
+    engines = ["native"]
+    if importlib.util.find_spec("feast") is not None:
+        engines.insert(0, "feast")
+    else:
+        print("[WARN] feast not installed – timing the native engine only")
+
+    frames = {}
+    print(f"{'engine':<8}{'rows':>10}{'seconds':>10}")
+    for engine in engines:
+        df, elapsed = _time(engine, start, end)
+        frames[engine] = _normalize(df)
+        print(f"{engine:<8}{len(df):>10,}{elapsed:>10.2f}")
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS {peak_mb:.0f} MB")
+
+    if "feast" in frames:
+        pd.testing.assert_frame_equal(frames["feast"], frames["native"], check_exact=False)
+        print("✅ native frame matches Feast")
+
+
+if __name__ == "__main__":
+    app()
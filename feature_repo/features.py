@@ -1,18 +1,21 @@
 from datetime import timedelta
 from pathlib import Path
-import glob
 
-from feast import Entity, FeatureView, Field, FileSource
-from feast.types import Float32, Int32
+from feast import Entity, FeatureView, Field, FileSource, ValueType
+from feast.types import Array, Float32, Int32, Int64
 
-# ── build an explicit list of ride-wait parquet files ─────────────
-ROOT = Path(__file__).resolve().parent / ".." / "data" / "raw"
-queue_files = glob.glob(str(ROOT / "*" / "park=*/*.parquet"))
+# ── ride-wait parquet tree ────────────────────────────────────────
+# One directory path, not a file list: the offline store discovers the
+# <date>.parquet/park=<p>/ partitions when it reads, so neither import nor
+# `feast apply` lists the tree and the registry stays the same size as
+# history grows.  Compacted days are one file per park; dot/underscore
+# entries (compaction staging) are skipped by the parquet reader.
+ROOT = (Path(__file__).resolve().parent / ".." / "data" / "raw").resolve()
 
 # ── File sources ──────────────────────────────────────────────────
 QUEUE_RAW = FileSource(
     name="queue_raw",
-    path=queue_files,               # ← list, not a wildcard string
+    path=str(ROOT),
     timestamp_field="timestamp",
 )
 
@@ -22,15 +25,26 @@ WEATHER_RAW = FileSource(
     timestamp_field="timestamp",
 )
 
+# Written only through write_to_online_store (serving/online.py push); the
+# file is never produced, so materialize runs name the other views.
+PARK_RIDES_SRC = FileSource(
+    name="park_rides_src",
+    path="../data/park_rides.parquet",
+    timestamp_field="timestamp",
+)
+
 # ── entity & feature views ───────────────────────────────────────
+# Both views are served online (serving/online.py keeps them fresh after
+# every harvest tick); ttl=None, so the newest value never expires.
 ride = Entity(name="ride_id", join_keys=["ride_id"])
+park = Entity(name="park", join_keys=["park"], value_type=ValueType.STRING)
 
 queue_hourly = FeatureView(
     name="queue_hourly",
     entities=[ride],
     ttl=None,
     schema=[Field("posted_wait", Int32)],
-    online=False,
+    online=True,
     source=QUEUE_RAW,
 )
 
@@ -42,6 +56,17 @@ weather_hourly = FeatureView(
         Field("temp_f",      Float32),
         Field("precip_prob", Int32),
     ],
-    online=False,
+    online=True,
     source=WEATHER_RAW,
 )
+
+# park → its ride ids as of the last push, so a lookup on any host can list
+# a park's rides from the online store itself
+park_rides = FeatureView(
+    name="park_rides",
+    entities=[park],
+    ttl=None,
+    schema=[Field("ride_ids", Array(Int64))],
+    online=True,
+    source=PARK_RIDES_SRC,
+)
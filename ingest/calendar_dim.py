@@ -0,0 +1,155 @@
+# ingest/calendar_dim.py
+"""
+Calendar dimension: one row per day, keyed by an integer ``date_key``
+(YYYYMMDD), with the flags every job used to recompute row by row.
+
+    date_key, date, dow (Mon=0), day_of_week, is_weekend,
+    is_holiday, holiday_name, is_school_break, season
+
+``is_school_break`` approximates Southern California public schools:
+summer (Jun 10 – Aug 15), winter (Dec 20 – Jan 5), spring break (the week
+before Easter through Easter Monday) and Thanksgiving week.  ``season``
+is a park-demand marker: ``peak`` on school breaks and holidays,
+``value`` on off-season weekdays (Jan 6 – Mar 10, Sep 5 – Nov 15),
+``regular`` otherwise.
+
+The table covers ``FIRST_YEAR``–``LAST_YEAR``.  ``python -m
+ingest.calendar_dim`` saves it to ``data/calendar.parquet``; ``load`` reads
+that file when it covers the years asked for and otherwise builds them in
+memory – it never writes.  ``flags`` asks for whatever years its dates fall
+in, so a backfill before 2020 or a run after 2030 gets real flags, not
+NaN.  SQLite gets the same rows via ``ingest.sqlite_store.ensure_calendar``.
+Lookups are a vectorized join on ``date_key``, so a backfill or a process
+that runs past midnight gets each row's own day.
+
+    python -m ingest.calendar_dim [--first-year 2020] [--last-year 2030]
+"""
+
+import os
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import holidays
+import numpy as np
+import pandas as pd
+import typer
+from dateutil.easter import easter
+
+app = typer.Typer(add_completion=False)
+
+CALENDAR = Path("data/calendar.parquet")
+FIRST_YEAR, LAST_YEAR = 2020, 2030
+PARK_TZ = "America/Los_Angeles"  # holidays are local dates at the parks
+FLAGS = [
+    "dow",
+    "day_of_week",
+    "is_weekend",
+    "is_holiday",
+    "holiday_name",
+    "is_school_break",
+    "season",
+]
+
+
+def date_key(dates) -> np.ndarray:
+    """YYYYMMDD as int32 for anything ``pd.DatetimeIndex`` accepts."""
+    idx = pd.DatetimeIndex(pd.to_datetime(dates))
+    return (idx.year * 10_000 + idx.month * 100 + idx.day).to_numpy(np.int32)
+
+
+def _school_breaks(year: int) -> list[tuple[date, date]]:
+    thanksgiving = next(d for d, n in holidays.US(years=year).items() if "Thanksgiving" in n)
+    sunday = easter(year)
+    return [
+        (date(year, 1, 1), date(year, 1, 5)),
+        (sunday - timedelta(days=7), sunday + timedelta(days=1)),
+        (date(year, 6, 10), date(year, 8, 15)),
+        (thanksgiving - timedelta(days=3), thanksgiving + timedelta(days=3)),
+        (date(year, 12, 20), date(year, 12, 31)),
+    ]
+
+
+def build(first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR) -> pd.DataFrame:
+    days = pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D")
+    us = holidays.US(years=range(first_year, last_year + 1))
+    cal = pd.DataFrame({"date_key": date_key(days), "date": days.date})
+    cal["dow"] = days.dayofweek.astype(np.int8)
+    cal["day_of_week"] = days.day_name()
+    cal["is_weekend"] = cal["dow"] >= 5
+    cal["holiday_name"] = [us.get(d) for d in cal["date"]]
+    cal["is_holiday"] = cal["holiday_name"].notna()
+
+    breaks = np.zeros(len(days), bool)
+    for year in range(first_year, last_year + 1):
+        for lo, hi in _school_breaks(year):
+            breaks |= (days >= pd.Timestamp(lo)) & (days <= pd.Timestamp(hi))
+    cal["is_school_break"] = breaks
+
+    md = days.month * 100 + days.day
+    off_season = ((md >= 106) & (md <= 310)) | ((md >= 905) & (md <= 1115))
+    cal["season"] = np.select(
+        [breaks | cal["is_holiday"].to_numpy(), off_season & ~cal["is_weekend"].to_numpy()],
+        ["peak", "value"],
+        "regular",
+    )
+    return cal[["date_key", "date", *FLAGS]]
+
+
+@lru_cache(maxsize=4)
+def load(
+    first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR, path: Path = CALENDAR
+) -> pd.DataFrame:
+    """The calendar indexed by ``date_key``, from ``path`` if it covers the years."""
+    try:
+        cal = pd.read_parquet(path)
+        if cal["date_key"].min() > first_year * 10_000 + 101 or cal["date_key"].max() < (
+            last_year * 10_000 + 1231
+        ):
+            raise ValueError("calendar too short")
+    except (OSError, ValueError, KeyError):
+        cal = build(first_year, last_year)
+    return cal.set_index("date_key")
+
+
+def flags(dates, columns: list[str] = FLAGS) -> pd.DataFrame:
+    """Calendar ``columns`` for each of ``dates`` (positional, same length)."""
+    keys = date_key(dates)
+    years = keys // 10_000
+    first = min(FIRST_YEAR, int(years.min())) if len(keys) else FIRST_YEAR
+    last = max(LAST_YEAR, int(years.max())) if len(keys) else LAST_YEAR
+    return load(first, last).reindex(keys)[columns].reset_index(drop=True)
+
+
+def local_dates(epoch_seconds) -> pd.DatetimeIndex:
+    """Park-local calendar dates of UTC epoch seconds."""
+    ts = pd.to_datetime(np.asarray(epoch_seconds), unit="s", utc=True)
+    return ts.tz_convert(PARK_TZ).tz_localize(None).normalize()
+
+
+def holiday(epoch_seconds: int) -> tuple[date, str | None]:
+    """Park-local date of one UTC timestamp and its holiday name (None on other days)."""
+    day = local_dates([epoch_seconds])[0]
+    name = flags([day], ["holiday_name"])["holiday_name"].iloc[0]
+    return day.date(), name if isinstance(name, str) else None
+
+
+@app.command()
+def main(
+    first_year: int = typer.Option(FIRST_YEAR),
+    last_year: int = typer.Option(LAST_YEAR),
+    out: Path = typer.Option(CALENDAR),
+):
+    cal = build(first_year, last_year)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    cal.to_parquet(tmp, index=False)
+    os.replace(tmp, out)
+    counts = cal["season"].value_counts().to_dict()
+    typer.echo(
+        f"✅ wrote {len(cal):,} days → {out} ({cal['is_holiday'].sum()} holidays, {counts})"
+    )
+
+
+if __name__ == "__main__":
+    app()
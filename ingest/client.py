@@ -0,0 +1,14 @@
+# ingest/client.py
+import httpx
+
+HEADERS = {"User-Agent": "DLQueueTimes/0.1 (contact: you@example.com)"}
+MAX_CONNECTIONS = 8
+TIMEOUT = httpx.Timeout(15, connect=10)
+
+
+def client(max_connections: int = MAX_CONNECTIONS) -> httpx.AsyncClient:
+    """One pooled keep-alive client shared by every request in a harvest tick."""
+    limits = httpx.Limits(
+        max_connections=max_connections, max_keepalive_connections=max_connections
+    )
+    return httpx.AsyncClient(headers=HEADERS, limits=limits, timeout=TIMEOUT)
@@ -0,0 +1,312 @@
+# ingest/daemon.py
+"""
+Long-running harvester: one process and one pooled client, with each park
+polled on its own schedule instead of on the cron's 30-minute grid.
+
+queue-times.com refreshes a park's ``last_updated`` roughly every five
+minutes, so a poll is most useful just after the next refresh lands.
+
+* Schedule – per park.  The refresh cadence is the median gap between the
+             last few distinct ``last_updated`` values, and the next poll is
+             due that long after the newest one (plus ``LAG``).  A poll that
+             finds nothing new retries sooner, doubling up to the cadence;
+             errors back off exponentially.  ``HOURS`` is a wide park-local
+             window (``MARGIN`` either side) that holds early openings and
+             late closes too; outside it the park sleeps until the window
+             next opens, inside it a park with every ride closed is polled
+             every ``CLOSED_POLL``, so the real opening is seen within that.
+* Buffer   – ticks go through ``ingest.dedup.changed`` in memory and are
+             written together every ``FLUSH_ROWS`` rows or ``FLUSH_SECONDS``,
+             at each UTC day boundary and on shutdown.  The dedup state files
+             are saved only once the rows they describe are on disk.
+* Clock    – wall time and ``asyncio.sleep``.  ``FakeClock`` jumps instead
+             of sleeping, so a simulated day runs in seconds against a local
+             stub (``url`` points the fetch at it; benchmarks/bench_daemon.py).
+
+Like ``ingest.harvest`` it imports only httpx and pyarrow.
+
+    python -m ingest.daemon [--park dl --park dca] [--no-weather]
+"""
+
+import argparse
+import asyncio
+import signal
+import statistics
+import time
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ingest import dedup, pull_queue_times, pull_weather
+from ingest.client import client
+from ingest.schema import PARK_IDS
+
+PARK_TZ = ZoneInfo("America/Los_Angeles")
+# local hours polled: usually 8–24 (dl) and 8–22 (dca), but special days open
+# from 6 and run past midnight; CLOSED_POLL covers the closed part of the window
+HOURS = {"dl": (6, 26), "dca": (6, 26)}
+MARGIN = timedelta(minutes=30)  # poll a little before opening and after closing
+DEFAULT_CADENCE = 300.0  # seconds between refreshes until some have been seen
+CADENCE_SAMPLES = 6
+LAG = 20  # seconds after the expected refresh
+MIN_POLL, MAX_POLL = 30, 900
+CLOSED_POLL = 900
+FLUSH_ROWS = 2_000
+FLUSH_SECONDS = 1800  # no more files per day than the 30-minute cron wrote
+WEATHER_EVERY = 3600
+
+
+# --- Time ---
+class Clock:
+    def now(self) -> float:
+        return time.time()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class FakeClock(Clock):
+    """Simulated time: ``sleep`` moves the clock instead of waiting."""
+
+    def __init__(self, start: float):
+        self.t = start
+
+    def now(self) -> float:
+        return self.t
+
+    async def sleep(self, seconds: float) -> None:
+        self.t += max(seconds, 0)
+        await asyncio.sleep(0)
+
+
+# --- Per-park schedule ---
+class Schedule:
+    def __init__(self, park: str):
+        self.hours = HOURS.get(park, (0, 24))
+        self.newest: float | None = None  # newest last_updated seen (epoch s)
+        self.gaps: deque = deque(maxlen=CADENCE_SAMPLES)
+        self.misses = 0
+        self.failures = 0
+
+    def cadence(self) -> float:
+        return statistics.median(self.gaps) if self.gaps else DEFAULT_CADENCE
+
+    def opens(self, now: float) -> float | None:
+        """None while the park is within its hours, otherwise when it next opens."""
+        local = datetime.fromtimestamp(now, PARK_TZ)
+        midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        start, end = (timedelta(hours=h) for h in self.hours)
+        for day in (midnight - timedelta(days=1), midnight):  # closing may be past midnight
+            if day + start - MARGIN <= local < day + end + MARGIN:
+                return None
+        nxt = midnight + start - MARGIN
+        return (nxt if nxt > local else nxt + timedelta(days=1)).timestamp()
+
+    def after(
+        self, now: float, newest: float | None = None, open_rides: int = 0, error=False
+    ) -> float:
+        """When to poll next, given what the poll at ``now`` returned."""
+        opens = self.opens(now)
+        if opens is not None:
+            self.newest, self.misses, self.failures = None, 0, 0  # no overnight gap
+            return opens
+        if error:
+            self.failures += 1
+            return now + min(MIN_POLL * 2**self.failures, MAX_POLL)
+        self.failures = 0
+        if not open_rides:
+            return now + CLOSED_POLL
+        if newest is not None and (self.newest is None or newest > self.newest):
+            if self.newest is not None:
+                self.gaps.append(newest - self.newest)
+            self.newest, self.misses = newest, 0
+            due = newest + self.cadence() + LAG
+        else:
+            self.misses += 1
+            due = now + min(MIN_POLL * 2 ** (self.misses - 1), self.cadence())
+        return min(max(due, now + MIN_POLL), now + MAX_POLL)
+
+
+# --- Batched writes ---
+class Buffer:
+    def __init__(
+        self,
+        changes_only: bool = True,
+        flush_rows: int = FLUSH_ROWS,
+        flush_seconds: float = FLUSH_SECONDS,
+    ):
+        self.changes_only = changes_only
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.parts: dict[tuple[str, str], list[pa.Table]] = {}  # (UTC day, park) → ticks
+        self.states: dict[str, dict] = {}  # dedup state as of the buffered ticks
+        self.rows = 0
+        self.oldest: float | None = None  # clock time of the oldest buffered tick
+        self.files = 0
+
+    def add(self, table: pa.Table, park: str, ts: datetime, now: float) -> int:
+        """Buffer one tick (its changed rides only); returns the rows kept."""
+        if self.changes_only:
+            if park not in self.states:
+                self.states[park] = dedup.load_state(park)
+            table, self.states[park] = dedup.changed(table, self.states[park], ts)
+        if table.num_rows:
+            self.parts.setdefault((f"{ts:%Y-%m-%d}", park), []).append(table)
+            self.rows += table.num_rows
+            self.oldest = now if self.oldest is None else self.oldest
+        return table.num_rows
+
+    def due(self, now: float, day: str) -> bool:
+        return (
+            self.rows >= self.flush_rows
+            or self.oldest is not None
+            and now - self.oldest >= self.flush_seconds
+            or any(d != day for d, _ in self.parts)  # close a finished day's partition
+        )
+
+    def flush(self) -> int:
+        for (day, park), tables in self.parts.items():
+            pull_queue_times.write(pa.concat_tables(tables), park, date.fromisoformat(day))
+            self.files += 1
+        for park, state in self.states.items():
+            dedup.save_state(park, state)
+        rows, self.rows, self.oldest, self.parts = self.rows, 0, None, {}
+        return rows
+
+
+# --- Loop ---
+async def _poll(http, key: str, url: str):
+    if key == "weather":
+        return await pull_weather.fetch_hourly(http, attempts=1)
+    return await pull_queue_times.fetch(http, key, attempts=1, url=url)
+
+
+async def run(
+    parks: list[str],
+    clock: Clock | None = None,
+    buffer: Buffer | None = None,
+    url: str = pull_queue_times.URL,
+    weather: bool = False,
+    until: float | None = None,
+    log=print,
+) -> dict:
+    """Harvest until ``until`` (clock time) or cancellation; returns counters."""
+    clock, buffer = clock or Clock(), buffer or Buffer()
+    schedules = {p: Schedule(p) for p in parks}
+    now = clock.now()
+    due = {p: schedules[p].opens(now) or now for p in parks}
+    if weather:
+        due["weather"] = now
+    stats = {"polls": 0, "errors": 0, "fetched": 0, "kept": 0, "written": 0}
+
+    async with client() as http:
+        try:
+            while until is None or clock.now() < until:
+                now = clock.now()
+                wake = min(due.values())
+                if buffer.oldest is not None:
+                    wake = min(wake, buffer.oldest + buffer.flush_seconds)
+                if wake > now:
+                    await clock.sleep((wake if until is None else min(wake, until)) - now)
+                    continue
+
+                ready = [key for key, t in due.items() if t <= now]
+                results = await asyncio.gather(
+                    *(_poll(http, key, url) for key in ready), return_exceptions=True
+                )
+                ts = datetime.fromtimestamp(int(now), timezone.utc).replace(tzinfo=None)
+                for key, result in zip(ready, results):
+                    stats["polls"] += 1
+                    if isinstance(result, Exception):
+                        stats["errors"] += 1
+                        log(f"[ERROR] {ts:%H:%M:%S}Z {key}: {result!r}")
+                        if key == "weather":
+                            due[key] = now + WEATHER_EVERY
+                        else:
+                            due[key] = schedules[key].after(now, error=True)
+                        continue
+                    if key == "weather":
+                        pull_weather.write(result)
+                        due[key] = now + WEATHER_EVERY
+                        continue
+                    table = pull_queue_times.flat(result, key, ts)
+                    kept = buffer.add(table, key, ts, now)
+                    newest = pc.max(table["last_update"]).value
+                    open_rides = pc.sum(table["status"]).as_py() or 0
+                    due[key] = schedules[key].after(now, newest, open_rides)
+                    stats["fetched"] += table.num_rows
+                    stats["kept"] += kept
+                    log(
+                        f"{ts:%H:%M:%S}Z {key}: {kept}/{table.num_rows} rides changed, "
+                        f"next poll in {due[key] - now:.0f}s"
+                    )
+                if buffer.due(now, f"{ts:%Y-%m-%d}"):
+                    stats["written"] += buffer.flush()
+        except asyncio.CancelledError:
+            log("[INFO] stopping")
+        finally:
+            stats["written"] += buffer.flush()
+    return {**stats, "files": buffer.files}
+
+
+async def _serve(
+    parks: list[str],
+    weather: bool,
+    changes_only: bool,
+    url: str,
+    clock: Clock | None = None,
+    stop: asyncio.Event | None = None,
+) -> dict:
+    """``run`` until SIGTERM sets ``stop``; the harvest is cancelled and flushes."""
+    stop = stop or asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    harvest = asyncio.create_task(
+        run(parks, clock, Buffer(changes_only), url=url, weather=weather)
+    )
+    stopped = asyncio.create_task(stop.wait())
+    await asyncio.wait([harvest, stopped], return_when=asyncio.FIRST_COMPLETED)
+    harvest.cancel()
+    stopped.cancel()
+    return await harvest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll the parks until stopped (SIGTERM/^C).")
+    parser.add_argument(
+        "--park",
+        action="append",
+        choices=list(PARK_IDS),
+        help="park(s) to poll (repeatable); defaults to all",
+    )
+    parser.add_argument(
+        "--weather",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=f"also pull the forecast every {WEATHER_EVERY}s",
+    )
+    parser.add_argument(
+        "--changes-only",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="write only rides whose wait/status moved",
+    )
+    parser.add_argument(
+        "--url", default=pull_queue_times.URL, help="park endpoint template, {pid} = park id"
+    )
+    args = parser.parse_args(argv)
+
+    weather = args.weather
+    if weather and not pull_weather.API_KEY:
+        print("[WARN] OPENWEATHER_API_KEY not set – skipping weather")
+        weather = False
+    stats = asyncio.run(
+        _serve(args.park or list(PARK_IDS), weather, args.changes_only, args.url)
+    )
+    print(f"✅ {stats}")
+
+
+if __name__ == "__main__":
+    main()
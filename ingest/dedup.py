@@ -0,0 +1,136 @@
+# ingest/dedup.py
+"""
+Change-only harvest writes, and the reader-side inverse.
+
+queue-times.com refreshes a ride's ``last_updated`` only every few minutes
+and most waits sit still between ticks, so a full snapshot per tick is
+mostly repeats.  The harvester keeps the last *written* (last_update,
+posted_wait, status) per ride in ``data/raw/_state/<park>.json`` and writes
+only rides whose snapshot is new and whose wait or open flag moved.
+
+The first tick of each UTC day writes every ride (a keyframe), so a day's
+partition is self-contained: compaction, the rollup and anything reading
+one day never need the day before.  A tick where nothing moved still
+writes one row (unless it reruns the last tick), so the set of tick
+timestamps survives.  A lost or unreadable state file just means the next
+tick writes everything again.
+
+``forward_fill`` expands the compressed stream back to one row per ride per
+tick for readers that expect a regular series.  Anything that averages or
+counts raw rows over time must read the filled series; taking the latest
+row per ride is safe as is:
+
+  jobs.daily_rollup        forward-fills (carrying across incremental runs)
+  training.make_dataset    forward-fills; labels and features are as-of joins
+  analytics.query          ``raw_filled`` view; ``raw`` itself is per change
+  serving.*, Feast         latest row per ride – no fill needed
+  view_harvest             shows the rows as stored, i.e. the changes
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np  # already loaded by pyarrow
+import pyarrow as pa
+import pyarrow.compute as pc
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+STATE = Path("data/raw/_state")  # "_" prefix: ignored by the manifest and dataset readers
+
+
+# --- Harvest side ---
+def load_state(park: str, root: Path = STATE) -> dict:
+    try:
+        return json.loads((root / f"{park}.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(park: str, state: dict, root: Path = STATE) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f"{park}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def changed(table: pa.Table, state: dict, ts) -> tuple[pa.Table, dict]:
+    """Rows of a RAW_SCHEMA tick that differ from ``state``, and the state once written."""
+    day = f"{ts:%Y-%m-%d}"
+    rides = state.get("rides", {}) if state.get("day") == day else {}  # new day → keyframe
+    ids = table["ride_id"].to_pylist()
+    last = pc.cast(table["last_update"], pa.int64()).to_pylist()  # epoch seconds
+    waits = table["posted_wait"].to_pylist()
+    is_open = table["status"].to_pylist()
+
+    keep, new = [], dict(rides)
+    for ride_id, snapshot in zip(ids, zip(last, waits, is_open)):
+        prev = rides.get(str(ride_id))
+        fresh = (
+            prev is None
+            or prev[0] != snapshot[0]  # a re-fetched snapshot is never new
+            and (prev[1], prev[2]) != snapshot[1:]
+        )
+        keep.append(fresh)
+        if fresh:
+            new[str(ride_id)] = list(snapshot)
+    tick = f"{ts:%Y-%m-%dT%H:%M:%S}"
+    if ids and not any(keep) and state.get("tick") != tick:
+        keep[0] = True  # a quiet tick still leaves one row, so readers see every tick
+    return table.filter(_mask(keep)), {"day": day, "tick": tick, "rides": new}
+
+
+def _mask(keep: list[bool]) -> pa.Array:
+    # a packed bitmap: pa.array() would import pandas (see ingest.schema.array)
+    bits = np.packbits(np.asarray(keep, bool), bitorder="little")
+    return pa.Array.from_buffers(pa.bool_(), len(keep), [None, pa.py_buffer(bits)])
+
+
+# --- Reader side ---
+def forward_fill(
+    df: "pd.DataFrame", by="ride_id", time="timestamp", ticks=None, ticks_by: str | None = None
+) -> "pd.DataFrame":
+    """One row per ``by`` per tick, each carrying the latest row written at or before it.
+
+    ``ticks`` defaults to the distinct timestamps in ``df``; the harvester
+    writes at least one row per tick, so these are the original ticks.  Pass
+    a ``pd.date_range`` for a fixed grid.  ``ticks_by`` names a column whose
+    groups keep their own ticks (parks pulled at different times).  Nothing
+    is invented before a ride's first row.
+    """
+    import pandas as pd  # reader side only: the harvest path never loads pandas
+
+    if df.empty:
+        return df
+    if ticks_by is not None:
+        parts = [
+            forward_fill(part, by, time, ticks)
+            for _, part in df.groupby(ticks_by, sort=False, observed=True)
+        ]
+        return pd.concat(parts, ignore_index=True).sort_values(time, kind="stable")
+    by = [by] if isinstance(by, str) else list(by)
+    obs = df.sort_values(time, kind="stable", ignore_index=True)
+    ticks = pd.Index(obs[time] if ticks is None else ticks).astype(obs[time].dtype)
+    ticks = ticks.unique().sort_values()
+
+    first = obs.groupby(by, sort=False, observed=True)[time].min().reset_index()
+    start = ticks.searchsorted(first[time], side="left")
+    counts = len(ticks) - start
+    grid = first[by].loc[first.index.repeat(counts)].reset_index(drop=True)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    grid["_tick"] = ticks[np.repeat(start, counts) + offsets]
+
+    filled = pd.merge_asof(
+        grid.sort_values("_tick", kind="stable"),
+        obs,
+        left_on="_tick",
+        right_on=time,
+        by=by,
+        direction="backward",
+    )
+    filled[time] = filled.pop("_tick")
+    return filled[list(df.columns)].sort_values([time, *by], ignore_index=True)
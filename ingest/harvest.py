@@ -0,0 +1,118 @@
+# ingest/harvest.py
+"""
+Fetch every park and the hourly weather forecast in a single tick.
+
+All requests share one pooled keep-alive client and run concurrently, so a
+tick costs roughly the slowest request rather than the sum of them.  Each
+park retries on its own; a park that keeps failing is reported without
+holding back the rows of the others.
+
+A tick is a short-lived process, so startup is most of its cost: the path
+imports only httpx and pyarrow (argparse for the CLI, no pandas or typer)
+and creates nothing until it writes.  benchmarks/bench_startup.py guards it.
+
+    python -m ingest.harvest [--park dl] [--no-weather] [--as-of 2025-07-04T12:00] [--online]
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import sys
+
+from ingest import pull_queue_times, pull_weather
+from ingest.client import MAX_CONNECTIONS, client
+
+
+async def _bounded(sem: asyncio.Semaphore, coro):
+    async with sem:
+        return await coro
+
+
+async def tick(
+    parks: list[str],
+    weather: bool = True,
+    concurrency: int = MAX_CONNECTIONS,
+    url: str = pull_queue_times.URL,
+):
+    """Return ``{park: lands | Exception}`` plus the weather table (or Exception/None)."""
+    sem = asyncio.Semaphore(concurrency)
+    async with client(concurrency) as http:
+        jobs = [_bounded(sem, pull_queue_times.fetch(http, p, url=url)) for p in parks]
+        if weather:
+            jobs.append(_bounded(sem, pull_weather.fetch_hourly(http)))
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+    lands = dict(zip(parks, results))
+    return lands, results[-1] if weather else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch every park and the forecast once.")
+    parser.add_argument(
+        "--park",
+        action="append",
+        choices=list(pull_queue_times.PARK_IDS),
+        help="park(s) to fetch (repeatable); defaults to all",
+    )
+    parser.add_argument(
+        "--weather",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="also pull the hourly weather forecast",
+    )
+    parser.add_argument(
+        "--as-of", type=pull_queue_times.as_of, help="override UTC timestamp (YYYY-MM-DDTHH:MM)"
+    )
+    parser.add_argument(
+        "--changes-only",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="write only rides whose wait/status moved",
+    )
+    parser.add_argument(
+        "--online",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="push the tick to the Feast online store",
+    )
+    parser.add_argument(
+        "--url", default=pull_queue_times.URL, help="park endpoint template, {pid} = park id"
+    )
+    args = parser.parse_args(argv)
+    park = args.park or list(pull_queue_times.PARK_IDS)
+
+    ts = args.as_of or dt.datetime.utcnow().replace(second=0, microsecond=0)
+    weather = args.weather
+    if weather and not pull_weather.API_KEY:
+        print("[WARN] OPENWEATHER_API_KEY not set – skipping weather")
+        weather = False
+
+    print(f"Fetching {', '.join(p.upper() for p in park)} @ {ts.isoformat()}Z …")
+    lands, weather_table = asyncio.run(tick(park, weather, url=args.url))
+
+    failed = []
+    for p, result in lands.items():
+        if isinstance(result, Exception):
+            print(f"[ERROR] {p}: {result!r}", file=sys.stderr)
+            failed.append(p)
+            continue
+        table = pull_queue_times.flat(result, p, ts)
+        print(f"✅ {pull_queue_times.save(table, p, ts, args.changes_only)}")
+
+    if isinstance(weather_table, Exception):
+        print(f"[ERROR] weather: {weather_table!r}", file=sys.stderr)
+        failed.append("weather")
+    elif weather_table is not None:
+        out = pull_weather.write(weather_table)
+        print(f"✅ wrote {weather_table.num_rows} weather rows to {out}")
+
+    if args.online and len(failed) < len(park):
+        from serving.online import push
+
+        print(f"✅ online store: {push(ts.date())}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
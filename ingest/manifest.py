@@ -0,0 +1,89 @@
+# ingest/manifest.py
+"""
+Cached listing of the raw parquet tree.
+
+Globbing ``data/raw/*/park=*/*.parquet`` opens every directory and grows
+with every harvest tick.  The listing here is cached in
+``data/.cache/raw_manifest.json`` and keyed on the mtimes of the day and
+park directories: adding a fragment changes its park directory's mtime and
+compaction swaps the park directory itself, so an unchanged fingerprint
+means an unchanged file set.  Checking it costs one ``stat`` per partition
+rather than a listing of every file, and callers can prune by day before
+anything is opened.
+"""
+
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+RAW = Path("data/raw")
+CACHE = Path("data/.cache/raw_manifest.json")
+
+
+def _partitions(root: Path) -> list[tuple[str, int]]:
+    """``(day/park, mtime_ns)`` for every park directory, plus each day directory."""
+    out = []
+    with os.scandir(root) as days:
+        for day in days:
+            if not day.is_dir() or day.name.startswith((".", "_")):
+                continue
+            out.append((day.name, day.stat().st_mtime_ns))
+            with os.scandir(day.path) as parks:
+                for park in parks:
+                    if park.is_dir() and park.name.startswith("park="):
+                        out.append((f"{day.name}/{park.name}", park.stat().st_mtime_ns))
+    return sorted(out)
+
+
+def _load(cache: Path) -> dict:
+    try:
+        return json.loads(cache.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(cache: Path, manifest: dict) -> None:
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, cache)
+
+
+def manifest(root: Path = RAW, cache: Path = CACHE) -> dict[str, list[str]]:
+    """``{"<day>.parquet/park=<p>": [file, ...]}``, relisted only when the tree changed."""
+    if not root.exists():
+        return {}
+    fingerprint = [list(p) for p in _partitions(root)]
+    cached = _load(cache)
+    if cached.get("root") == str(root.resolve()) and cached.get("fingerprint") == fingerprint:
+        return cached["partitions"]
+
+    partitions = {}
+    for key, _ in fingerprint:
+        if "/" in key:
+            partitions[key] = sorted(p.name for p in (root / key).glob("*.parquet"))
+    _save(
+        cache,
+        {"root": str(root.resolve()), "fingerprint": fingerprint, "partitions": partitions},
+    )
+    return partitions
+
+
+def raw_files(
+    root: Path = RAW,
+    start: date | None = None,
+    end: date | None = None,
+    parks: list[str] | None = None,
+) -> list[Path]:
+    """Raw parquet files, optionally pruned to days in ``[start, end]`` and to ``parks``."""
+    files = []
+    for key, names in manifest(root).items():
+        day_dir, park_dir = key.split("/")
+        day = date.fromisoformat(day_dir.removesuffix(".parquet"))
+        if (start and day < start) or (end and day > end):
+            continue
+        if parks and park_dir.removeprefix("park=") not in parks:
+            continue
+        files += [root / key / n for n in names]
+    return files
@@ -0,0 +1,254 @@
+# ingest/objcache.py
+"""
+Read-through disk cache for object-store (s3://) reads.
+
+Objects are mirrored under ``DQT_CACHE_DIR`` (default ``data/.cache/objects``)
+at their bucket path, so hive segments such as ``park=dl`` survive and a
+cached file can be handed to any local reader.  Each copy carries a small
+sidecar under ``_meta/`` with the object's version (ETag, else mtime).
+
+* unpinned reads revalidate: the listing (or one HEAD) supplies the current
+  version and a mismatch refetches
+* pinned reads – days that are final: at least ``PIN_AFTER_DAYS`` old *and*
+  compacted (``is_final``: every park is one ``compacted.parquet``) – trust
+  the cache outright; their listings and ``info`` results are cached too, so
+  a repeat run over pinned history makes no network calls at all.  A pinned
+  object that 404s (rewritten after all) drops the memos that listed it, so
+  the next ``glob``/``info`` asks the store again
+* the cache is bounded by ``DQT_CACHE_MAX_GB`` (default 5); least recently
+  used files (by mtime, bumped on every hit) are evicted first.  Files held
+  through ``hold`` or used in the last ``EVICT_GRACE`` seconds are skipped,
+  so eviction never pulls a file from under a reader that just fetched it
+
+Downloads land in a temp file and are renamed into place, so concurrent
+processes (e.g. rollup backfill workers) can share one cache directory.
+Any fsspec filesystem works as the backing store, including a local
+directory or a moto server.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import fsspec
+
+CACHE_ROOT = Path(os.environ.get("DQT_CACHE_DIR", "data/.cache/objects"))
+MAX_BYTES = int(float(os.environ.get("DQT_CACHE_MAX_GB", "5")) * 2**30)
+PIN_AFTER_DAYS = 2  # younger days are never pinned; older ones once compacted
+COMPACTED = "compacted.parquet"  # jobs.compact's output: the day is final
+EVICT_EVERY = 0.1  # check the size bound after fetching this share of it
+EVICT_GRACE = 300  # seconds a fetched or hit file is safe from eviction
+
+
+def is_pinned(day: date) -> bool:
+    """Old enough to pin – still only once ``ObjectCache.is_final`` says so."""
+    return day <= datetime.now(timezone.utc).date() - timedelta(days=PIN_AFTER_DAYS)
+
+
+def version(info: dict) -> str:
+    tag = info.get("ETag") or info.get("etag") or info.get("mtime") or info.get("LastModified")
+    return f"{info.get('size')}:{tag}"
+
+
+def _write_json(path: Path, obj) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp.write_text(json.dumps(obj, default=str))
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+class ObjectCache:
+    def __init__(self, fs, root: Path = CACHE_ROOT, max_bytes: int = MAX_BYTES):
+        self.fs = fs
+        self.root = Path(root).resolve()
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.bytes_fetched = 0
+        self._since_evict = 0
+        self._held: dict[str, int] = {}  # cache key → readers inside hold()
+        self._lock = threading.Lock()
+        self._evicting = threading.Lock()
+
+    @classmethod
+    def for_url(cls, url: str, **kw) -> "ObjectCache":
+        fs, _ = fsspec.core.url_to_fs(url)
+        return cls(fs, **kw)
+
+    # --- paths ---
+    def _key(self, path: str) -> str:
+        return self.fs._strip_protocol(path).lstrip("/")
+
+    def local(self, path: str) -> Path:
+        return self.root / self._key(path)
+
+    def _meta(self, path: str) -> Path:
+        return self.root / "_meta" / f"{self._key(path)}.json"
+
+    def _memo(self, kind: str, arg: str) -> Path:
+        digest = hashlib.sha256(f"{kind}:{arg}".encode()).hexdigest()
+        return self.root / "_listings" / f"{digest}.json"
+
+    # --- metadata, memoized for pinned paths ---
+    def glob(self, pattern: str, pinned: bool = False) -> dict[str, dict]:
+        """``{path: info}`` for ``pattern``; pinned listings are answered from disk."""
+        memo = self._memo("glob", pattern)
+        if pinned and (cached := _read_json(memo)) is not None:
+            return cached
+        found = self.fs.glob(pattern, detail=True)
+        if pinned:
+            _write_json(memo, found)
+        return found
+
+    def is_final(self, day_dir: str) -> bool:
+        """Whether every park of ``day_dir`` is compacted; a yes is remembered for good."""
+        memo = self._memo("final", day_dir)
+        if _read_json(memo):
+            return True
+        parks: dict[str, set[str]] = {}
+        for path in self.fs.glob(f"{day_dir.rstrip('/')}/park=*/*.parquet"):
+            park, name = path.rsplit("/", 2)[-2:]
+            parks.setdefault(park, set()).add(name)
+        final = bool(parks) and all(names == {COMPACTED} for names in parks.values())
+        if final:
+            _write_json(memo, True)
+        return final
+
+    def _forget(self, path: str) -> None:
+        """Drop the pinned memos that vouch for ``path`` – it turned out not to exist."""
+        self._memo("info", path).unlink(missing_ok=True)
+        for memo in (self.root / "_listings").glob("*.json"):
+            listed = _read_json(memo)
+            if isinstance(listed, dict) and path in listed:
+                memo.unlink(missing_ok=True)
+
+    def info(self, path: str, pinned: bool = False) -> dict:
+        """``fs.info``; a pinned answer (including "missing") is remembered."""
+        memo = self._memo("info", path)
+        if pinned and (cached := _read_json(memo)) is not None:
+            if cached.get("missing"):
+                raise FileNotFoundError(path)
+            return cached
+        try:
+            info = self.fs.info(path)
+        except FileNotFoundError:
+            if pinned:
+                _write_json(memo, {"missing": True})
+            raise
+        if pinned:
+            _write_json(memo, info)
+        return info
+
+    # --- data ---
+    def fetch(self, path: str, info: dict | None = None, pinned: bool = False) -> Path:
+        """Local copy of ``path``, downloaded only when missing or stale."""
+        local, meta = self.local(path), self._meta(path)
+        if local.exists():
+            cached = _read_json(meta) or {}
+            if pinned or cached.get("version") == version(info or self.info(path)):
+                try:
+                    os.utime(local)  # LRU clock
+                except FileNotFoundError:
+                    pass  # evicted just now – download it again
+                else:
+                    with self._lock:
+                        self.hits += 1
+                    return local
+
+        local.parent.mkdir(parents=True, exist_ok=True)
+        tmp = local.with_name(f".{local.name}.{uuid.uuid4().hex}")
+        try:
+            info = info or self.info(path, pinned)
+            self.fs.get_file(path, str(tmp))
+            os.replace(tmp, local)
+        except FileNotFoundError:
+            if pinned:
+                self._forget(path)  # the memoized listing is stale
+            raise
+        finally:
+            tmp.unlink(missing_ok=True)
+        _write_json(meta, {"path": path, "version": version(info)})
+
+        size = local.stat().st_size
+        with self._lock:
+            self.misses += 1
+            self.bytes_fetched += size
+            self._since_evict += size
+            due = self._since_evict >= self.max_bytes * EVICT_EVERY
+            if due:
+                self._since_evict = 0
+        if due:
+            with self._holding(path):  # never evict what this call returns
+                self.evict()
+        return local
+
+    @contextmanager
+    def _holding(self, path: str):
+        key = self._key(path)
+        with self._lock:
+            self._held[key] = self._held.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._held[key] -= 1
+                if not self._held[key]:
+                    del self._held[key]
+
+    @contextmanager
+    def hold(self, path: str, info: dict | None = None, pinned: bool = False):
+        """``fetch``, with the local copy kept from ``evict`` until the block exits."""
+        with self._holding(path):
+            yield self.fetch(path, info, pinned)
+
+    def open(self, path: str, mode: str = "rb", pinned: bool = False):
+        with self.hold(path, pinned=pinned) as local:
+            return open(local, mode)  # an open file survives a later unlink
+
+    def evict(self) -> int:
+        """Drop least recently used files until the cache fits; returns bytes freed."""
+        if not self._evicting.acquire(blocking=False):
+            return 0  # another thread is already at it
+        try:
+            return self._evict()
+        finally:
+            self._evicting.release()
+
+    def _evict(self) -> int:
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if dirpath == str(self.root):
+                dirnames[:] = [d for d in dirnames if d not in ("_meta", "_listings")]
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                try:
+                    st = os.stat(os.path.join(dirpath, name))
+                except FileNotFoundError:
+                    continue  # evicted by another process meanwhile
+                files.append((st.st_mtime, st.st_size, os.path.join(dirpath, name)))
+        total = sum(size for _, size, _ in files)
+        recent = time.time() - EVICT_GRACE
+        freed = 0
+        for mtime, size, path in sorted(files):
+            if total - freed <= self.max_bytes or mtime > recent:
+                break  # sorted by mtime: everything after is more recent still
+            key = os.path.relpath(path, self.root)
+            with self._lock:
+                if key in self._held:
+                    continue
+                Path(path).unlink(missing_ok=True)
+            (self.root / "_meta" / f"{key}.json").unlink(missing_ok=True)
+            freed += size
+        return freed
@@ -1,57 +1,119 @@
+# ingest/pull_queue_times.py
+"""
+Fetch one park's queue times and write them as a raw parquet part.
+
+The fetch → write path needs only httpx and pyarrow: the CLI is argparse,
+columns become Arrow through ``ingest.schema.array`` (NumPy buffers) and
+parts are written with ``pq.write_table`` – ``pa.array`` and
+``write_to_dataset`` would both import pandas.  Importing the module touches
+no files; ``data/raw`` is created by the first write.
+benchmarks/bench_startup.py checks all of this.
+
+    python -m ingest.pull_queue_times --park dl [--as-of 2025-07-04T12:00] [--no-changes-only]
+"""
+
+import argparse
+import asyncio
 import datetime as dt
+import uuid
 from pathlib import Path
 
 import httpx
-import pandas as pd
-import typer
-from tenacity import retry, stop_after_attempt, wait_exponential
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ingest import dedup
+from ingest.client import client
+from ingest.schema import PARK_IDS, RAW_SCHEMA, TS, array, to_ts
 
-app = typer.Typer(add_completion=False)
 URL = "https://queue-times.com/en-US/parks/{pid}/queue_times.json"
-PARK_IDS = {"dl": 16, "dca": 17}
+ATTEMPTS = 5
 DATA = Path("data/raw")
-DATA.mkdir(parents=True, exist_ok=True)
-
-
-@retry(stop=stop_after_attempt(5), wait=wait_exponential())
-def fetch(park: str):  # list[dict]
-    r = httpx.get(URL.format(pid=PARK_IDS[park]), timeout=15)
-    r.raise_for_status()
-    return r.json()["lands"]
-
-
-def flat(lands, park, ts):
-    rows = []
-    for land in lands:
-        for ride in land["rides"]:
-            rows.append(
-                dict(
-                    timestamp=ts,
-                    park=park,
-                    ride_id=ride["id"],
-                    ride_name=ride["name"],
-                    status=ride["is_open"],
-                    posted_wait=ride["wait_time"],
-                    last_update=ride["last_updated"],
-                )
-            )
-    return rows
-
-
-@app.command()
-def pull(
-    park: str = typer.Option(..., help="dl or dca"),
-    as_of: dt.datetime | None = typer.Option(
-        None, formats=["%Y-%m-%dT%H:%M"], help="override UTC timestamp"
-    ),
-):
-    ts = as_of or dt.datetime.utcnow().replace(second=0, microsecond=0)
-    typer.echo(f"Fetching {park.upper()} @ {ts.isoformat()}Z …")
-    df = pd.DataFrame(flat(fetch(park), park, ts))
-    out = DATA / f"{ts:%Y-%m-%d}.parquet"
-    df.to_parquet(out, partition_cols=["park"], compression="snappy", index=False)
-    typer.secho(f"✅ wrote {len(df):,} rows to {out}", fg=typer.colors.GREEN)
+
+
+async def fetch(
+    http: httpx.AsyncClient, park: str, attempts: int = ATTEMPTS, url: str = URL
+):  # list[dict]
+    for attempt in range(attempts):
+        try:
+            r = await http.get(url.format(pid=PARK_IDS[park]))
+            r.raise_for_status()
+            return r.json()["lands"]
+        except httpx.HTTPError:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(2**attempt)
+
+
+def flat(lands, park, ts) -> pa.Table:
+    """Build a RAW_SCHEMA table column by column straight from the API payload."""
+    rides = [ride for land in lands for ride in land["rides"]]
+    n = len(rides)
+    epoch = int(ts.replace(tzinfo=dt.timezone.utc).timestamp())  # ``ts`` is naive UTC
+    return pa.Table.from_arrays(
+        [
+            array([epoch] * n, TS),
+            array([park] * n, RAW_SCHEMA.field("park").type),
+            array([r["id"] for r in rides], pa.int32()),
+            array([r["name"] for r in rides], RAW_SCHEMA.field("ride_name").type),
+            array([r["is_open"] for r in rides], pa.bool_()),
+            array([r["wait_time"] for r in rides], pa.int16()),
+            to_ts(array([r["last_updated"] for r in rides], pa.string())),
+        ],
+        schema=RAW_SCHEMA,
+    )
+
+
+def write(table: pa.Table, park: str, ts) -> Path:
+    """One hive part: ``<day>.parquet/park=<park>/<uuid>-0.parquet``, as write_to_dataset."""
+    day = DATA / f"{ts:%Y-%m-%d}.parquet"
+    out = day / f"park={park}"
+    out.mkdir(parents=True, exist_ok=True)
+    part = out / f"{uuid.uuid4().hex}-0.parquet"
+    pq.write_table(table.drop_columns(["park"]), part, compression="snappy")
+    return day
+
+
+def save(table: pa.Table, park: str, ts, changes_only: bool = True) -> str:
+    """Write a tick (only its changed rides by default); returns a one-line summary."""
+    total = table.num_rows
+    if changes_only:
+        table, state = dedup.changed(table, dedup.load_state(park), ts)
+    out = write(table, park, ts) if table.num_rows else None
+    if changes_only:
+        dedup.save_state(park, state)  # only once the rows it describes are on disk
+    if out is None:
+        return f"{park}: no ride changed since the last tick – nothing written"
+    return f"wrote {table.num_rows:,} of {total:,} {park} rows to {out}"
+
+
+async def _fetch_one(park: str):
+    async with client() as http:
+        return await fetch(http, park)
+
+
+def as_of(value: str) -> dt.datetime:
+    """``--as-of`` parser shared by the ingest CLIs (UTC, minute precision)."""
+    return dt.datetime.strptime(value, "%Y-%m-%dT%H:%M")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch one park into data/raw.")
+    parser.add_argument("--park", required=True, choices=list(PARK_IDS), help="dl or dca")
+    parser.add_argument("--as-of", type=as_of, help="override UTC timestamp (YYYY-MM-DDTHH:MM)")
+    parser.add_argument(
+        "--changes-only",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="write only rides whose wait/status moved",
+    )
+    args = parser.parse_args(argv)
+
+    ts = args.as_of or dt.datetime.utcnow().replace(second=0, microsecond=0)
+    print(f"Fetching {args.park.upper()} @ {ts.isoformat()}Z …")
+    table = flat(asyncio.run(_fetch_one(args.park)), args.park, ts)
+    print(f"✅ {save(table, args.park, ts, args.changes_only)}")
 
 
 if __name__ == "__main__":
-    app()
+    main()
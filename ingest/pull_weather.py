@@ -1,11 +1,28 @@
 # ingest/pull_weather.py
+"""
+Hourly forecast for the resort (next 24 hours) → data/weather/weather_<day>.parquet.
+
+Built with ``ingest.schema.array`` – no pandas on the harvest path –
+in the layout the pandas version wrote (``timestamp[ns, UTC]``,
+``temp_f``, ``precip_prob``), so readers see no difference.
+
+    python -m ingest.pull_weather
+"""
+
+import argparse
+import asyncio
+import datetime as dt
 import os
-import time
+import sys
 from pathlib import Path
 
 import httpx
-import pandas as pd
-import typer
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from ingest.client import client
+from ingest.schema import array
 
 LAT, LON = 33.8121, -117.9190  # Disneyland Resort
 API_KEY = os.environ.get("OPENWEATHER_API_KEY")
@@ -16,39 +33,99 @@ URL = (
     "&units=imperial"
     f"&appid={API_KEY}"
 )
-HEADERS = {"User-Agent": "DLQueueTimes/0.1 (contact: you@example.com)"}
+ATTEMPTS = 4
 DATA_DIR = Path("data/weather")
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-app = typer.Typer(add_completion=False)
-
-
-def fetch_hourly() -> pd.DataFrame:
-    for attempt in range(4):
-        r = httpx.get(URL, headers=HEADERS, timeout=20)
-        if r.status_code == 200:
-            hours = r.json()["hourly"][:24]
-            return pd.DataFrame(
-                dict(
-                    timestamp=[pd.Timestamp.utcfromtimestamp(h["dt"]) for h in hours],
-                    temp_f=[h["temp"] for h in hours],
-                    precip_prob=[int(h.get("pop", 0) * 100) for h in hours],
+WEATHER_SCHEMA = pa.schema(
+    [
+        pa.field("timestamp", pa.timestamp("ns", tz="UTC")),
+        pa.field("temp_f", pa.float64()),
+        pa.field("precip_prob", pa.int64()),
+    ]
+)
+
+
+def hourly(hours: list[dict]) -> pa.Table:
+    stamps = array([h["dt"] for h in hours], pa.timestamp("s", tz="UTC"))
+    return pa.Table.from_arrays(
+        [
+            stamps.cast(WEATHER_SCHEMA.field("timestamp").type),
+            array([float(h["temp"]) for h in hours], pa.float64()),
+            array([int(h.get("pop", 0) * 100) for h in hours], pa.int64()),
+        ],
+        schema=WEATHER_SCHEMA,
+    )
+
+
+async def fetch_hourly(http: httpx.AsyncClient, attempts: int = ATTEMPTS) -> pa.Table:
+    for attempt in range(attempts):
+        try:
+            r = await http.get(URL, timeout=20)
+        except httpx.TransportError:
+            if attempt == attempts - 1:
+                raise
+        else:
+            if r.status_code == 200:
+                return hourly(r.json()["hourly"][:24])
+            if attempt == attempts - 1:
+                # raise_for_status passes 1xx/2xx/3xx, which are no forecast either
+                raise httpx.HTTPStatusError(
+                    f"weather: HTTP {r.status_code}", request=r.request, response=r
                 )
-            )
-        time.sleep(2**attempt)
-    r.raise_for_status()
+        await asyncio.sleep(2**attempt)
+
+
+def write(table: pa.Table) -> Path:
+    first = table["timestamp"].cast(pa.int64())[0].as_py() // 10**9
+    out = DATA_DIR / f"weather_{dt.datetime.utcfromtimestamp(first):%Y-%m-%d}.parquet"
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, out)
+    return out
+
+
+def current(now: dt.datetime | None = None, root: Path = DATA_DIR) -> dict | None:
+    """The forecast hour in effect at ``now`` (UTC), usually from the newest file alone.
+
+    Files are named by their first hour, so the newest one dated today or
+    earlier holds the latest forecast for the current hour; older files are
+    read only while a newer one starts after ``now``, and files exported from
+    SQLite (no ``temp_f``) are passed over.  ``None`` without any forecast.
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    today = f"weather_{now:%Y-%m-%d}.parquet"
+    files = sorted(root.glob("weather_*.parquet"))
+    found = None
+    for path in [p for p in files if p.name <= today][::-1] or files[:1]:
+        if not {"temp_f", "precip_prob"} <= set(pq.read_schema(path).names):
+            continue
+        table = pq.read_table(path, columns=["timestamp", "temp_f", "precip_prob"])
+        table = table.sort_by("timestamp")
+        stamps = table["timestamp"].cast(pa.timestamp("s", tz="UTC")).cast(pa.int64())
+        past = pc.sum(pc.less_equal(stamps, int(now.timestamp()))).as_py() or 0
+        if past or found is None:
+            found = table.slice(max(past - 1, 0), 1).to_pylist()
+        if past:
+            break
+    if not found:
+        return None
+    return {"temp_f": float(found[0]["temp_f"]), "precip_prob": float(found[0]["precip_prob"])}
+
+
+async def _fetch_one() -> pa.Table:
+    async with client() as http:
+        return await fetch_hourly(http)
 
 
-@app.command()
-def pull():
+def main(argv=None):
+    argparse.ArgumentParser(
+        description="Pull the hourly forecast into data/weather."
+    ).parse_args(argv)
     if not API_KEY:
-        raise typer.Exit("OPENWEATHER_API_KEY env-var not set")
+        sys.exit("OPENWEATHER_API_KEY env-var not set")
 
-    df = fetch_hourly()
-    date_str = df["timestamp"].iloc[0].strftime("%Y-%m-%d")
-    out = DATA_DIR / f"weather_{date_str}.parquet"
-    df.to_parquet(out, index=False)
-    typer.secho(f"✅ wrote {len(df)} rows to {out}", fg=typer.colors.GREEN)
+    table = asyncio.run(_fetch_one())
+    out = write(table)
+    print(f"✅ wrote {table.num_rows} rows to {out}")
 
 
 if __name__ == "__main__":
-    app()
+    main()
@@ -0,0 +1,170 @@
+# ingest/reader.py
+"""
+Threaded, projected reads of raw parquet files into one RAW_SCHEMA table.
+
+Files written before the schema existed (or by the SQLite export, which has
+no ``ride_id``) are checked from their footer and skipped when they lack a
+requested column.  With ``partial=True`` they are kept instead: each file's
+columns are resolved on their own (the export's ``ride``/``wait_time`` stand
+in for ``ride_name``/``posted_wait``) and whatever is still missing is null.
+The time window (and an optional ``ride_id`` set) is pushed into each scan so
+compacted files, sorted by (ride_id, timestamp), only decode the row groups
+needed.
+
+``iter_raw`` yields the same rows batch by batch, file after file, and
+``count_raw`` counts them, for readers that page instead of loading it all.
+"""
+
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow.fs import LocalFileSystem
+
+from ingest.schema import RAW_SCHEMA, conform
+
+READ_THREADS = 16
+ALIASES = {"ride_name": ["ride"], "posted_wait": ["wait_time"]}  # SQLite-export names
+PARQUET = ds.ParquetFileFormat()
+LOCAL = LocalFileSystem()
+
+
+def _bound(ts_type: pa.DataType, value: datetime) -> pa.Scalar:
+    if ts_type.tz is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    elif ts_type.tz is None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return pa.scalar(value, ts_type)
+
+
+def _time_filter(ts_type: pa.DataType, start, end) -> ds.Expression | None:
+    """``start <= timestamp < end`` in the file's own timestamp type."""
+    if not pa.types.is_timestamp(ts_type) or (start is None and end is None):
+        return None
+    expr = None
+    if start is not None:
+        expr = ds.field("timestamp") >= _bound(ts_type, start)
+    if end is not None:
+        upper = ds.field("timestamp") < _bound(ts_type, end)
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+class _Scan:
+    """One file's part of a read: which of its columns to decode, and the filter."""
+
+    def __init__(self, path: Path, columns: list[str], start, end, rides, partial: bool):
+        self.path, self.columns = str(path), columns
+        self.fragment = PARQUET.make_fragment(str(Path(path).resolve()), filesystem=LOCAL)
+        schema = self.fragment.physical_schema  # footer only
+        self.names: dict[str, str | None] = {}  # column → its name here (None: not here)
+        for c in columns:
+            found = [
+                n for n in [c, *(ALIASES.get(c, []) if partial else [])] if n in schema.names
+            ]
+            if found:
+                self.names[c] = found[0]
+            elif partial or c == "park" and "park=" in self.path:
+                self.names[c] = None
+        self.ok = len(self.names) == len(columns) and "timestamp" in schema.names
+        if not self.ok:
+            return
+        self.filter = _time_filter(schema.field("timestamp").type, start, end)
+        wanted = [n for n in self.names.values() if n is not None]
+        if self.filter is not None and "timestamp" not in wanted:
+            wanted.append("timestamp")
+        if rides is not None:
+            if "ride_id" not in schema.names:
+                self.ok = False  # SQLite exports have no ride_id to filter on
+                return
+            ride_filter = ds.field("ride_id").isin(
+                pa.array(rides, schema.field("ride_id").type)
+            )
+            self.filter = ride_filter if self.filter is None else self.filter & ride_filter
+            if "ride_id" not in wanted:
+                wanted.append("ride_id")
+        self.wanted = wanted
+
+    def finish(self, table: pa.Table) -> pa.Table:
+        """A decoded table or batch of this file as ``columns`` in RAW_SCHEMA types."""
+        if isinstance(table, pa.RecordBatch):
+            table = pa.Table.from_batches([table])
+        canonical = {n: c for c, n in self.names.items() if n is not None}
+        table = conform(table.rename_columns([canonical.get(n, n) for n in table.column_names]))
+        for c, n in self.names.items():
+            if n is not None:
+                continue
+            field = RAW_SCHEMA.field(c)
+            if c == "park" and "park=" in self.path:
+                park = self.path.split("park=", 1)[1].split("/", 1)[0]
+                indices = pa.array([0] * table.num_rows, pa.int8())
+                col = pa.DictionaryArray.from_arrays(indices, [park])
+            else:
+                col = pa.nulls(table.num_rows, field.type)
+            table = table.append_column(field, col)
+        return table.select(self.columns)
+
+
+def _read_one(
+    path: Path, columns: list[str], start, end, rides=None, partial=False
+) -> pa.Table | None:
+    scan = _Scan(path, columns, start, end, rides, partial)
+    if not scan.ok:
+        return None
+    return scan.finish(scan.fragment.to_table(columns=scan.wanted, filter=scan.filter))
+
+
+def read_raw(
+    files: list[Path],
+    columns: list[str],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    threads: int = READ_THREADS,
+    rides: list[int] | None = None,
+    partial: bool = False,
+) -> pa.Table:
+    """Concatenate ``columns`` of ``files`` for ``start <= timestamp < end``.
+
+    ``park`` may be requested even though it lives in the hive path; ``rides``
+    keeps only those ``ride_id`` values; ``partial`` keeps files that lack
+    some of ``columns`` (nulls there).
+    """
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        tables = pool.map(lambda f: _read_one(f, columns, start, end, rides, partial), files)
+        tables = [t for t in tables if t is not None]
+    if not tables:
+        return RAW_SCHEMA.empty_table().select(columns)
+    return pa.concat_tables(tables)
+
+
+def iter_raw(
+    files: list[Path],
+    columns: list[str],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    rides: list[int] | None = None,
+    partial: bool = False,
+) -> Iterator[pa.Table]:
+    """``read_raw``'s rows as small tables, in file order; stop early to read less."""
+    for path in files:
+        scan = _Scan(path, columns, start, end, rides, partial)
+        if scan.ok:
+            for batch in scan.fragment.to_batches(columns=scan.wanted, filter=scan.filter):
+                if batch.num_rows:
+                    yield scan.finish(batch)
+
+
+def count_raw(
+    files: list[Path],
+    columns: list[str],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    rides: list[int] | None = None,
+    partial: bool = False,
+) -> int:
+    """Rows ``read_raw`` would return, decoding only the filter columns."""
+    scans = (_Scan(path, columns, start, end, rides, partial) for path in files)
+    return sum(s.fragment.count_rows(filter=s.filter) for s in scans if s.ok)
@@ -0,0 +1,93 @@
+# ingest/schema.py
+"""
+Arrow schema of the raw queue-time parts under ``data/raw``.
+
+Parquet has no seconds unit and always reads dictionary indices back as
+int32, so files round-trip as ``timestamp[ms, UTC]`` / ``dictionary<int32>``;
+``conform`` restores the exact types and upgrades parts written before the
+schema existed (naive ns timestamps, int64 ids, ISO-string ``last_update``).
+
+``array`` builds a column from a list of Python values out of NumPy
+buffers: ``pa.array`` (on lists and ndarrays alike) makes pyarrow import
+pandas to probe its input, which would cost a harvest tick more than
+everything else it does.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+TS = pa.timestamp("s", tz="UTC")
+
+# queue-times.com park ids; also the park's categorical code in models
+PARK_IDS = {"dl": 16, "dca": 17}
+
+RAW_SCHEMA = pa.schema(
+    [
+        pa.field("timestamp", TS),
+        pa.field("park", pa.dictionary(pa.int8(), pa.string())),
+        pa.field("ride_id", pa.int32()),
+        pa.field("ride_name", pa.dictionary(pa.int16(), pa.string())),
+        pa.field("status", pa.bool_()),
+        pa.field("posted_wait", pa.int16()),
+        pa.field("last_update", TS),
+    ]
+)
+
+
+def array(values: list, type: pa.DataType) -> pa.Array:
+    """``values`` (Python scalars, None for null) as an Arrow array of ``type``.
+
+    Strings, booleans, signed ints, floats and timestamps (epoch integers in
+    the type's unit) are packed into NumPy buffers; dictionary types encode
+    the value array.
+    """
+    if pa.types.is_dictionary(type):
+        return pc.dictionary_encode(array(values, type.value_type)).cast(type)
+    n = len(values)
+    valid = np.fromiter((v is not None for v in values), bool, n)
+    nulls = n - int(valid.sum())
+    bitmap = pa.py_buffer(np.packbits(valid, bitorder="little")) if nulls else None
+    if pa.types.is_string(type):
+        data = [b"" if v is None else v.encode() for v in values]
+        offsets = np.zeros(n + 1, np.int32)
+        np.cumsum(np.fromiter(map(len, data), np.int32, n), out=offsets[1:])
+        buffers = [bitmap, pa.py_buffer(offsets), pa.py_buffer(b"".join(data))]
+    elif pa.types.is_boolean(type):
+        bits = np.fromiter((bool(v) for v in values), bool, n)
+        buffers = [bitmap, pa.py_buffer(np.packbits(bits, bitorder="little"))]
+    else:
+        kind = "f" if pa.types.is_floating(type) else "i"  # signed ints and timestamps
+        dtype = np.dtype(f"{kind}{type.bit_width // 8}")
+        buffers = [bitmap, pa.py_buffer(np.fromiter((v or 0 for v in values), dtype, n))]
+    return pa.Array.from_buffers(type, n, buffers, null_count=nulls)
+
+
+def to_ts(arr: pa.Array) -> pa.Array:
+    """Cast ISO strings or naive (UTC) timestamps to ``timestamp[s, UTC]``."""
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        arr = arr.cast(pa.timestamp("ms", tz="UTC"))
+    elif pa.types.is_timestamp(arr.type) and arr.type.tz is None:
+        arr = pc.assume_timezone(arr, "UTC")
+    return arr.cast(TS, safe=False)
+
+
+def conform(table: pa.Table) -> pa.Table:
+    """Cast a part written before RAW_SCHEMA existed to the current types.
+
+    Columns the part does not have (``park`` lives in the hive path) are left
+    out; columns outside the schema (e.g. SQLite exports) pass through as-is.
+    """
+    columns, fields = [], []
+    for field in RAW_SCHEMA:
+        if field.name not in table.column_names:
+            continue
+        col = table[field.name]
+        col = to_ts(col) if field.type == TS else col.cast(field.type)
+        columns.append(col)
+        fields.append(field)
+    for field in table.schema:
+        if field.name not in RAW_SCHEMA.names:
+            columns.append(table[field.name])
+            fields.append(field)
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
@@ -0,0 +1,340 @@
+# ingest/sqlite_store.py
+"""
+SQLite storage for the harvester, tuned for frequent small appends.
+
+Park, land and ride names live in lookup tables; the ``queue_times`` fact
+table holds only integer keys, an epoch-seconds ``ts`` and the wait, with a
+covering index on (park_id, ride_id, ts) for range queries.  The database
+runs in WAL mode so a harvest tick is a single sequential append.
+
+``connect`` upgrades a database still on the original TEXT schema in
+place.  Its timestamps were written with ``datetime.now()``, so they are
+read back in the local timezone unless ``legacy_tz`` says otherwise.
+``queue_times_flat`` / ``weather_flat`` expose the old row shape for
+readers that want names and ISO timestamps.
+
+With ``changes_only`` a ride's row is stored only when its wait moved since
+the last stored row; ``ride_state`` remembers that row, and the first tick
+of each UTC day stores every ride (see ``ingest.dedup``).
+
+``calendar`` mirrors ``ingest.calendar_dim``; join ``queue_times`` to it on
+``CAST(strftime('%Y%m%d', ts, 'unixepoch') AS INTEGER)`` (UTC) or the
+park-local equivalent.
+"""
+
+import sqlite3
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pyarrow as pa
+
+DB_NAME = "queue_times.db"
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # durable at checkpoints; a lost tick is re-harvested
+    "temp_store": "MEMORY",
+    "cache_size": -16_000,  # KiB
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5_000,
+    "foreign_keys": "ON",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parks (
+    park_id INTEGER PRIMARY KEY,
+    name    TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS lands (
+    land_id INTEGER PRIMARY KEY,
+    park_id INTEGER NOT NULL REFERENCES parks,
+    name    TEXT NOT NULL,
+    UNIQUE (park_id, name)
+);
+CREATE TABLE IF NOT EXISTS rides (
+    ride_id INTEGER PRIMARY KEY,
+    land_id INTEGER NOT NULL REFERENCES lands,
+    name    TEXT NOT NULL,
+    UNIQUE (land_id, name)
+);
+CREATE TABLE IF NOT EXISTS queue_times (
+    id         INTEGER PRIMARY KEY,
+    ts         INTEGER NOT NULL,
+    park_id    INTEGER NOT NULL REFERENCES parks,
+    ride_id    INTEGER NOT NULL REFERENCES rides,
+    wait_time  INTEGER,
+    is_holiday INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_queue_times_park_ride_ts
+    ON queue_times (park_id, ride_id, ts, wait_time);
+CREATE TABLE IF NOT EXISTS weather (
+    ts          INTEGER PRIMARY KEY,
+    condition   TEXT,
+    temperature REAL,
+    humidity    INTEGER,
+    wind_speed  REAL
+);
+CREATE TABLE IF NOT EXISTS holidays (
+    date TEXT PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS calendar (
+    date_key        INTEGER PRIMARY KEY,
+    date            TEXT NOT NULL,
+    dow             INTEGER NOT NULL,
+    day_of_week     TEXT NOT NULL,
+    is_weekend      INTEGER NOT NULL,
+    is_holiday      INTEGER NOT NULL,
+    holiday_name    TEXT,
+    is_school_break INTEGER NOT NULL,
+    season          TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ride_state (
+    ride_id   INTEGER PRIMARY KEY REFERENCES rides,
+    day       TEXT NOT NULL,
+    wait_time INTEGER
+);
+CREATE TABLE IF NOT EXISTS export_watermarks (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE VIEW IF NOT EXISTS queue_times_flat AS
+    SELECT q.id, strftime('%Y-%m-%dT%H:%M:%S', q.ts, 'unixepoch') AS timestamp,
+           p.name AS park, l.name AS land, r.name AS ride, q.wait_time, q.is_holiday
+    FROM queue_times q
+    JOIN parks p USING (park_id)
+    JOIN rides r USING (ride_id)
+    JOIN lands l ON l.land_id = r.land_id;
+CREATE VIEW IF NOT EXISTS weather_flat AS
+    SELECT strftime('%Y-%m-%dT%H:%M:%S', ts, 'unixepoch') AS timestamp,
+           condition, temperature, humidity, wind_speed
+    FROM weather;
+"""
+
+
+MIGRATION_RENAME = """
+ALTER TABLE queue_times RENAME TO queue_times_legacy;
+ALTER TABLE weather RENAME TO weather_legacy;
+"""
+
+MIGRATION_COPY = """
+INSERT OR IGNORE INTO parks (name) SELECT DISTINCT park FROM queue_times_legacy;
+INSERT OR IGNORE INTO lands (park_id, name)
+    SELECT DISTINCT p.park_id, q.land
+    FROM queue_times_legacy q JOIN parks p ON p.name = q.park;
+INSERT OR IGNORE INTO rides (land_id, name)
+    SELECT DISTINCT l.land_id, q.ride
+    FROM queue_times_legacy q
+    JOIN parks p ON p.name = q.park
+    JOIN lands l ON l.park_id = p.park_id AND l.name = q.land;
+INSERT INTO queue_times (id, ts, park_id, ride_id, wait_time, is_holiday)
+    SELECT q.id, to_epoch(q.timestamp), p.park_id, r.ride_id, q.wait_time, q.is_holiday
+    FROM queue_times_legacy q
+    JOIN parks p ON p.name = q.park
+    JOIN lands l ON l.park_id = p.park_id AND l.name = q.land
+    JOIN rides r ON r.land_id = l.land_id AND r.name = q.ride
+    ORDER BY q.id;
+INSERT OR IGNORE INTO weather (ts, condition, temperature, humidity, wind_speed)
+    SELECT to_epoch(timestamp), condition, temperature, humidity, wind_speed
+    FROM weather_legacy;
+DROP TABLE queue_times_legacy;
+DROP TABLE weather_legacy;
+"""
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def migrate(conn: sqlite3.Connection, legacy_tz: str | None = None) -> int:
+    """Move a TEXT-schema database onto the normalized schema; return rows moved."""
+    tz = ZoneInfo(legacy_tz) if legacy_tz else None
+
+    def to_epoch(value):
+        if value is None:
+            return None
+        stamp = datetime.fromisoformat(value)
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=tz) if tz else stamp.astimezone()
+        return int(stamp.timestamp())
+
+    conn.create_function("to_epoch", 1, to_epoch, deterministic=True)
+    try:
+        # executescript() commits before it runs, so the transaction is spelled out here.
+        conn.executescript(f"BEGIN;\n{MIGRATION_RENAME}{SCHEMA}{MIGRATION_COPY}COMMIT;")
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    conn.execute("VACUUM")
+    return conn.execute("SELECT count(*) FROM queue_times").fetchone()[0]
+
+
+def connect(path: str = DB_NAME, legacy_tz: str | None = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    if "timestamp" in _columns(conn, "queue_times"):
+        moved = migrate(conn, legacy_tz)
+        print(f"[INFO] Migrated {moved} queue_times rows to the normalized schema")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class _Lookup:
+    """Name → id cache for the dimension tables, filled lazily per connection."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.parks = {n: i for i, n in conn.execute("SELECT park_id, name FROM parks")}
+        self.lands = {
+            (p, n): i for i, p, n in conn.execute("SELECT land_id, park_id, name FROM lands")
+        }
+        self.rides = {
+            (l_, n): i for i, l_, n in conn.execute("SELECT ride_id, land_id, name FROM rides")
+        }
+
+    def _get(self, cache, key, sql, params):
+        if key not in cache:
+            cache[key] = self.conn.execute(sql, params).lastrowid
+        return cache[key]
+
+    def ids(self, park: str, land: str, ride: str) -> tuple[int, int]:
+        park_id = self._get(self.parks, park, "INSERT INTO parks (name) VALUES (?)", (park,))
+        land_id = self._get(
+            self.lands,
+            (park_id, land),
+            "INSERT INTO lands (park_id, name) VALUES (?, ?)",
+            (park_id, land),
+        )
+        ride_id = self._get(
+            self.rides,
+            (land_id, ride),
+            "INSERT INTO rides (land_id, name) VALUES (?, ?)",
+            (land_id, ride),
+        )
+        return park_id, ride_id
+
+
+def insert_ride_data(conn: sqlite3.Connection, ride_data, changes_only: bool = False) -> int:
+    """Insert ``(ts, park, land, ride, wait_time, is_holiday)`` tuples; returns rows stored."""
+    if not ride_data:
+        return 0
+    lookup = _Lookup(conn)
+    state = {r: (d, w) for r, d, w in conn.execute("SELECT * FROM ride_state")}
+    rows, moved = [], []
+    for ts, park, land, ride, wait_time, is_holiday in ride_data:
+        park_id, ride_id = lookup.ids(park, land, ride)
+        day = datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+        if changes_only and state.get(ride_id) == (day, wait_time):
+            continue
+        rows.append((ts, park_id, ride_id, wait_time, is_holiday))
+        moved.append((ride_id, day, wait_time))
+    conn.executemany(
+        """
+        INSERT INTO ride_state (ride_id, day, wait_time) VALUES (?, ?, ?)
+        ON CONFLICT (ride_id) DO UPDATE SET day = excluded.day, wait_time = excluded.wait_time
+    """,
+        moved,
+    )
+    conn.executemany(
+        """
+        INSERT INTO queue_times (ts, park_id, ride_id, wait_time, is_holiday)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+        rows,
+    )
+    return len(rows)
+
+
+def insert_weather_data(conn: sqlite3.Connection, weather_row) -> None:
+    """Insert one ``(ts, condition, temperature, humidity, wind_speed)`` tuple."""
+    if weather_row:
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO weather
+            (ts, condition, temperature, humidity, wind_speed)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+            weather_row,
+        )
+
+
+def insert_holiday(conn: sqlite3.Connection, day, name) -> None:
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO holidays (date, name)
+        VALUES (?, ?)
+    """,
+        (day.isoformat(), name),
+    )
+
+
+def ensure_calendar(conn: sqlite3.Connection, cal=None) -> int:
+    """Fill ``calendar`` from ``ingest.calendar_dim`` unless it already has every day."""
+    if cal is None:
+        from ingest.calendar_dim import load
+
+        cal = load().reset_index()
+    (have,) = conn.execute("SELECT count(*) FROM calendar").fetchone()
+    if have >= len(cal):
+        return 0
+    rows = zip(
+        cal["date_key"].tolist(),
+        cal["date"].astype(str).tolist(),
+        cal["dow"].tolist(),
+        cal["day_of_week"].tolist(),
+        cal["is_weekend"].astype(int).tolist(),
+        cal["is_holiday"].astype(int).tolist(),
+        cal["holiday_name"].tolist(),
+        cal["is_school_break"].astype(int).tolist(),
+        cal["season"].tolist(),
+    )
+    conn.executemany("INSERT OR REPLACE INTO calendar VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(cal)
+
+
+def ride_history(conn: sqlite3.Connection, park: str, ride: str, start: int, end: int):
+    """``(ts, wait_time)`` for one ride in ``[start, end)``, served from the covering index."""
+    return conn.execute(
+        """
+        SELECT ts, wait_time
+        FROM queue_times
+        WHERE park_id = (SELECT park_id FROM parks WHERE name = ?)
+          AND ride_id IN (SELECT ride_id FROM rides WHERE name = ?)
+          AND ts >= ? AND ts < ?
+        ORDER BY ts
+    """,
+        (park, ride, start, end),
+    ).fetchall()
+
+
+def get_watermark(conn: sqlite3.Connection, name: str) -> int:
+    """Highest key already exported under ``name`` (0 if never exported)."""
+    row = conn.execute("SELECT value FROM export_watermarks WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def set_watermark(conn: sqlite3.Connection, name: str, value: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO export_watermarks (name, value) VALUES (?, ?)
+        ON CONFLICT (name) DO UPDATE SET value = excluded.value
+    """,
+        (name, value),
+    )
+
+
+def iter_batches(
+    conn: sqlite3.Connection, sql: str, params, schema: pa.Schema, batch_rows: int
+) -> Iterator[pa.RecordBatch]:
+    """Stream a query as Arrow record batches of at most ``batch_rows`` rows.
+
+    Rows go from ``fetchmany`` straight into typed Arrow arrays; integer epoch
+    columns typed as timestamps in ``schema`` are taken as raw seconds.
+    """
+    cursor = conn.execute(sql, params)
+    while rows := cursor.fetchmany(batch_rows):
+        columns = zip(*rows)
+        arrays = [pa.array(col, type=field.type) for col, field in zip(columns, schema)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
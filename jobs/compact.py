@@ -0,0 +1,145 @@
+# jobs/compact.py
+"""
+Merge a finished day's per-pull raw fragments into one file per park.
+
+Every harvest tick drops another ``<uuid>-0.parquet`` under
+``data/raw/<date>.parquet/park=<p>/``; readers pay a file open and footer
+read for each of them.  Compaction rewrites a park's fragments into a single
+``compacted.parquet`` sorted by (ride_id, timestamp) with fixed-size row
+groups, so parquet statistics can prune by ride and time.
+
+The new file is staged in a hidden sibling directory (dot-prefixed, so
+neither ``glob("park=*")`` nor pyarrow's dataset discovery picks it up) and
+swapped in with renameat2(RENAME_EXCHANGE).  Readers therefore see either
+all of the old fragments or the compacted file, never a mix or a missing
+park.  There is no fallback: where the kernel, filesystem or libc cannot
+exchange, compaction raises and leaves the day as it was.  The swapped-out
+fragments stay in ``.park=<p>.retired`` for ``RETIRE_GRACE`` seconds, so a
+reader that listed them just before the swap can still open them; every
+name compaction uses starts with a dot.  Run compaction only on finished
+days (the default) so nothing is writing meanwhile.  Days already
+compacted are skipped, so the job is safe to re-run.
+"""
+
+import ctypes
+import ctypes.util
+import datetime as dt
+import errno
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import typer
+
+from ingest.schema import conform
+
+app = typer.Typer(add_completion=False)
+RAW = Path("data/raw")
+COMPACTED = "compacted.parquet"
+SORT_KEYS = [("ride_id", "ascending"), ("timestamp", "ascending")]
+ROW_GROUP_ROWS = 64_000
+RETIRE_GRACE = 5.0  # seconds the old fragments outlive the swap
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+
+def _exchange(a: Path, b: Path) -> None:
+    """Swap two directories atomically with renameat2(RENAME_EXCHANGE); OSError if unsupported.
+
+    Plain renames would leave ``a`` missing for a moment, so there is no fallback.
+    """
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    renameat2 = getattr(libc, "renameat2", None)
+    if renameat2 is None:
+        raise OSError(errno.ENOSYS, "libc has no renameat2 (RENAME_EXCHANGE)", str(a))
+    if renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE):
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), str(a), None, str(b))
+
+
+def is_compacted(park_dir: Path) -> bool:
+    return [p.name for p in park_dir.glob("*.parquet")] == [COMPACTED]
+
+
+def compact_park(park_dir: Path, row_group_rows: int = ROW_GROUP_ROWS) -> int | None:
+    """Compact one ``park=<p>`` directory; return rows written or None if skipped."""
+    staging = park_dir.with_name(f".{park_dir.name}.compacting")
+    retired = park_dir.with_name(f".{park_dir.name}.retired")
+    for stale in (staging, retired):  # left over from an interrupted run
+        shutil.rmtree(stale, ignore_errors=True)
+
+    parts = sorted(park_dir.glob("*.parquet"))
+    if not parts or is_compacted(park_dir):
+        return None
+
+    tables = [conform(pq.read_table(p, partitioning=None)) for p in parts]
+    table = pa.concat_tables(tables, promote_options="default")
+    keys = [k for k in SORT_KEYS if k[0] in table.column_names]
+    table = table.sort_by(keys)
+
+    staging.mkdir()
+    out = staging / COMPACTED
+    pq.write_table(table, out, row_group_size=row_group_rows, compression="zstd")
+    if pq.read_metadata(out).num_rows != table.num_rows:
+        raise RuntimeError(f"row count mismatch compacting {park_dir}")
+
+    try:
+        _exchange(park_dir, staging)
+    except OSError:
+        shutil.rmtree(staging)
+        raise
+    os.rename(staging, retired)  # now the old fragments; compact_day removes them
+    return table.num_rows
+
+
+def compact_day(
+    day: dt.date, root: Path = RAW, grace: float = RETIRE_GRACE
+) -> dict[str, int | None]:
+    """Compact every park of ``day``, then drop the retired fragments after ``grace``."""
+    day_dir = root / f"{day:%Y-%m-%d}.parquet"
+    result = {p.name: compact_park(p) for p in sorted(day_dir.glob("park=*")) if p.is_dir()}
+    retired = sorted(day_dir.glob(".park=*.retired"))
+    if retired:
+        time.sleep(grace)
+        for old in retired:
+            shutil.rmtree(old)
+    return result
+
+
+def finished_days(root: Path = RAW) -> list[dt.date]:
+    """Days strictly before today (UTC) – the harvester may still append to today."""
+    today = dt.datetime.utcnow().date()
+    days = []
+    for d in root.glob("*.parquet"):
+        try:
+            day = dt.date.fromisoformat(d.name.removesuffix(".parquet"))
+        except ValueError:
+            continue
+        if day < today:
+            days.append(day)
+    return sorted(days)
+
+
+@app.command()
+def compact(
+    day: dt.datetime | None = typer.Option(
+        None, formats=["%Y-%m-%d"], help="compact a single day; default all finished days"
+    ),
+    root: Path = typer.Option(RAW, help="raw parquet root"),
+):
+    days = [day.date()] if day else finished_days(root)
+    if day and day.date() >= dt.datetime.utcnow().date():
+        raise typer.BadParameter("refusing to compact a day that is still being harvested")
+
+    for d in days:
+        for park, rows in compact_day(d, root).items():
+            if rows is not None:
+                typer.secho(f"✅ {d} {park}: compacted {rows:,} rows", fg=typer.colors.GREEN)
+
+
+if __name__ == "__main__":
+    app()
@@ -1,94 +1,509 @@
 # jobs/daily_rollup.py
 
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from datetime import datetime, timedelta
-import pandas as pd
-import holidays
+
 import fsspec
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import typer
+from pyarrow.fs import LocalFileSystem
+
+from ingest.calendar_dim import flags, local_dates
+from ingest.dedup import forward_fill
+from ingest.objcache import ObjectCache, is_pinned
+
+app = typer.Typer(add_completion=False)
 
 # --- Paths ---
 RAW = "s3://disney-queue-times/raw"
 WEATHER = "s3://disney-queue-times/weather"
 META = Path("data/meta/rides.parquet")
 OUT = Path("data/rollup")
-OUT.mkdir(parents=True, exist_ok=True)
+STATE = OUT / "_state"
 
-# --- Holiday setup ---
-US_HOLIDAYS = holidays.US()
+# --- Calendar flags joined onto every bin (ingest.calendar_dim) ---
+CALENDAR_FLAGS = [
+    "is_holiday",
+    "day_of_week",
+    "is_weekend",
+    "holiday_name",
+    "is_school_break",
+    "season",
+]
 
-def build():
-    date = (datetime.utcnow() - timedelta(days=1)).date()
-    day_str = date.strftime("%Y-%m-%d")
 
-    # --- Load ride data from S3 ---
-    raw_path = f"{RAW}/{day_str}.parquet/"
-    queue_files = fsspec.open_files(f"{raw_path}park=*/*.parquet")
+def bin_flags(time_bins) -> pd.DataFrame:
+    """CALENDAR_FLAGS of each UTC bin's park-local date (``date`` stays the UTC day).
 
-    if not queue_files:
-        print(f"No queue data found for {day_str}")
-        return
+    The evening of July 4 in California is already July 5 in UTC.
+    """
+    seconds = pd.DatetimeIndex(time_bins).as_unit("s").asi8
+    return flags(local_dates(seconds), CALENDAR_FLAGS)
+
+
+KEYS = ["date", "park", "ride", "time_bin"]
+
+
+# --- One filesystem (and S3 connection pool) per process, behind the disk cache ---
+_FS = None
+_CACHE = None
+LOCAL = LocalFileSystem()
+
+
+def store(fresh: bool = False):
+    """The process's filesystem for RAW/WEATHER; ``fresh`` drops any inherited instance."""
+    global _FS, _CACHE
+    if _FS is None or fresh:
+        _FS, _ = fsspec.core.url_to_fs(RAW, skip_instance_cache=fresh)
+        _CACHE = None
+    return _FS
+
+
+def objects() -> ObjectCache:
+    """Read-through cache over ``store()``; completed days are read from disk only."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ObjectCache(store())
+    return _CACHE
+
+
+# --- Fragment reader: footer-validated, projected, date-filtered, threaded ---
+REQUIRED = ["park", "ride", "wait_time", "timestamp"]
+ALIASES = {"ride": ["ride", "ride_name"], "wait_time": ["wait_time", "posted_wait"]}
+READ_THREADS = 16
+PARQUET = ds.ParquetFileFormat()
+
+
+def _resolve(schema: pa.Schema, path: str) -> dict[str, str] | None:
+    """Map each required column to the name it has in this fragment."""
+    names = {}
+    for col in REQUIRED:
+        found = [c for c in ALIASES.get(col, [col]) if c in schema.names]
+        if found:
+            names[col] = found[0]
+        elif col == "park" and "park=" in path:
+            names[col] = None  # hive partition value, taken from the path
+        else:
+            return None
+    return names
+
+
+def _day_filter(ts_type: pa.DataType, date) -> ds.Expression | None:
+    if not pa.types.is_timestamp(ts_type):
+        return None
+    start = datetime.combine(date, datetime.min.time())
+    if ts_type.tz is not None:
+        start = start.replace(tzinfo=timezone.utc)
+    lo, hi = pa.scalar(start, ts_type), pa.scalar(start + timedelta(days=1), ts_type)
+    return (ds.field("timestamp") >= lo) & (ds.field("timestamp") < hi)
+
+
+def _read_one(path: str, filesystem, date) -> pa.Table | None:
+    """The fragment's rows for ``date``; None if it lacks the columns, raises if unreadable."""
+    fragment = PARQUET.make_fragment(path, filesystem=filesystem)
+    schema = fragment.physical_schema  # footer only – no data pages yet
+    names = _resolve(schema, path)
+    if names is None:
+        print(f"[WARN] Skipping {path} — missing required columns")
+        return None
+    columns = {c: ds.field(n) for c, n in names.items() if n is not None}
+    table = fragment.to_table(
+        columns=columns, filter=_day_filter(schema.field("timestamp").type, date)
+    )
+
+    ts = table["timestamp"]
+    if pa.types.is_timestamp(ts.type) and ts.type.tz is not None:
+        ts = ts.cast(pa.timestamp(ts.type.unit))  # UTC wall clock, tz dropped
+    if names["park"] is None:
+        park = path.split("park=", 1)[1].split("/", 1)[0]
+        park_col = pa.array([park] * table.num_rows, pa.string())
+    else:
+        park_col = table["park"].cast(pa.string())
+    return pa.table(
+        {
+            "park": park_col,
+            "ride": table["ride"].cast(pa.string()),
+            "wait_time": table["wait_time"].cast(pa.float64()),
+            "timestamp": ts.cast(pa.timestamp("ns")),
+        }
+    )
 
-    dfs = []
-    for f in queue_files:
+
+def read_fragments(
+    paths: list[str], date, infos=None, pinned=False
+) -> tuple[pd.DataFrame | None, list[str]]:
+    """Fetch (through the disk cache) and read ``paths`` on a thread pool.
+
+    Also returns the paths that were dealt with – read, or skipped for
+    missing columns – so a fetch or read failure is retried next run.
+    """
+    if not paths:
+        return None, []
+    infos = infos or {}
+
+    def read(path: str) -> tuple[bool, pa.Table | None]:
         try:
-            with f.open() as file:
-                df = pd.read_parquet(file)
-                df.columns = [str(c) for c in df.columns]
-                if {"park", "ride", "wait_time", "timestamp"}.issubset(df.columns):
-                    df["park"] = df["park"].astype(str)
-                    dfs.append(df)
-                else:
-                    print(f"[WARN] Skipping {f.path} — missing required columns")
+            with objects().hold(path, infos.get(path), pinned) as local:
+                return True, _read_one(str(local), LOCAL, date)
         except Exception as e:
-            print(f"[WARN] Failed to read {f.path}: {e}")
+            print(f"[WARN] Failed to fetch or read {path}: {e}")
+            return False, None
 
-    if not dfs:
-        print(f"[ERROR] No readable data found in {raw_path}")
-        return
+    with ThreadPoolExecutor(max_workers=READ_THREADS) as pool:
+        results = list(pool.map(read, paths))
+    done = [path for path, (ok, _) in zip(paths, results) if ok]
+    tables = [t for _, t in results if t is not None]
 
-    qdf = pd.concat(dfs, ignore_index=True)
-    qdf["timestamp"] = pd.to_datetime(qdf["timestamp"])
-    qdf["time_bin"] = qdf["timestamp"].dt.floor("30min")
-    qdf["date"] = qdf["timestamp"].dt.date
-
-    grouped = (
-        qdf.groupby(["date", "park", "ride", "time_bin"])
-        .agg(
-            wait_mean=("wait_time", "mean"),
-            wait_std=("wait_time", "std"),
-            sample_size=("wait_time", "count")
-        )
-        .reset_index()
+    return (pa.concat_tables(tables).to_pandas() if tables else None), done
+
+
+# --- Per-bin wait histograms: the mergeable day state ---
+# Quantiles do not merge from running sums, so each bin keeps a histogram:
+# one row per distinct posted wait with its count.  Posted waits are whole
+# minutes in 5-minute steps, so a bin has a few dozen rows at most however
+# many ticks it saw, merging is adding counts, and count/sum/sum of squares
+# and the quantiles come out of it exactly.
+HIST_KEYS = ["park", "ride", "time_bin", "wait_time"]
+STATE_COLUMNS = [*HIST_KEYS, "count"]
+QUANTILES = {"wait_p50": 0.5, "wait_p90": 0.9}
+BIN_NS = 30 * 60 * 10**9
+DAY_NS = 86_400 * 10**9
+STATS = ["wait_mean", "wait_std", *QUANTILES, "wait_max", "sample_size"]
+
+
+CARRY_COLUMNS = ["park", "ride", "wait_time", "timestamp"]
+
+
+def fill_ticks(
+    qdf: pd.DataFrame, carried: pd.DataFrame | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Change-only rows forward-filled onto every tick of their park.
+
+    ``carried`` holds each ride's last row from fragments already folded in
+    (incremental runs): it fills the new ticks for rides that did not move in
+    the new fragments, and the old ticks it brings along are dropped again,
+    as they were counted last run.  Returns the filled rows and the carry
+    for the next run.
+    """
+    rows = qdf
+    if carried is not None and len(carried):
+        rows = pd.concat([carried, qdf[CARRY_COLUMNS]], ignore_index=True)
+    last = rows.sort_values("timestamp", kind="stable").groupby(["park", "ride"]).tail(1)
+    filled = forward_fill(rows, by=["park", "ride"], ticks_by="park")
+    if rows is not qdf:
+        filled = filled.merge(qdf[["park", "timestamp"]].drop_duplicates())
+    return filled, last[CARRY_COLUMNS].reset_index(drop=True)
+
+
+def observations(qdf: pd.DataFrame) -> pd.DataFrame:
+    """The readings of ``qdf`` as per-bin histograms (``STATE_COLUMNS``)."""
+    qdf = qdf.dropna(subset=["wait_time"])
+    obs = pd.DataFrame(
+        {
+            "park": qdf["park"].to_numpy(),
+            "ride": qdf["ride"].to_numpy(),
+            "time_bin": pd.to_datetime(qdf["timestamp"]).dt.floor("30min").to_numpy(),
+            "wait_time": qdf["wait_time"].to_numpy("float64"),
+            "count": np.ones(len(qdf), dtype=np.int64),
+        }
     )
+    return merge_state(obs)
+
+
+def merge_state(*states: pd.DataFrame) -> pd.DataFrame:
+    """Sum the counts of histograms; one row per (park, ride, bin, wait) comes out."""
+    states = [s for s in states if s is not None and len(s)]
+    if not states:
+        return pd.DataFrame(columns=STATE_COLUMNS)
+    merged = pd.concat(states, ignore_index=True)
+    return merged.groupby(HIST_KEYS, sort=False, observed=True)["count"].sum().reset_index()
+
+
+def _quantile(
+    values: np.ndarray, ends: np.ndarray, starts: np.ndarray, n: np.ndarray, q: float
+) -> np.ndarray:
+    """Linear-interpolated quantile (numpy/pandas default) of each sorted segment.
+
+    ``values`` are run-length encoded: the run of ``values[i]`` ends just
+    before expanded position ``ends[i]``; ``starts`` and ``n`` are each
+    segment's first expanded position and length.
+    """
+    pos = starts + q * (n - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, starts + n - 1)
+    at_lo = values[np.searchsorted(ends, lo, side="right")]
+    at_hi = values[np.searchsorted(ends, hi, side="right")]
+    return at_lo + (at_hi - at_lo) * (pos - lo)
+
+
+def aggregate(obs: pd.DataFrame) -> pd.DataFrame:
+    """mean / std (ddof=1) / p50 / p90 / max / count per (park, ride, time_bin).
+
+    ``obs`` is a histogram state (``count`` per wait; absent = one each).
+    One sort by (park, ride, bin, wait) turns every group into a
+    contiguous, value-sorted segment; sums come from ``np.add.reduceat``
+    and quantiles and max are read straight off the sorted segment.
+    """
+    if obs is None or not len(obs):
+        return pd.DataFrame(columns=KEYS + STATS)
+    park_codes, parks = pd.factorize(obs["park"], sort=True)
+    ride_codes, rides = pd.factorize(obs["ride"], sort=True)
+    bins = obs["time_bin"].to_numpy("datetime64[ns]").view(np.int64)
+    wait = obs["wait_time"].to_numpy("float64")
+    count = obs["count"].to_numpy("int64") if "count" in obs else np.ones(len(obs), np.int64)
+
+    # (park, ride, bin, wait rank) packed into one int64: a single argsort
+    # replaces a four-key lexsort, and ties within it are identical rows
+    bin_idx = (bins - bins.min()) // BIN_NS
+    key = (park_codes * len(rides) + ride_codes) * (int(bin_idx.max()) + 1) + bin_idx
+    wait_codes, waits = pd.factorize(wait, sort=True)
+    if (int(key.max()) + 1) * len(waits) < 2**62:
+        order = np.argsort(key * len(waits) + wait_codes)
+    else:
+        order = np.lexsort((wait_codes, key))
+    key, wait, count = key[order], waits[wait_codes[order]], count[order]
+
+    change = np.ones(len(key), dtype=bool)
+    np.not_equal(key[1:], key[:-1], out=change[1:])
+    starts = np.flatnonzero(change)
+    runs = np.diff(np.append(starts, len(key)))  # histogram rows per group
+    ends = np.cumsum(count)
+    n = np.add.reduceat(count, starts)  # observations per group
+
+    mean = np.add.reduceat(wait * count, starts) / n
+    dev = wait - np.repeat(mean, runs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sq = np.add.reduceat(count * dev * dev, starts)
+        std = np.where(n > 1, np.sqrt(sq / (n - 1)), np.nan)
+
+    first = order[starts]
+    time_bin = bins[first]
+    days, day_idx = np.unique(time_bin - time_bin % DAY_NS, return_inverse=True)
+    grouped = pd.DataFrame(
+        {
+            "date": pd.to_datetime(days).date[day_idx],
+            "park": parks[park_codes[first]],
+            "ride": rides[ride_codes[first]],
+            "time_bin": time_bin.view("datetime64[ns]"),
+            "wait_mean": mean,
+            "wait_std": std,
+            **{
+                name: _quantile(wait, ends, ends[starts] - count[starts], n, q)
+                for name, q in QUANTILES.items()
+            },
+            "wait_max": wait[starts + runs - 1],
+            "sample_size": n.astype("int64"),
+        }
+    )
+    return grouped
+
 
-    # --- Load weather data from S3 ---
-    weather_path = f"{WEATHER}/weather_{day_str}.parquet"
-    fs = fsspec.filesystem("s3")
-    if fs.exists(weather_path):
+# --- Weather: as-of join of the hourly readings onto each bin ---
+WEATHER_COLUMNS = ["temp_f", "precip_prob", "humidity", "wind_speed"]
+WEATHER_RENAME = {"temperature": "temp_f"}  # SQLite export → pull_weather naming
+
+
+def weather_paths(day) -> list[str]:
+    return [f"{WEATHER}/weather_{d:%Y-%m-%d}.parquet" for d in (day - timedelta(days=1), day)]
+
+
+def read_weather(day, pinned: bool = False) -> pd.DataFrame | None:
+    """Hourly weather for ``day`` and the day before (so the first bins have a reading)."""
+    frames = []
+    for path in weather_paths(day):
         try:
-            wdf = pd.read_parquet(weather_path)
-            latest = wdf.sort_values("timestamp").iloc[-1]
-            column_map = {
-                "temperature": "temp_f",
-                "humidity": "humidity",
-                "wind_speed": "wind_speed",
-                "precip_prob": "precip_prob"
-            }
-            for src, dest in column_map.items():
-                grouped[dest] = latest[src] if src in latest else None
+            info = objects().info(path, pinned)
+        except FileNotFoundError:
+            continue
+        try:
+            with objects().hold(path, info, pinned) as local, open(local, "rb") as f:
+                frames.append(pd.read_parquet(f).rename(columns=WEATHER_RENAME))
         except Exception as e:
-            print(f"[WARN] Failed to read or parse weather file: {e}")
-            for col in ["temp_f", "precip_prob", "humidity", "wind_speed"]:
-                grouped[col] = None
-    else:
+            print(f"[WARN] Failed to read or parse weather file {path}: {e}")
+    if not frames:
+        return None
+    wdf = pd.concat(frames, ignore_index=True)
+    ts = pd.to_datetime(wdf["timestamp"])
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    wdf["timestamp"] = ts.astype("datetime64[ns]")
+    wdf = wdf.reindex(columns=["timestamp", *WEATHER_COLUMNS])
+    # stable: for an hour both files forecast, the later file (read last) wins
+    return wdf.sort_values("timestamp", kind="stable").drop_duplicates("timestamp", keep="last")
+
+
+def attach_weather(grouped: pd.DataFrame, wdf: pd.DataFrame | None) -> pd.DataFrame:
+    """Latest reading at or before each bin's start."""
+    if wdf is None or wdf.empty:
+        return grouped.assign(**{c: None for c in WEATHER_COLUMNS})
+    joined = pd.merge_asof(
+        grouped.reset_index().sort_values("time_bin"),
+        wdf.rename(columns={"timestamp": "time_bin"}),
+        on="time_bin",
+        direction="backward",
+    )
+    return joined.set_index("index").sort_index().rename_axis(None)
+
+
+def state_path(day_str: str) -> Path:
+    return STATE / f"{day_str}.parquet"
+
+
+def load_state(day_str: str) -> tuple[pd.DataFrame | None, dict[str, str], pd.DataFrame | None]:
+    """Return the saved state, the manifest of fragments folded into it and the carry."""
+    path = state_path(day_str)
+    if not path.exists():
+        return None, {}, None
+    table = pq.read_table(path)
+    metadata = table.schema.metadata or {}
+    manifest = json.loads(metadata.get(b"fragments", b"null"))
+    if "count" not in table.schema.names or b"carry" not in metadata:
+        return None, {}, None  # state from an older layout – rebuild the day
+    carry = pd.DataFrame(json.loads(metadata[b"carry"]), columns=CARRY_COLUMNS)
+    carry["timestamp"] = pd.to_datetime(carry["timestamp"].astype("int64"))
+    return table.to_pandas(), manifest, carry.astype({"wait_time": "float64"})
+
+
+def save_state(
+    day_str: str, state: pd.DataFrame, manifest: dict[str, str], carry: pd.DataFrame | None
+) -> None:
+    """State, manifest and carry share one file, replaced atomically, so they never diverge."""
+    STATE.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(state, preserve_index=False)
+    if carry is None:
+        carry = pd.DataFrame(columns=CARRY_COLUMNS)
+    carry = carry.assign(timestamp=carry["timestamp"].astype("datetime64[ns]").astype("int64"))
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            b"fragments": json.dumps(manifest, sort_keys=True),
+            b"carry": json.dumps(carry.to_numpy().tolist()),
+        }
+    )
+    path = state_path(day_str)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+# --- Up-to-date check: checksum of every input, kept in the output's metadata ---
+ROLLUP_VERSION = "3"  # bump when the output for unchanged inputs would change
+
+
+def _fingerprint(info: dict) -> list:
+    version = info.get("ETag") or info.get("etag") or info.get("mtime") or info.get("created")
+    return [info["name"], info.get("size"), str(version)]
+
+
+def _version(info: dict) -> str:
+    """Size and ETag/mtime of a fragment, as recorded in the state manifest."""
+    _, size, version = _fingerprint(info)
+    return f"{size}:{version}"
+
+
+def input_checksum(fragments: dict[str, dict], day, pinned: bool = False) -> str:
+    """sha256 over (path, size, ETag/mtime) of the day's fragments and weather files."""
+    inputs = [_fingerprint(info) for info in fragments.values()]
+    for path in weather_paths(day):
+        try:
+            inputs.append(_fingerprint(objects().info(path, pinned)))
+        except FileNotFoundError:
+            inputs.append([path, None, None])
+    payload = json.dumps([ROLLUP_VERSION, sorted(inputs)], default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def output_checksum(out_path: Path) -> str | None:
+    try:
+        metadata = pq.read_schema(out_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return metadata.get(b"inputs", b"").decode() or None
+
+
+def write_output(grouped: pd.DataFrame, out_path: Path, checksum: str) -> None:
+    table = pa.Table.from_pandas(grouped, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), b"inputs": checksum}
+    )
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, out_path)
+
+
+def build(date=None, incremental: bool = False, force: bool = False, relisted=False) -> dict:
+    """Roll up one day; returns ``{day, status, rows, seconds}``."""
+    t0 = time.perf_counter()
+    date = date or (datetime.utcnow() - timedelta(days=1)).date()
+    day_str = date.strftime("%Y-%m-%d")
+
+    def result(status: str, rows: int = 0) -> dict:
+        return dict(day=day_str, status=status, rows=rows, seconds=time.perf_counter() - t0)
+
+    # --- Load ride data from S3 ---
+    raw_path = f"{RAW}/{day_str}.parquet/"
+    # final (old and compacted) day: listing and files come from the disk cache
+    pinned = is_pinned(date) and objects().is_final(raw_path)
+    fragments = objects().glob(f"{raw_path}park=*/*.parquet", pinned)
+
+    if not fragments:
+        print(f"No queue data found for {day_str}")
+        return result("no-data")
+
+    out_path = OUT / f"{day_str}.parquet"
+    checksum = input_checksum(fragments, date, pinned)
+    if not force and output_checksum(out_path) == checksum:
+        print(f"[INFO] {out_path} is up to date")
+        return result("up-to-date", pq.ParquetFile(out_path).metadata.num_rows)
+
+    state, seen, carried = load_state(day_str) if incremental else (None, {}, None)
+    listed = {path: _version(info) for path, info in fragments.items()}
+    if any(listed.get(path) != version for path, version in seen.items()):
+        # Fragments we folded in have gone or changed (e.g. compacted) – start over.
+        print(f"[INFO] Inputs for {day_str} were rewritten, rebuilding from scratch")
+        state, seen, carried = None, {}, None
+
+    new_files = sorted(listed.keys() - seen.keys())
+    if incremental:
+        print(f"[INFO] {len(new_files)} new of {len(fragments)} fragments for {day_str}")
+
+    qdf, done = read_fragments(new_files, date, fragments, pinned)
+    if pinned and len(done) < len(new_files) and not relisted:
+        # a pinned fragment 404'd: the cache dropped the stale listing, so list again
+        print(f"[INFO] Cached listing for {day_str} was stale, listing again")
+        return build(date, incremental, force, relisted=True)
+    carry = carried
+    if qdf is not None:
+        # change-only harvests: bins count a steady wait at every tick it held,
+        # including rides whose last change came in an earlier run
+        qdf, carry = fill_ticks(qdf, carried)
+    if qdf is None and state is None:
+        print(f"[ERROR] No readable data found in {raw_path}")
+        return result("unreadable")
+
+    state = merge_state(state, observations(qdf) if qdf is not None else None)
+    if incremental:
+        save_state(day_str, state, {**seen, **{path: listed[path] for path in done}}, carry)
+    grouped = aggregate(state)
+
+    # --- Weather per bin from S3 ---
+    wdf = read_weather(date, pinned)
+    if wdf is None:
         print(f"[WARN] No weather file found for {day_str}, filling with nulls")
-        for col in ["temp_f", "precip_prob", "humidity", "wind_speed"]:
-            grouped[col] = None
+    grouped = attach_weather(grouped, wdf)
 
-    # --- Add holiday and day flags ---
-    grouped["is_holiday"] = grouped["date"].isin(US_HOLIDAYS)
-    grouped["day_of_week"] = pd.to_datetime(grouped["date"]).dt.day_name()
-    grouped["is_weekend"] = grouped["day_of_week"].isin(["Saturday", "Sunday"])
+    # --- Add holiday and day flags (calendar dimension, joined on date_key) ---
+    grouped = grouped.join(bin_flags(grouped["time_bin"]).set_axis(grouped.index))
 
     # --- Optional ride metadata ---
     if META.exists():
@@ -98,9 +513,78 @@ def build():
     grouped["estimated_throughput"] = grouped["sample_size"] * 10
 
     # --- Save output ---
-    out_path = OUT / f"{day_str}.parquet"
-    grouped.to_parquet(out_path, index=False)
+    write_output(grouped, out_path, checksum)
     print(f"✅ Wrote {len(grouped)} rows to {out_path}")
+    return result("written", len(grouped))
+
+
+# --- Backfill: many days across worker processes ---
+def _init_worker() -> None:
+    store(fresh=True)  # a forked s3fs client must not be reused – open our own pool
+
+
+def _build_quietly(day, incremental: bool, force: bool) -> dict:
+    try:
+        return build(day, incremental, force)
+    except Exception as e:  # one bad day must not sink the backfill
+        return dict(day=f"{day:%Y-%m-%d}", status=f"failed: {e}", rows=0, seconds=0.0)
+
+
+def backfill(start, end, workers: int, incremental: bool = False, force: bool = False) -> dict:
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        results = list(
+            pool.map(_build_quietly, days, [incremental] * len(days), [force] * len(days))
+        )
+    summary = {
+        "start": f"{start:%Y-%m-%d}",
+        "end": f"{end:%Y-%m-%d}",
+        "workers": workers,
+        "wall_seconds": round(time.perf_counter() - t0, 3),
+        "rows": sum(r["rows"] for r in results),
+        "by_status": {
+            s: sum(r["status"] == s for r in results)
+            for s in sorted({r["status"] for r in results})
+        },
+        "days": [{**r, "seconds": round(r["seconds"], 3)} for r in results],
+    }
+    path = OUT / f"_backfill_{summary['start']}_{summary['end']}.json"
+    OUT.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2))
+    print(
+        f"✅ {len(days)} days in {summary['wall_seconds']:.1f}s on {workers} workers, "
+        f"{summary['rows']:,} rows {summary['by_status']} → {path}"
+    )
+    return summary
+
+
+@app.command()
+def main(
+    date: datetime | None = typer.Option(
+        None, formats=["%Y-%m-%d"], help="day to roll up; default yesterday (UTC)"
+    ),
+    incremental: bool = typer.Option(
+        False, help="fold only fragments not yet in the saved state for that day"
+    ),
+    start: datetime | None = typer.Option(
+        None, formats=["%Y-%m-%d"], help="backfill: first day (with --end)"
+    ),
+    end: datetime | None = typer.Option(
+        None, formats=["%Y-%m-%d"], help="backfill: last day, inclusive"
+    ),
+    workers: int = typer.Option(os.cpu_count() or 1, help="backfill worker processes"),
+    force: bool = typer.Option(False, help="rebuild even if the output is up to date"),
+):
+    if start or end:
+        if not (start and end) or end < start:
+            raise typer.BadParameter("--start and --end go together, with start <= end")
+        summary = backfill(start.date(), end.date(), workers, incremental, force)
+        if any(d["status"].startswith("failed") for d in summary["days"]):
+            raise typer.Exit(1)
+        return
+    build(date.date() if date else None, incremental, force)
+
 
 if __name__ == "__main__":
-    build()
+    app()
@@ -1,16 +1,24 @@
 import os
-import sqlite3
 import sys
-from datetime import date, datetime
+import time
+from datetime import datetime
 
-import holidays
 import requests
 from dotenv import load_dotenv
 
+from ingest.calendar_dim import holiday
+from ingest.sqlite_store import (
+    DB_NAME,
+    connect,
+    ensure_calendar,
+    insert_holiday,
+    insert_ride_data,
+    insert_weather_data,
+)
+
 # ------------------------------------------------------------------------------
 # Configuration
 # ------------------------------------------------------------------------------
-DB_NAME = "queue_times.db"
 PARKS = {"disneyland": 16, "california_adventure": 17}
 WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
 LOCATION = {"lat": 33.8121, "lon": -117.9190}  # Anaheim, CA
@@ -24,10 +32,6 @@ if not API_KEY:
 # ------------------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------------------
-us_holidays = holidays.US()
-today = date.today()
-is_today_holiday = today in us_holidays
-holiday_name = us_holidays.get(today) if is_today_holiday else None
 
 
 def fetch_ride_data(park_name, park_id):
@@ -40,7 +44,8 @@ def fetch_ride_data(park_name, park_id):
         print(f"[ERROR] Could not fetch ride data for {park_name}: {e}")
         return []
 
-    timestamp = datetime.now().isoformat()
+    timestamp = int(time.time())
+    is_holiday = int(holiday(timestamp)[1] is not None)  # the fetch's own day, not start-up's
     output = []
     for land in data.get("lands", []):
         for ride in land["rides"]:
@@ -51,7 +56,7 @@ def fetch_ride_data(park_name, park_id):
                     land["name"],
                     ride["name"],
                     ride["wait_time"],
-                    int(is_today_holiday),
+                    is_holiday,
                 )
             )
     return output
@@ -72,7 +77,7 @@ def fetch_weather_data():
         response.raise_for_status()
         data = response.json()
         return (
-            datetime.now().isoformat(),
+            int(time.time()),
             data["weather"][0]["main"],
             data["main"]["temp"],
             data["main"]["humidity"],
@@ -83,89 +88,18 @@ def fetch_weather_data():
         return None
 
 
-# ------------------------------------------------------------------------------
-# Database Operations
-# ------------------------------------------------------------------------------
-def create_tables(conn):
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS queue_times (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            park TEXT,
-            land TEXT,
-            ride TEXT,
-            wait_time INTEGER,
-            is_holiday INTEGER
-        )
-    """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS weather (
-            timestamp TEXT PRIMARY KEY,
-            condition TEXT,
-            temperature REAL,
-            humidity INTEGER,
-            wind_speed REAL
-        )
-    """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS holidays (
-            date TEXT PRIMARY KEY,
-            name TEXT
-        )
-    """
-    )
-    conn.commit()
-
-
-def insert_ride_data(conn, ride_data):
-    if ride_data:
-        conn.executemany(
-            """
-            INSERT INTO queue_times (timestamp, park, land, ride, wait_time, is_holiday)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            ride_data,
-        )
-
-
-def insert_weather_data(conn, weather_row):
-    if weather_row:
-        conn.execute(
-            """
-            INSERT OR IGNORE INTO weather
-            (timestamp, condition, temperature, humidity, wind_speed)
-            VALUES (?, ?, ?, ?, ?)
-        """,
-            weather_row,
-        )
-
-
-def insert_holiday(conn):
-    if is_today_holiday:
-        conn.execute(
-            """
-            INSERT OR IGNORE INTO holidays (date, name)
-            VALUES (?, ?)
-        """,
-            (today.isoformat(), holiday_name),
-        )
-
-
 # ------------------------------------------------------------------------------
 # Main
 # ------------------------------------------------------------------------------
 def main():
     try:
         failure_detected = False
-        conn = sqlite3.connect(DB_NAME)
-        create_tables(conn)
+        conn = connect(DB_NAME)
 
-        insert_holiday(conn)
+        ensure_calendar(conn)
+        today, holiday_name = holiday(int(time.time()))
+        if holiday_name:
+            insert_holiday(conn, today, holiday_name)
 
         print("[DEBUG] Using park IDs:", PARKS)
 
@@ -176,7 +110,7 @@ def main():
                 print(f"[ERROR] No ride data returned for {park_name}")
                 failure_detected = True
             all_ride_data.extend(park_data)
-        insert_ride_data(conn, all_ride_data)
+        stored = insert_ride_data(conn, all_ride_data, changes_only=True)
 
         weather = fetch_weather_data()
         if weather is None:
@@ -191,12 +125,12 @@ def main():
 
         conn.commit()
 
-        print(f"[INFO] {len(all_ride_data)} ride rows inserted.")
+        print(f"[INFO] {stored} of {len(all_ride_data)} ride rows changed and were inserted.")
         if weather:
             print("[INFO] 1 weather row inserted.")
         else:
             print("[WARN] No weather data was fetched.")
-        if is_today_holiday:
+        if holiday_name:
             print(f"[INFO] Holiday recorded: {holiday_name}")
         print(f"[INFO] Data written to {DB_NAME}")
 
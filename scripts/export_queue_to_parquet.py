@@ -1,23 +1,134 @@
 # scripts/export_queue_to_parquet.py
 
-import sqlite3
-import pandas as pd
+import datetime as dt
+import os
 from pathlib import Path
 
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import typer
+
+from ingest.sqlite_store import DB_NAME, connect, get_watermark, iter_batches, set_watermark
+
+app = typer.Typer(add_completion=False)
 RAW = Path("data/raw")
-today = pd.Timestamp.utcnow().date()
-day_path = RAW / f"{today}.parquet"
-day_path.mkdir(parents=True, exist_ok=True)
-
-conn = sqlite3.connect("queue_times.db")
-df = pd.read_sql("SELECT * FROM queue_times", conn)
-df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-# Split by park
-for park in df["park"].unique():
-    park_df = df[df["park"] == park]
-    out = day_path / f"park={park}" / "part-0.parquet"
+BATCH_ROWS = 50_000
+BUCKET_IDS = 50_000  # ids per export file; fixed, so names never depend on batching
+WATERMARK = "queue_times"
+
+SCHEMA = pa.schema(
+    [
+        pa.field("id", pa.int64()),
+        pa.field("timestamp", pa.timestamp("s", tz="UTC")),
+        pa.field("park", pa.string()),
+        pa.field("land", pa.string()),
+        pa.field("ride", pa.string()),
+        pa.field("wait_time", pa.int64()),
+        pa.field("is_holiday", pa.int8()),
+    ]
+)
+
+SELECT = """
+    SELECT q.id, q.ts, p.name, l.name, r.name, q.wait_time, q.is_holiday
+    FROM queue_times q
+    JOIN parks p ON p.park_id = q.park_id
+    JOIN rides r ON r.ride_id = q.ride_id
+    JOIN lands l ON l.land_id = r.land_id
+"""
+
+
+def export_full(conn, root: Path = RAW, batch_rows: int = BATCH_ROWS) -> int:
+    """The whole table, one file per park under today's date.
+
+    Each park is streamed from the (park_id, ride_id, ts) index in cursor
+    batches, and every batch becomes one row group, so memory stays at one
+    batch no matter how large the table is.
+    """
+    today = dt.datetime.utcnow().date()
+    day_path = root / f"{today}.parquet"
+    total = 0
+
+    for park_id, park in conn.execute("SELECT park_id, name FROM parks ORDER BY park_id"):
+        out = day_path / f"park={park}" / "part-0.parquet"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        batches = iter_batches(
+            conn, SELECT + " WHERE q.park_id = ?", (park_id,), SCHEMA, batch_rows
+        )
+        with pq.ParquetWriter(out, SCHEMA) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                total += batch.num_rows
+
+    print(f"✅ Wrote {total:,} queue rows to {day_path}")
+    return total
+
+
+def _write_bucket(part: pa.Table, out: Path) -> None:
+    """Write ``part`` to ``out``, keeping rows already there unless ``part`` has their id."""
+    if out.exists():
+        old = pq.read_table(out, schema=SCHEMA)
+        old = old.filter(pc.invert(pc.is_in(old["id"], value_set=part["id"])))
+        part = pa.concat_tables([old, part]).sort_by("id")
     out.parent.mkdir(parents=True, exist_ok=True)
-    park_df.to_parquet(out, index=False)
+    tmp = out.with_suffix(".tmp")
+    pq.write_table(part, tmp)
+    os.replace(tmp, out)
+
+
+def export_incremental(conn, root: Path = RAW, batch_rows: int = BATCH_ROWS) -> int:
+    """Rows with ``id`` above the watermark, streamed in batches into date/park partitions.
+
+    Files are fixed id buckets (``id // BUCKET_IDS``) per date/park, and a
+    batch that lands in an existing bucket is merged into it by id.  The
+    watermark moves after every batch, so a rerun after a crash – with any
+    ``batch_rows`` – rewrites the same files instead of duplicating rows.
+    """
+    since = get_watermark(conn, WATERMARK)
+    total = 0
+    batches = iter_batches(
+        conn, SELECT + " WHERE q.id > ? ORDER BY q.id", (since,), SCHEMA, batch_rows
+    )
+    for batch in batches:
+        table = pa.Table.from_batches([batch])
+        day = pc.cast(table["timestamp"], pa.date32())
+        bucket = pc.divide(table["id"], BUCKET_IDS)  # integer division
+        keys = pa.table({"day": day, "park": table["park"], "bucket": bucket})
+        for group in keys.group_by(["day", "park", "bucket"]).aggregate([]).to_pylist():
+            mask = pc.and_(
+                pc.and_(pc.equal(day, group["day"]), pc.equal(table["park"], group["park"])),
+                pc.equal(bucket, group["bucket"]),
+            )
+            lo = group["bucket"] * BUCKET_IDS
+            out = (
+                root
+                / f"{group['day']}.parquet"
+                / f"park={group['park']}"
+                / f"export-{lo}-{lo + BUCKET_IDS - 1}.parquet"
+            )
+            _write_bucket(table.filter(mask), out)
+
+        with conn:
+            set_watermark(conn, WATERMARK, pc.max(table["id"]).as_py())
+        total += batch.num_rows
+
+    print(f"✅ Exported {total:,} new queue rows (after id {since}) to {root}")
+    return total
+
+
+@app.command()
+def main(
+    incremental: bool = typer.Option(
+        False, help="export only rows added since the last incremental export"
+    ),
+    batch_rows: int = typer.Option(BATCH_ROWS, help="rows fetched per cursor batch"),
+):
+    conn = connect(DB_NAME)
+    if incremental:
+        export_incremental(conn, RAW, batch_rows)
+    else:
+        export_full(conn, RAW, batch_rows)
+
 
-print(f"✅ Wrote queue data to {day_path}")
+if __name__ == "__main__":
+    app()
@@ -1,18 +1,116 @@
+import datetime as dt
+import os
 from pathlib import Path
-import pandas as pd
-import sqlite3
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import typer
+
+from ingest.sqlite_store import DB_NAME, connect, get_watermark, iter_batches, set_watermark
+
+app = typer.Typer(add_completion=False)
 WEATHER_DIR = Path("data/weather")
-WEATHER_DIR.mkdir(parents=True, exist_ok=True)
+BATCH_ROWS = 50_000
+WATERMARK = "weather"
+
+SCHEMA = pa.schema(
+    [
+        pa.field("timestamp", pa.timestamp("s", tz="UTC")),
+        pa.field("condition", pa.string()),
+        pa.field("temperature", pa.float64()),
+        pa.field("humidity", pa.int64()),
+        pa.field("wind_speed", pa.float64()),
+    ]
+)
+
+SELECT = "SELECT ts, condition, temperature, humidity, wind_speed FROM weather"
+
+
+def _conform(table: pa.Table) -> pa.Table:
+    """``table`` in SCHEMA's column order and types; columns it lacks come back null."""
+    columns = [
+        (
+            table[f.name].cast(f.type)
+            if f.name in table.schema.names
+            else pa.nulls(len(table), f.type)
+        )
+        for f in SCHEMA
+    ]
+    return pa.Table.from_arrays(columns, schema=SCHEMA)
+
+
+def _drop_duplicates(table: pa.Table) -> pa.Table:
+    """One row per timestamp, the last one written winning; sorted by timestamp."""
+    order = table.append_column("_row", pa.array(np.arange(len(table))))
+    last = order.group_by("timestamp").aggregate([("_row", "max")])["_row_max"]
+    return table.take(last).sort_by("timestamp")
+
+
+def _write_day(table: pa.Table, out_path: Path, merge: bool) -> None:
+    if merge and out_path.exists():
+        table = pa.concat_tables([_conform(pq.read_table(out_path)), table])
+        table = _drop_duplicates(table)  # a re-exported reading replaces the old one
+    tmp = out_path.with_suffix(".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, out_path)
+
+
+def export_latest_day(conn, out_dir: Path = WEATHER_DIR, batch_rows: int = BATCH_ROWS):
+    """Every row of the most recent day, selected in SQL rather than in memory."""
+    (latest,) = conn.execute("SELECT max(ts) FROM weather").fetchone()
+    if latest is None:
+        print("[WARN] weather table is empty")
+        return
+
+    day_start = latest - latest % 86_400
+    batches = iter_batches(
+        conn, SELECT + " WHERE ts >= ? ORDER BY ts", (day_start,), SCHEMA, batch_rows
+    )
+    out_path = out_dir / f"weather_{dt.datetime.utcfromtimestamp(day_start).date()}.parquet"
+    _write_day(pa.Table.from_batches(list(batches), schema=SCHEMA), out_path, merge=False)
+
+    print(f"✅ Wrote weather to {out_path}")
+
+
+def export_incremental(conn, out_dir: Path = WEATHER_DIR, batch_rows: int = BATCH_ROWS) -> int:
+    """Rows newer than the ``ts`` watermark, appended to their day's file."""
+    since = get_watermark(conn, WATERMARK)
+    total = 0
+    batches = iter_batches(
+        conn, SELECT + " WHERE ts > ? ORDER BY ts", (since,), SCHEMA, batch_rows
+    )
+    for batch in batches:
+        table = pa.Table.from_batches([batch])
+        day = pc.cast(table["timestamp"], pa.date32())
+        for d in pc.unique(day).to_pylist():
+            _write_day(
+                table.filter(pc.equal(day, d)), out_dir / f"weather_{d}.parquet", merge=True
+            )
+
+        with conn:
+            set_watermark(conn, WATERMARK, pc.max(batch["timestamp"]).value)
+        total += batch.num_rows
+
+    print(f"✅ Exported {total:,} new weather rows to {out_dir}")
+    return total
 
-conn = sqlite3.connect("queue_times.db")
-df = pd.read_sql("SELECT * FROM weather", conn)
-df["timestamp"] = pd.to_datetime(df["timestamp"])
 
-latest_day = df["timestamp"].dt.date.max()
-day_df = df[df["timestamp"].dt.date == latest_day]
+@app.command()
+def main(
+    incremental: bool = typer.Option(
+        False, help="export only rows added since the last incremental export"
+    ),
+    batch_rows: int = typer.Option(BATCH_ROWS, help="rows fetched per cursor batch"),
+):
+    WEATHER_DIR.mkdir(parents=True, exist_ok=True)
+    conn = connect(DB_NAME)
+    if incremental:
+        export_incremental(conn, WEATHER_DIR, batch_rows)
+    else:
+        export_latest_day(conn, WEATHER_DIR, batch_rows)
 
-out_path = WEATHER_DIR / f"weather_{latest_day}.parquet"
-day_df.to_parquet(out_path, index=False)
 
-print(f"✅ Wrote weather to {out_path}")
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,185 @@
+# serving/online.py
+"""
+Current ride and weather features in the Feast online store.
+
+The store is SQLite (``feature_repo/data/online_store.db``) unless
+``FEAST_ONLINE=redis``, which switches to ``feature_store.redis.yaml`` and
+``$REDIS_URL``.  SQLite is local to the machine that writes it – a host
+that harvests with ``--online`` next to the server, or development.  The
+GitHub workflows run on throwaway runners, so they use the shared Redis store:
+harvest.yml pushes every tick (``--online``) and feast_materialize.yml
+materializes nightly, both only when the ``REDIS_URL`` secret is set.
+
+* push   – after a harvest tick: the newest row per ride from the day's raw
+           parts goes to ``queue_hourly`` with ``write_to_online_store``, one
+           row per ride entity and ``BATCH_ROWS`` rides per write; weather
+           is materialized for the last few hours only
+* lookup – every ride of a park, posted wait plus current weather, in one
+           ``get_online_features`` call
+
+The park → rides index is the ``park_rides`` view of the same store, written
+by ``push`` and cached for ``RIDES_TTL`` by ``lookup``, so any host that can
+reach the store can serve a park without having pushed or read the raw tree.
+
+    python -m serving.online push [--day 2025-07-26]
+    python -m serving.online lookup --park dl
+"""
+
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import typer
+
+from ingest.manifest import RAW, manifest, raw_files
+from ingest.reader import read_raw
+
+app = typer.Typer(add_completion=False)
+
+REPO = Path("feature_repo")
+RIDE_INDEX = "park_rides:ride_ids"
+RIDES_TTL = 60  # seconds a park's ride list is reused before it is fetched again
+FEATURES = [
+    "queue_hourly:posted_wait",
+    "weather_hourly:temp_f",
+    "weather_hourly:precip_prob",
+]
+BATCH_ROWS = 500  # ride entities per online-store write
+WEATHER_HOURS = 6  # weather window materialized per push
+
+
+def store(online: str | None = None, root: Path | None = None):
+    """FeatureStore on ``online`` (sqlite|redis); ``root`` moves the registry and SQLite db."""
+    from feast import FeatureStore, RepoConfig
+
+    online = online or os.environ.get("FEAST_ONLINE", "sqlite")
+    yaml = REPO / ("feature_store.redis.yaml" if online == "redis" else "feature_store.yaml")
+    if root is None:
+        return FeatureStore(repo_path=str(REPO), fs_yaml_file=yaml)
+    config = RepoConfig(
+        project="disney_queues",
+        registry=str(root / "feature_registry.db"),
+        provider="local",
+        offline_store={"type": "file"},
+        online_store=(
+            {
+                "type": "redis",
+                "connection_string": os.environ.get("REDIS_URL", "localhost:6379"),
+            }
+            if online == "redis"
+            else {"type": "sqlite", "path": str(root / "online_store.db")}
+        ),
+        entity_key_serialization_version=2,
+    )
+    return FeatureStore(repo_path=str(REPO), config=config)
+
+
+# --- Materialization ---
+def newest_day() -> date | None:
+    days = sorted({key.split("/")[0] for key in manifest(RAW)})
+    return date.fromisoformat(days[-1].removesuffix(".parquet")) if days else None
+
+
+def latest_rows(day: date) -> pd.DataFrame:
+    """Newest (ride_id, park, timestamp, posted_wait) per ride on ``day``.
+
+    Each day opens with a keyframe of every ride (ingest.dedup), so the day's
+    own parts are enough even when the harvester writes changes only.
+    """
+    table = read_raw(
+        raw_files(RAW, start=day, end=day), ["ride_id", "park", "timestamp", "posted_wait"]
+    )
+    df = table.to_pandas().astype({"park": str})
+    df = df.sort_values("timestamp", kind="stable").drop_duplicates("ride_id", keep="last")
+    return df.astype({"ride_id": "int64", "posted_wait": "Int32"})  # null: no posted wait
+
+
+def write_rides(fs, rows: pd.DataFrame, batch_rows: int = BATCH_ROWS) -> int:
+    """``rows`` into ``queue_hourly``, ``batch_rows`` ride entities per write."""
+    columns = rows[["ride_id", "timestamp", "posted_wait"]]
+    for start in range(0, len(columns), batch_rows):
+        fs.write_to_online_store("queue_hourly", columns.iloc[start : start + batch_rows])
+    return -(-len(columns) // batch_rows)
+
+
+def write_park_rides(fs, rows: pd.DataFrame) -> None:
+    """Each park's ride ids into ``park_rides``, one row per park entity."""
+    index = rows.groupby("park")["ride_id"].agg(lambda ids: sorted(int(r) for r in ids))
+    fs.write_to_online_store(
+        "park_rides",
+        pd.DataFrame(
+            {
+                "park": index.index,
+                "timestamp": rows["timestamp"].max(),
+                "ride_ids": index.values,
+            }
+        ),
+    )
+
+
+def push(day: date | None = None, fs=None) -> dict:
+    """Bring the online store up to the newest harvest tick."""
+    day = day or newest_day()
+    if day is None:
+        return {"rides": 0, "writes": 0}
+    fs = fs or store()
+    rows = latest_rows(day)
+    writes = write_rides(fs, rows)
+    write_park_rides(fs, rows)
+    now = datetime.now(timezone.utc)
+    fs.materialize(now - timedelta(hours=WEATHER_HOURS), now, feature_views=["weather_hourly"])
+    return {"rides": len(rows), "writes": writes, "as_of": str(rows["timestamp"].max())}
+
+
+# --- Lookup ---
+_rides: dict[str, tuple[float, list[int]]] = {}  # park → (fetched at, ride ids)
+
+
+def park_rides(park: str, fs=None) -> list[int]:
+    """Ride ids of ``park`` as of the last push, from the store (cached ``RIDES_TTL``)."""
+    fetched, rides = _rides.get(park, (None, []))
+    if fetched is None or time.monotonic() - fetched >= RIDES_TTL:
+        response = (fs or store()).get_online_features(
+            features=[RIDE_INDEX], entity_rows=[{"park": park}]
+        )
+        rides = list(response.to_dict()["ride_ids"][0] or [])
+        _rides[park] = (time.monotonic(), rides)
+    return rides
+
+
+def lookup(park: str, fs=None, rides: list[int] | None = None) -> dict[str, list]:
+    """Current features for every ride of ``park`` – one round trip, plus the ride list's."""
+    fs = fs or store()
+    rides = park_rides(park, fs) if rides is None else rides
+    if not rides:
+        return {"ride_id": []}
+    response = fs.get_online_features(
+        features=FEATURES, entity_rows=[{"ride_id": r} for r in rides]
+    )
+    return response.to_dict()
+
+
+# --- CLI ---
+@app.command("push")
+def push_cmd(
+    day: str = typer.Option(None, help="raw day to push (default: newest)"),
+    online: str = typer.Option(None, help="sqlite or redis (default: $FEAST_ONLINE)"),
+):
+    t0 = time.perf_counter()
+    result = push(date.fromisoformat(day) if day else None, store(online))
+    typer.echo(f"✅ {result} in {time.perf_counter() - t0:.2f}s")
+
+
+@app.command("lookup")
+def lookup_cmd(
+    park: str = typer.Option(..., help="dl or dca"),
+    online: str = typer.Option(None, help="sqlite or redis (default: $FEAST_ONLINE)"),
+):
+    features = lookup(park, store(online))
+    typer.echo(pd.DataFrame(features).to_string(index=False))
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,300 @@
+# serving/predict.py
+"""
+Online "posted wait in 60 min" predictions from the baseline LightGBM model.
+
+* ModelCache  – the booster is loaded once and swapped for a new one when
+                the model file's (mtime, size, inode) changes; training
+                writes it with os.replace, so a reload never sees half a file
+* LatestState – newest posted_wait per ride (and the current weather hour),
+                fed incrementally from the most recent raw parts
+* Batcher     – concurrent requests queue their feature rows; one thread
+                drains the queue into a single ``predict`` call
+
+    python -m serving.predict serve [--port 8080]
+    python -m serving.predict once --park dl
+
+    GET /predict?ride_id=326          → {"predictions": [{...}]}
+    GET /predict?park=dl
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import joblib
+import numpy as np
+import pandas as pd
+import typer
+
+from ingest import pull_weather
+from ingest.manifest import RAW, manifest, raw_files
+from ingest.reader import read_raw
+from ingest.schema import PARK_IDS
+
+app = typer.Typer(add_completion=False)
+
+MODEL = Path("models/lgbm_wait_1h.joblib")
+FEATURES = ["posted_wait", "temp_f", "precip_prob", "ride_id", "park_id"]  # training order
+LOOKBACK_DAYS = 2  # newest raw days scanned for per-ride state
+MODEL_CHECK_SECONDS = 1.0  # how often a request may stat the model file
+STATE_REFRESH_SECONDS = 60
+MAX_BATCH = 512  # feature rows per predict call
+MAX_WAIT_MS = 2.0  # how long a batch waits for company
+
+
+# --- Model: loaded once, swapped atomically ---
+class ModelCache:
+    def __init__(self, path: Path = MODEL, check_seconds: float = MODEL_CHECK_SECONDS):
+        self.path = Path(path)
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._model, self._signature = None, None
+        self._checked = 0.0
+        self.reloads = 0
+
+    def _stat(self) -> tuple[int, int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def get(self):
+        now = time.monotonic()
+        if self._model is not None and now - self._checked < self.check_seconds:
+            return self._model
+        with self._lock:
+            self._checked = now
+            try:
+                signature = self._stat()
+            except FileNotFoundError:
+                if self._model is None:
+                    raise
+                return self._model  # mid-deploy: keep the booster we have
+            if signature != self._signature:
+                model = joblib.load(self.path)  # old booster keeps serving meanwhile
+                self._model, self._signature = model, signature
+                self.reloads += 1
+        return self._model
+
+
+# --- Latest features per ride, fed from the newest raw parts ---
+class LatestState:
+    def __init__(self, root: Path = RAW, lookback_days: int = LOOKBACK_DAYS):
+        self.root = Path(root)
+        self.lookback_days = lookback_days
+        self._seen: set[Path] = set()
+        self.rides = pd.DataFrame(
+            columns=["park", "timestamp", "posted_wait"], index=pd.Index([], name="ride_id")
+        )
+        self.weather = {"temp_f": np.nan, "precip_prob": np.nan}
+        self._snapshot = self._build_snapshot()
+
+    def _newest_files(self) -> list[Path]:
+        days = sorted({key.split("/")[0] for key in manifest(self.root)})
+        if not days:
+            return []
+        newest = date.fromisoformat(days[-1].removesuffix(".parquet"))
+        return raw_files(self.root, start=newest - timedelta(days=self.lookback_days - 1))
+
+    def refresh(self) -> int:
+        """Fold parts not seen before into the per-ride state; returns files read."""
+        files = self._newest_files()
+        new = [f for f in files if f not in self._seen]
+        if new:
+            table = read_raw(new, ["ride_id", "park", "timestamp", "posted_wait"])
+            df = table.to_pandas().astype({"park": str})
+            if len(self.rides):
+                df = pd.concat([self.rides.reset_index(), df], ignore_index=True)
+            merged = df.sort_values("timestamp", kind="stable")
+            self.rides = merged.groupby("ride_id").last()
+            self._seen = set(files)
+        self.weather = self._current_weather()
+        self._snapshot = self._build_snapshot()  # one reference swap for readers
+        return len(new)
+
+    def _build_snapshot(self):
+        rides = self.rides.assign(
+            **self.weather,
+            ride_id=self.rides.index,
+            park_id=self.rides["park"].map(PARK_IDS),
+        )
+        X = rides[FEATURES].to_numpy(dtype=np.float64)
+        meta = [  # a ride without a posted wait (closed, not reported) gets None, not NaN
+            {
+                "ride_id": int(r),
+                "park": p,
+                "as_of": ts.isoformat(),
+                "posted_wait": None if np.isnan(w) else int(w),
+            }
+            for r, p, ts, w in zip(
+                self.rides.index, self.rides["park"], self.rides["timestamp"], X[:, 0]
+            )
+        ]
+        pos = {m["ride_id"]: i for i, m in enumerate(meta)}
+        parks = {
+            park: np.flatnonzero(self.rides["park"].to_numpy() == park)
+            for park in self.rides["park"].unique()
+        }
+        return X, meta, pos, parks
+
+    @staticmethod
+    def _current_weather() -> dict:
+        return pull_weather.current() or {"temp_f": np.nan, "precip_prob": np.nan}
+
+    def features(self, ride_ids=None, park=None) -> tuple[np.ndarray, list[dict]]:
+        """Feature rows and their ride metadata, from the current snapshot."""
+        X, meta, pos, parks = self._snapshot
+        idx = parks.get(park, np.empty(0, int)) if park is not None else np.arange(len(meta))
+        if ride_ids is not None:
+            wanted = {pos[r] for r in ride_ids if r in pos}
+            idx = [i for i in idx if i in wanted]
+        return X[idx], [meta[i] for i in idx]
+
+
+# --- Micro-batching: many requests, one predict call ---
+class Batcher:
+    def __init__(self, models: ModelCache, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.models = models
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self.batches: list[tuple[int, float]] = []  # (rows, seconds) per predict call
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, rows: np.ndarray) -> Future:
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def _drain(self) -> list:
+        pending = [self._queue.get()]
+        size, deadline = len(pending[0][0]), time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            pending = self._drain()
+            X = np.vstack([rows for rows, _ in pending])
+            t0 = time.perf_counter()
+            try:
+                y = self.models.get().predict(X) if len(X) else np.empty(0)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches.append((len(X), time.perf_counter() - t0))
+            offset = 0
+            for rows, future in pending:
+                future.set_result(y[offset : offset + len(rows)])
+                offset += len(rows)
+
+
+class Predictor:
+    def __init__(self, model_path: Path = MODEL, root: Path = RAW, **batcher_kw):
+        self.models = ModelCache(model_path)
+        self.state = LatestState(root)
+        self.batcher = Batcher(self.models, **batcher_kw)
+
+    def predict(self, ride_ids=None, park=None) -> list[dict]:
+        rows, meta = self.state.features(ride_ids, park)
+        if not len(rows):
+            return []
+        y = self.batcher.submit(rows).result()
+        return [{**m, "predicted_wait_60m": round(float(p), 1)} for m, p in zip(meta, y)]
+
+    def refresh_forever(self, seconds: float = STATE_REFRESH_SECONDS) -> None:
+        while True:
+            time.sleep(seconds)
+            try:
+                self.state.refresh()
+            except Exception as e:
+                print(f"[WARN] state refresh failed: {e}")
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 turns bursts into SYN retries
+
+
+def handler(predictor: Predictor) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):  # one line per request is too chatty
+            pass
+
+        def _send(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/healthz":
+                return self._send(200, {"rides": len(predictor.state.rides)})
+            if url.path != "/predict":
+                return self._send(404, {"error": "not found"})
+            qs = parse_qs(url.query)
+            try:
+                ride_ids = [int(r) for r in qs["ride_id"]] if "ride_id" in qs else None
+            except ValueError:
+                return self._send(400, {"error": "ride_id must be an integer"})
+            park = qs.get("park", [None])[0]
+            if ride_ids is None and park is None:
+                return self._send(400, {"error": "pass ride_id or park"})
+            try:
+                return self._send(200, {"predictions": predictor.predict(ride_ids, park)})
+            except FileNotFoundError as e:
+                return self._send(503, {"error": f"model not available: {e.filename}"})
+
+    return Handler
+
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1"),
+    port: int = typer.Option(8080),
+    model: Path = typer.Option(MODEL, help="joblib booster to serve"),
+    refresh: float = typer.Option(
+        STATE_REFRESH_SECONDS, help="seconds between state refreshes"
+    ),
+):
+    predictor = Predictor(model)
+    read = predictor.state.refresh()
+    predictor.models.get()  # warm before the first request
+    threading.Thread(target=predictor.refresh_forever, args=(refresh,), daemon=True).start()
+    server = Server((host, port), handler(predictor))
+    typer.echo(f"serving {len(predictor.state.rides)} rides from {read} parts on :{port}")
+    server.serve_forever()
+
+
+@app.command()
+def once(
+    ride_id: list[int] = typer.Option(None, help="ride id (repeatable)"),
+    park: str = typer.Option(None, help="every ride in this park"),
+    model: Path = typer.Option(MODEL, help="joblib booster to serve"),
+):
+    predictor = Predictor(model)
+    predictor.state.refresh()
+    for p in predictor.predict(ride_id or None, park):
+        typer.echo(json.dumps(p))
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,31 @@
+# tests/conftest.py
+"""Raw harvest ticks written the way ``ingest.pull_queue_times`` writes them."""
+
+from datetime import datetime
+
+import pytest
+
+from ingest import pull_queue_times
+
+
+def ride(rid: int, wait, updated: datetime, is_open: bool | None = None) -> dict:
+    """One ride of the queue-times payload; ``wait=None`` is a closed ride."""
+    return {
+        "id": rid,
+        "name": f"ride {rid}",
+        "is_open": wait is not None if is_open is None else is_open,
+        "wait_time": wait,
+        "last_updated": updated.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+    }
+
+
+@pytest.fixture
+def raw(tmp_path, monkeypatch):
+    """``tick(park, ts, rides)`` writes one part under ``tmp_path/data/raw`` (the cwd)."""
+    monkeypatch.chdir(tmp_path)
+
+    def tick(park: str, ts: datetime, rides: list[dict]):
+        table = pull_queue_times.flat([{"rides": rides}], park, ts)
+        return pull_queue_times.write(table, park, ts)
+
+    return tick
@@ -0,0 +1,25 @@
+# tests/test_calendar_dim.py
+"""ingest.calendar_dim: lookups past the built years and no writes on load."""
+
+import pandas as pd
+
+from ingest import calendar_dim
+
+
+def test_flags_outside_the_built_years(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    days = ["2019-12-25", "2025-07-04", "2031-07-04", "2031-07-07"]
+    out = calendar_dim.flags(days)
+    assert out["holiday_name"].notna().tolist() == [True, True, True, False]
+    assert out["season"].notna().all()
+    assert out["day_of_week"].tolist() == ["Wednesday", "Friday", "Friday", "Monday"]
+    assert not any(tmp_path.iterdir())  # load builds in memory, never saves
+
+
+def test_load_reads_the_built_file(tmp_path):
+    path = tmp_path / "calendar.parquet"
+    calendar_dim.main(first_year=2024, last_year=2026, out=path)
+    cal = calendar_dim.load(2024, 2026, path)
+    assert cal.index.min() == 20240101 and cal.index.max() == 20261231
+    pd.testing.assert_frame_equal(cal.reset_index(), pd.read_parquet(path), check_like=True)
+    assert len(calendar_dim.load(2024, 2027, path)) > len(cal)  # too short → built
@@ -0,0 +1,84 @@
+# tests/test_compact.py
+"""jobs.compact: same rows out as in; a listing during the swap sees old or new."""
+
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from conftest import ride
+from ingest.schema import conform
+from jobs import compact
+
+DAY = date(2025, 7, 4)
+
+
+def _harvest(tick, day: date = DAY, ticks: int = 12) -> None:
+    start = datetime.combine(day, datetime.min.time()) + timedelta(hours=15)
+    for i in range(ticks):
+        ts = start + timedelta(minutes=5 * i)
+        for park, base in (("dl", 100), ("dca", 200)):
+            tick(park, ts, [ride(base + r, 5 * ((r + i) % 9), ts) for r in range(8)])
+
+
+def _rows(files) -> pa.Table:
+    table = pa.concat_tables(conform(pq.read_table(f, partitioning=None)) for f in files)
+    return table.sort_by([("ride_id", "ascending"), ("timestamp", "ascending")])
+
+
+def test_compacted_rows_equal_the_fragments(raw):
+    _harvest(raw)
+    day_dir = compact.RAW / f"{DAY}.parquet"
+    before = {p.name: _rows(sorted(p.glob("*.parquet"))) for p in day_dir.glob("park=*")}
+
+    result = compact.compact_day(DAY, grace=0)
+    assert result == {"park=dca": 96, "park=dl": 96}
+    for park, table in before.items():
+        assert compact.is_compacted(day_dir / park)
+        assert _rows([day_dir / park / compact.COMPACTED]).equals(table)
+    assert sorted(p.name for p in day_dir.iterdir()) == ["park=dca", "park=dl"]
+    assert compact.compact_day(DAY, grace=0) == {"park=dca": None, "park=dl": None}  # skipped
+
+
+def test_a_listing_during_the_swap_sees_old_or_new(raw):
+    seen, stop = [], threading.Event()
+    for n in range(8):
+        day = DAY + timedelta(days=n)
+        _harvest(raw, day, ticks=4)
+        park_dir = compact.RAW / f"{day}.parquet" / "park=dl"
+        old = frozenset(os.listdir(park_dir))
+
+        def watch():
+            while not stop.is_set():
+                try:
+                    seen.append((old, frozenset(os.listdir(park_dir))))
+                except FileNotFoundError:
+                    seen.append((old, None))
+
+        stop.clear()
+        watcher = threading.Thread(target=watch)
+        watcher.start()
+        compact.compact_park(park_dir)
+        stop.set()
+        watcher.join()
+        # a reader that listed the old fragments can still open them
+        assert frozenset(os.listdir(park_dir.with_name(".park=dl.retired"))) == old
+
+    assert seen
+    bad = [names for old, names in seen if names not in (old, {compact.COMPACTED})]
+    assert not bad, bad[:3]
+
+
+def test_a_failed_exchange_leaves_the_day_alone(raw, monkeypatch):
+    _harvest(raw, ticks=3)
+    park_dir = compact.RAW / f"{DAY}.parquet" / "park=dl"
+    old = sorted(os.listdir(park_dir))
+    monkeypatch.setattr(compact, "_RENAME_EXCHANGE", 1 << 30)  # a flag the kernel rejects
+
+    with pytest.raises(OSError):
+        compact.compact_park(park_dir)
+    assert sorted(os.listdir(park_dir)) == old
+    assert sorted(os.listdir(park_dir.parent)) == ["park=dca", "park=dl"]
@@ -0,0 +1,179 @@
+# tests/test_daemon.py
+"""
+ingest.daemon on a ``FakeClock`` against a local queue-times stub: when
+parks are polled, the flush at the UTC day boundary and the flush on stop.
+"""
+
+import asyncio
+import json
+import threading
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+from ingest import daemon
+from ingest.schema import PARK_IDS
+
+DAY = date(2025, 7, 4)
+OPEN = {"dl": (8, 24), "dca": (8, 22)}  # local hours the stub's rides are open
+CADENCE = 300
+
+
+class Stub(ThreadingHTTPServer):
+    """Five rides per park, refreshed every ``CADENCE`` seconds of ``clock`` while open."""
+
+    daemon_threads = True
+
+    def __init__(self, clock: daemon.Clock, hours: dict):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.clock, self.open = clock, hours
+        self.parks = {pid: park for park, pid in PARK_IDS.items()}
+        self.polls = {p: 0 for p in PARK_IDS}
+        self.seen: dict[str, dict[int, float]] = {p: {} for p in PARK_IDS}  # refresh → poll
+
+    def payload(self, park: str, t: float) -> dict:
+        local = datetime.fromtimestamp(t, daemon.PARK_TZ)
+        hour = local.hour + local.minute / 60
+        opened, closed = self.open[park]
+        k = int(t // CADENCE) if hour >= opened else None
+        if k is not None:
+            self.seen[park].setdefault(k, t)
+        updated = datetime.fromtimestamp((k or 0) * CADENCE, timezone.utc)
+        rides = [
+            {
+                "id": PARK_IDS[park] * 1000 + r,
+                "name": f"{park} ride {r}",
+                "is_open": opened <= hour < closed,
+                "wait_time": 5 * ((r + (k or 0) // (1 + r)) % 20),
+                "last_updated": updated.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            }
+            for r in range(5)
+        ]
+        return {"lands": [{"id": 1, "name": "Land", "rides": rides}]}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        park = self.server.parks[int(self.path.split("/")[2])]
+        self.server.polls[park] += 1
+        body = json.dumps(self.server.payload(park, self.server.clock.now())).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the daemon stopped with this poll in flight
+
+    def log_message(self, *args):
+        pass
+
+
+def _at(hour: float, day: date = DAY) -> float:
+    """Epoch seconds of a park-local hour on ``day`` (past 24 runs into the next day)."""
+    midnight = datetime.combine(day, datetime.min.time(), daemon.PARK_TZ)
+    return (midnight + timedelta(hours=hour)).timestamp()
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    """Yields ``start(t, hours) → (clock, stub, url)``; data/ lands in ``tmp_path``."""
+    monkeypatch.chdir(tmp_path)
+    servers = []
+
+    def start(t: float, hours: dict = OPEN):
+        clock = daemon.FakeClock(t)
+        server = Stub(clock, hours)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        url = f"http://127.0.0.1:{server.server_address[1]}/parks/{{pid}}/queue_times.json"
+        return clock, server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def _parts(day: date) -> list:
+    return sorted(daemon.pull_queue_times.DATA.glob(f"{day}.parquet/park=*/*.parquet"))
+
+
+# --- Schedule ---
+def test_schedule_sleeps_outside_the_window_and_polls_closed_parks():
+    schedule = daemon.Schedule("dl")
+    assert schedule.opens(_at(3)) == _at(6) - daemon.MARGIN.total_seconds()
+    assert schedule.opens(_at(25)) is None  # late close, past midnight
+    assert schedule.after(_at(7)) == _at(7) + daemon.CLOSED_POLL  # in the window, all closed
+
+
+def test_schedule_follows_refreshes_and_backs_off():
+    schedule = daemon.Schedule("dl")
+    now = _at(12)
+    assert schedule.after(now, now - 60, open_rides=3) == now - 60 + 300 + daemon.LAG
+    assert schedule.after(now + 300, now + 240, open_rides=3) == now + 240 + 300 + daemon.LAG
+    # nothing new: retry after MIN_POLL, doubling up to the cadence
+    assert schedule.after(now + 600, now + 240, open_rides=3) == now + 600 + daemon.MIN_POLL
+    assert schedule.after(now + 700, now + 240, open_rides=3) == now + 700 + 2 * daemon.MIN_POLL
+    assert schedule.after(now + 800, error=True) == now + 800 + 2 * daemon.MIN_POLL
+    assert schedule.after(now + 900, error=True) == now + 900 + 4 * daemon.MIN_POLL
+
+
+def test_early_opening_is_seen_within_closed_poll(stub):
+    early = {**OPEN, "dl": (7, 24)}
+    clock, server, url = stub(_at(4), early)
+    asyncio.run(daemon.run(["dl"], clock, url=url, until=_at(9), log=lambda *a: None))
+
+    first = min(server.seen["dl"].values())
+    assert first - _at(7) <= daemon.CLOSED_POLL
+    assert server.polls["dl"] > 0 and not _parts(DAY - timedelta(days=1))
+
+
+# --- Flushes ---
+def test_flush_at_the_utc_day_boundary(stub):
+    clock, server, url = stub(_at(16.5))  # 23:30Z → 00:30Z
+    buffer = daemon.Buffer()
+    flushes = []
+    flush = buffer.flush
+
+    def recording():
+        flushes.append((clock.now(), sorted({day for day, _ in buffer.parts})))
+        return flush()
+
+    buffer.flush = recording
+    stats = asyncio.run(
+        daemon.run(["dl"], clock, buffer, url=url, until=_at(17.5), log=lambda *a: None)
+    )
+
+    utc_midnight = _at(17)
+    boundary = [days for t, days in flushes if utc_midnight <= t < utc_midnight + 3600]
+    assert boundary and boundary[0][0] == f"{DAY}"  # the finished day, before the run ended
+    assert stats["written"] == stats["kept"] > 0
+    for day in (DAY, DAY + timedelta(days=1)):
+        parts = _parts(day)
+        assert parts
+        for part in parts:
+            stamps = pq.read_table(part, columns=["timestamp"])["timestamp"]
+            assert {d.as_py() for d in pc.unique(pc.strftime(stamps, "%Y-%m-%d"))} == {f"{day}"}
+
+
+def test_stop_flushes_the_buffer(stub):
+    clock, server, url = stub(_at(12))
+
+    async def serve():
+        stop = asyncio.Event()  # what the SIGTERM handler sets
+        task = asyncio.create_task(daemon._serve(["dl"], False, True, url, clock, stop))
+        while server.polls["dl"] < 3:
+            await asyncio.sleep(0)
+        stop.set()
+        return await task
+
+    stats = asyncio.run(serve())
+    # the third poll is still in flight when the signal lands
+    assert stats["polls"] >= 2 and stats["files"] == 1  # no size or age flush before it
+    assert stats["written"] == stats["kept"] > 0
+    rows = sum(pq.read_metadata(part).num_rows for part in _parts(DAY))
+    assert rows == stats["kept"]
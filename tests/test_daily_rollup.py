@@ -0,0 +1,74 @@
+# tests/test_daily_rollup.py
+"""jobs.daily_rollup: calendar flags, weather dedup and incremental runs against a rebuild."""
+
+from datetime import date, datetime, timedelta
+
+import fsspec
+import pandas as pd
+import pytest
+
+from conftest import ride
+from ingest import pull_queue_times
+from ingest.objcache import ObjectCache
+from jobs import daily_rollup
+
+
+def test_late_evening_bins_get_the_local_days_flags():
+    bins = pd.Series(pd.to_datetime(["2025-07-05 03:30", "2025-07-04 06:30"]))  # UTC
+    out = daily_rollup.bin_flags(bins)
+    # 20:30 PDT on July 4, then 23:30 PDT on July 3
+    assert out["holiday_name"].tolist() == ["Independence Day", None]
+    assert out["day_of_week"].tolist() == ["Friday", "Thursday"]
+    tz_aware = daily_rollup.bin_flags(bins.dt.tz_localize("UTC"))
+    pd.testing.assert_frame_equal(tz_aware, out)
+
+
+@pytest.fixture
+def rollup(tmp_path, monkeypatch):
+    """daily_rollup reading ``data/raw`` and ``weather`` under ``tmp_path``, freshly cached."""
+    monkeypatch.chdir(tmp_path)
+    fs = fsspec.filesystem("file")
+    monkeypatch.setattr(daily_rollup, "RAW", str(tmp_path / pull_queue_times.DATA))
+    monkeypatch.setattr(daily_rollup, "WEATHER", str(tmp_path / "weather"))
+    monkeypatch.setattr(daily_rollup, "_FS", fs)
+    monkeypatch.setattr(daily_rollup, "_CACHE", ObjectCache(fs, root=tmp_path / "cache"))
+    return tmp_path
+
+
+def test_the_later_forecast_wins_a_duplicated_hour(rollup):
+    (rollup / "weather").mkdir()
+    hours = pd.date_range("2025-07-03", periods=48, freq="h", tz="UTC")
+    for day, temp in (("2025-07-03", 60.0), ("2025-07-04", 80.0)):
+        fetched = hours if day == "2025-07-03" else hours[24:]  # both cover July 4
+        pd.DataFrame({"timestamp": fetched, "temp_f": temp, "precip_prob": 0}).to_parquet(
+            rollup / "weather" / f"weather_{day}.parquet"
+        )
+    wdf = daily_rollup.read_weather(date(2025, 7, 4)).set_index("timestamp")
+    assert len(wdf) == 48
+    assert (wdf["temp_f"].iloc[:24] == 60.0).all() and (wdf["temp_f"].iloc[24:] == 80.0).all()
+
+
+def _rollup(day: date, incremental: bool) -> pd.DataFrame:
+    assert daily_rollup.build(day, incremental, force=True)["status"] == "written"
+    out = pd.read_parquet(daily_rollup.OUT / f"{day}.parquet")
+    return out.sort_values(["park", "ride", "time_bin"], ignore_index=True)
+
+
+def test_incremental_runs_equal_a_rebuild_across_midnight(rollup):
+    start = datetime(2025, 7, 4, 22, 0)  # UTC; ticks run past midnight into July 5
+    ticks = [start + timedelta(minutes=10 * i) for i in range(19)]
+    steady = ride(3, 45, start)  # never changes: every later tick needs the carry
+    for i, ts in enumerate(ticks):
+        rides = [ride(1, 10 + 5 * (i // 4), ts), ride(2, 30 if i < 7 else None, ts), steady]
+        pull_queue_times.save(pull_queue_times.flat([{"rides": rides}], "dl", ts), "dl", ts)
+        if i == 5:  # first run part-way through July 4
+            _rollup(start.date(), incremental=True)
+        if i == 13:  # and part-way through July 5
+            _rollup(ticks[-1].date(), incremental=True)
+
+    # every tick counts each open ride: July 4 has 12 ticks (ride 2 open for 7), July 5 has 7
+    for day, readings in ((start.date(), 12 + 7 + 12), (ticks[-1].date(), 7 + 7)):
+        incremental = _rollup(day, incremental=True)
+        full = _rollup(day, incremental=False)
+        pd.testing.assert_frame_equal(incremental, full)
+        assert full["sample_size"].sum() == readings
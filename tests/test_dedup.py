@@ -0,0 +1,74 @@
+# tests/test_dedup.py
+"""ingest.dedup: change-only ticks on the harvest side, ``forward_fill`` on the reader side."""
+
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from conftest import ride
+from ingest import pull_queue_times
+from ingest.dedup import forward_fill
+from ingest.manifest import raw_files
+from ingest.reader import read_raw
+
+T0 = datetime(2025, 7, 4, 18, 0)  # UTC
+COLUMNS = ["timestamp", "ride_id", "posted_wait", "status"]
+
+
+def _save(ts: datetime, waits: dict[int, int | None], updated: datetime) -> str:
+    rides = [ride(rid, wait, updated) for rid, wait in waits.items()]
+    table = pull_queue_times.flat([{"rides": rides}], "dl", ts)
+    return pull_queue_times.save(table, "dl", ts)
+
+
+def _day(day: date) -> pd.DataFrame:
+    return read_raw(raw_files(start=day, end=day), COLUMNS).to_pandas()
+
+
+def test_keyframes_and_changes_only(raw):
+    waits = {1: 10, 2: 20, 3: None}
+    assert "wrote 3 of 3" in _save(T0, waits, T0)  # first tick of the day: keyframe
+
+    t1 = T0 + timedelta(minutes=5)
+    assert "wrote 1 of 3" in _save(t1, waits, T0)  # nothing moved: one row marks the tick
+    assert "nothing written" in _save(t1, waits, T0)  # the same tick again
+
+    t2 = T0 + timedelta(minutes=10)
+    assert "wrote 1 of 3" in _save(t2, {**waits, 2: 25}, t2)  # only ride 2 moved
+
+    t3 = T0 + timedelta(minutes=15)
+    assert "wrote 1 of 3" in _save(t3, {**waits, 2: 25}, t2)  # quiet again: the tick marker
+
+    next_day = datetime(2025, 7, 5, 0, 0)
+    assert "wrote 3 of 3" in _save(next_day, {**waits, 2: 25}, t2)  # new day: keyframe again
+    assert len(_day(date(2025, 7, 5))) == 3
+    assert len(_day(date(2025, 7, 4))) == 3 + 1 + 1 + 1
+
+
+def test_forward_fill_rebuilds_every_tick(raw):
+    series = [  # (tick, waits) as the API reported them
+        (T0, {1: 10, 2: 20, 3: None}),
+        (T0 + timedelta(minutes=5), {1: 10, 2: 20, 3: None}),
+        (T0 + timedelta(minutes=10), {1: 15, 2: 20, 3: None}),
+        (T0 + timedelta(minutes=15), {1: 15, 2: 20, 3: 5}),
+        (T0 + timedelta(minutes=20), {1: 15, 2: 30, 3: 5}),
+    ]
+    for ts, waits in series:
+        _save(ts, waits, ts)
+
+    stored = _day(T0.date())
+    assert len(stored) < 3 * len(series)
+    filled = forward_fill(stored)
+    expected = pd.DataFrame(
+        [
+            (pd.Timestamp(ts, tz="UTC"), rid, wait, wait is not None)
+            for ts, waits in series
+            for rid, wait in waits.items()
+        ],
+        columns=COLUMNS,
+    )
+    got = filled[COLUMNS].astype({"posted_wait": "Int64"}).sort_values(["timestamp", "ride_id"])
+    pd.testing.assert_frame_equal(
+        got.reset_index(drop=True),
+        expected.astype({"posted_wait": "Int64"}).astype(got.dtypes.to_dict()),
+    )
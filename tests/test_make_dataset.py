@@ -0,0 +1,61 @@
+# tests/test_make_dataset.py
+"""training.make_dataset: the native and Feast engines on the same entity rows (needs feast)."""
+
+import importlib.util
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from conftest import ride
+from ingest import pull_weather
+from training import make_dataset
+
+REPO = Path(__file__).resolve().parents[1] / "feature_repo"
+T0 = datetime(2025, 7, 4, 18, 0)  # UTC
+
+
+def _harvest(tick) -> None:
+    """Every ride at every tick (no change-only gaps), and one hourly forecast."""
+    for i in range(12):
+        ts = T0 + timedelta(minutes=5 * i)
+        tick("dl", ts, [ride(r, 5 * ((r + i) % 7), ts) for r in (1, 2, 3)])
+        tick("dca", ts, [ride(r, None if i < 4 else 10 + i, ts) for r in (101, 102)])
+    first = T0.replace(tzinfo=timezone.utc) - timedelta(hours=1)
+    hours = [first + timedelta(hours=h) for h in range(4)]
+    pull_weather.write(
+        pull_weather.hourly(
+            [
+                {"dt": int(t.timestamp()), "temp": 70.0 + h, "pop": 0.1}
+                for h, t in enumerate(hours)
+            ]
+        )
+    )
+
+
+def _definitions(path: Path) -> list:
+    spec = importlib.util.spec_from_file_location("features", path)
+    features = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(features)
+    return [features.ride, features.queue_hourly, features.weather_hourly]
+
+
+def test_native_and_feast_features_agree(raw):
+    pytest.importorskip("feast")
+    from feast import FeatureStore
+
+    _harvest(raw)
+    repo = Path("feature_repo")  # a copy, so its sources resolve to this data/
+    repo.mkdir()
+    for name in ("features.py", "feature_store.yaml"):
+        shutil.copy(REPO / name, repo / name)
+    FeatureStore(str(repo)).apply(_definitions(repo / "features.py"))
+
+    start, end = T0 + timedelta(minutes=10), T0 + timedelta(minutes=55)
+    obs = make_dataset.load_queue(start, end + timedelta(seconds=1))
+    entity_df = make_dataset.entity_frame(obs, start, end)
+    assert len(entity_df) == 10 * 5
+
+    diff = make_dataset.compare_engines(entity_df, obs)
+    assert diff.empty, diff
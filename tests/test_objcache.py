@@ -0,0 +1,106 @@
+# tests/test_objcache.py
+"""ingest.objcache over a local directory standing in for the bucket."""
+
+import os
+import time
+
+import fsspec
+import pytest
+
+from ingest import objcache
+from ingest.objcache import ObjectCache
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    root = tmp_path / "bucket"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ObjectCache(fsspec.filesystem("file"), root=tmp_path / "cache")
+
+
+def _put(path, data: bytes, age: float = 0) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    if age:
+        t = time.time() - age
+        os.utime(path, (t, t))
+    return str(path)
+
+
+def test_read_through_fetches_once(bucket, cache):
+    src = _put(bucket / "raw" / "a.parquet", b"x" * 100)
+    first = cache.fetch(src)
+    assert first.read_bytes() == b"x" * 100 and first != src
+    assert cache.fetch(src) == first
+    assert (cache.hits, cache.misses, cache.bytes_fetched) == (1, 1, 100)
+
+
+def test_a_changed_object_is_fetched_again(bucket, cache):
+    src = _put(bucket / "weather.parquet", b"old", age=60)
+    assert cache.fetch(src).read_bytes() == b"old"
+    _put(bucket / "weather.parquet", b"new")  # same size, new mtime
+    assert cache.fetch(src).read_bytes() == b"new"
+    assert cache.misses == 2
+    _put(bucket / "weather.parquet", b"NEW")
+    assert cache.fetch(src, pinned=True).read_bytes() == b"new"  # pinned: trusted as is
+
+
+def test_lru_eviction_at_the_size_cap(bucket, cache, monkeypatch):
+    monkeypatch.setattr(objcache, "EVICT_GRACE", 0)
+    paths = [_put(bucket / f"{name}.parquet", b"x" * 1000) for name in "abc"]
+    local = [cache.fetch(p) for p in paths]
+    for i, path in enumerate(local):  # a oldest, c newest
+        os.utime(path, (1000 + i, 1000 + i))
+    cache.fetch(paths[0])  # a hit makes a the most recent
+
+    cache.max_bytes = 2000
+    with cache.hold(paths[1]):
+        os.utime(local[1], (1000, 1000))  # b least recent again, but held
+        assert cache.evict() == 1000  # so c goes
+        assert [p.exists() for p in local] == [True, True, False]
+    assert cache.evict() == 0  # within the cap again
+    cache.max_bytes = 1000
+    assert cache.evict() == 1000  # released: b, the least recent
+    assert [p.exists() for p in local] == [True, False, False]
+
+
+def test_fetch_evicts_but_keeps_recent_files(bucket, cache):
+    cache.max_bytes = 1500
+    paths = [_put(bucket / f"{name}.parquet", b"x" * 1000) for name in "ab"]
+    local = [cache.fetch(p) for p in paths]
+    assert all(p.exists() for p in local)  # over the cap, but both inside EVICT_GRACE
+
+
+def test_only_compacted_days_are_final(bucket, cache):
+    day = bucket / "raw" / "2025-07-04.parquet"
+    _put(day / "park=dl" / "compacted.parquet", b"c")
+    _put(day / "park=dca" / "a-0.parquet", b"f")
+    assert not cache.is_final(str(day))
+
+    (day / "park=dca" / "a-0.parquet").unlink()
+    _put(day / "park=dca" / "compacted.parquet", b"c")
+    assert cache.is_final(str(day))
+    _put(day / "park=dca" / "late-0.parquet", b"f")
+    assert cache.is_final(str(day))  # a yes is remembered
+
+
+def test_pinned_listings_are_memoized_until_an_object_is_missing(bucket, cache):
+    day = bucket / "raw" / "2025-07-04.parquet"
+    src = _put(day / "park=dl" / "compacted.parquet", b"c")
+    pattern = f"{day}/park=*/*.parquet"
+    assert list(cache.glob(pattern, pinned=True)) == [src]
+
+    _put(day / "park=dca" / "compacted.parquet", b"c")
+    assert list(cache.glob(pattern, pinned=True)) == [src]  # answered from disk
+    assert len(cache.glob(pattern)) == 2  # unpinned: listed again
+
+    os.unlink(src)
+    with pytest.raises(FileNotFoundError):
+        cache.fetch(src, pinned=True)
+    assert len(cache.glob(pattern, pinned=True)) == 1  # memo dropped, listed afresh
+    assert list(cache.glob(pattern, pinned=True)) != [src]
@@ -0,0 +1,134 @@
+# tests/test_online.py
+"""
+serving.online push → lookup: a harvest tick pushed from one host's
+``data/raw`` and every ride of the park read back on another host that
+never pushed.  Once against an in-memory stand-in for the store's three
+calls, once against a throwaway Feast SQLite store with
+``feature_repo/features.py`` applied (skipped without feast).
+"""
+
+import importlib.util
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from ingest import pull_queue_times, pull_weather
+from serving import online
+
+FEATURES_PY = Path(__file__).resolve().parents[1] / "feature_repo" / "features.py"
+FIRST, SECOND = datetime(2025, 7, 4, 18, 0), datetime(2025, 7, 4, 18, 5)  # UTC
+
+
+class MemoryStore:
+    """``write_to_online_store`` / ``get_online_features`` / ``materialize`` in a dict."""
+
+    KEYS = {"queue_hourly": "ride_id", "park_rides": "park"}
+
+    def __init__(self):
+        self.rows: dict[str, dict] = {}
+
+    def write_to_online_store(self, view: str, df):
+        for row in df.to_dict("records"):
+            self.rows.setdefault(view, {})[row[self.KEYS[view]]] = row
+
+    def materialize(self, start, end, feature_views=None):
+        pass
+
+    def get_online_features(self, features: list[str], entity_rows: list[dict]):
+        out = {key: [row[key] for row in entity_rows] for key in entity_rows[0]}
+        for ref in features:
+            view, name = ref.split(":")
+            key = self.KEYS.get(view)
+            stored = self.rows.get(view, {})
+            out[name] = [stored.get(row.get(key), {}).get(name) for row in entity_rows]
+        return type("Response", (), {"to_dict": lambda self: out})()
+
+
+def _definitions():
+    spec = importlib.util.spec_from_file_location("features", FEATURES_PY)
+    features = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(features)
+    return [
+        features.ride,
+        features.park,
+        features.queue_hourly,
+        features.weather_hourly,
+        features.park_rides,
+    ]
+
+
+def _ride(rid: int, wait, updated: datetime) -> dict:
+    return {
+        "id": rid,
+        "name": f"ride {rid}",
+        "is_open": wait is not None,
+        "wait_time": wait,
+        "last_updated": updated.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+    }
+
+
+def _harvest(root: Path) -> None:
+    """Two ticks of park dl and two forecast hours under ``root`` (the cwd)."""
+    ticks = [
+        (FIRST, [_ride(1, 15, FIRST), _ride(2, 40, FIRST), _ride(3, 5, FIRST)]),
+        (SECOND, [_ride(1, 25, SECOND), _ride(3, None, SECOND)]),  # ride 3 closed
+    ]
+    for ts, rides in ticks:
+        pull_queue_times.write(pull_queue_times.flat([{"rides": rides}], "dl", ts), "dl", ts)
+    now = datetime.now(timezone.utc)  # weather is materialized for the last few hours only
+    hours = [now - timedelta(hours=h) for h in (2, 1)]
+    pull_weather.write(
+        pull_weather.hourly(
+            [
+                {"dt": int(t.timestamp()), "temp": 70.0 + i, "pop": 0.2}
+                for i, t in enumerate(hours)
+            ]
+        )
+    )
+
+
+@pytest.fixture
+def hosts(tmp_path, monkeypatch):
+    """``(harvester, server)`` working directories; the harvester has a tick on disk."""
+    monkeypatch.setattr(online, "_rides", {})
+    harvester, server = tmp_path / "harvester", tmp_path / "server"
+    for host in (harvester, server):
+        (host / "feature_repo").mkdir(parents=True)  # sources are relative to the repo
+    monkeypatch.chdir(harvester)
+    _harvest(harvester)
+    return harvester, server
+
+
+def test_lookup_on_a_host_that_never_pushed(hosts, monkeypatch):
+    harvester, server = hosts
+    fs = MemoryStore()
+    assert online.lookup("dl", fs) == {"ride_id": []}  # nothing pushed yet
+
+    monkeypatch.setattr(online, "RIDES_TTL", 0)
+    assert online.push(SECOND.date(), fs)["rides"] == 3
+    monkeypatch.chdir(server)
+    assert online.park_rides("dl", fs) == [1, 2, 3]
+    features = online.lookup("dl", fs)
+    assert dict(zip(features["ride_id"], features["posted_wait"])) == {1: 25, 2: 40, 3: None}
+    assert not any(server.joinpath("feature_repo").iterdir())
+
+
+def test_feast_push_then_lookup_round_trips(hosts, tmp_path, monkeypatch):
+    pytest.importorskip("feast")
+    harvester, server = hosts
+    shared = tmp_path / "store"  # registry + SQLite db, as Redis would be shared
+    shared.mkdir()
+    fs = online.store("sqlite", root=shared)
+    fs.apply(_definitions())
+
+    assert online.push(SECOND.date(), fs)["rides"] == 3
+
+    monkeypatch.chdir(server)
+    monkeypatch.setattr(online, "_rides", {})
+    fs = online.store("sqlite", root=shared)
+    features = online.lookup("dl", fs)
+    waits = dict(zip(features["ride_id"], features["posted_wait"]))
+    assert waits == {1: 25, 2: 40, 3: None}
+    assert features["temp_f"] == [pytest.approx(71.0)] * 3
+    assert features["precip_prob"] == [20] * 3
@@ -0,0 +1,40 @@
+# tests/test_pull_weather.py
+"""ingest.pull_weather.current: the hour in effect now, from the newest forecast file."""
+
+import datetime as dt
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ingest import pull_weather
+
+UTC = dt.timezone.utc
+
+
+def _forecast(first: dt.datetime, temp: float, hours: int = 24) -> None:
+    pull_weather.write(
+        pull_weather.hourly(
+            [
+                {"dt": int((first + dt.timedelta(hours=h)).timestamp()), "temp": temp + h}
+                for h in range(hours)
+            ]
+        )
+    )
+
+
+def test_the_newest_forecast_for_the_current_hour(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert pull_weather.current() is None
+    _forecast(dt.datetime(2025, 7, 3, 18, tzinfo=UTC), 60.0, hours=48)
+    _forecast(dt.datetime(2025, 7, 5, 6, tzinfo=UTC), 90.0)
+    exported = pa.table({"timestamp": [0], "temperature": [1.0]})  # from SQLite: no temp_f
+    pq.write_table(exported, pull_weather.DATA_DIR / "weather_2025-07-04.parquet")
+
+    def temp(*when) -> float:
+        return pull_weather.current(dt.datetime(*when, tzinfo=UTC))["temp_f"]
+
+    assert temp(2025, 7, 3, 20, 30) == 62.0
+    assert temp(2025, 7, 4, 8, 30) == 74.0  # the export is passed over
+    assert temp(2025, 7, 5, 9) == 93.0  # the later forecast wins
+    assert temp(2025, 7, 5, 5) == 95.0  # it starts after now: the earlier file has the hour
+    assert temp(2025, 7, 1) == 60.0  # before any forecast: its first hour
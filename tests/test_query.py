@@ -0,0 +1,39 @@
+# tests/test_query.py
+"""analytics.query: ``ride_filled`` is ``raw_filled`` narrowed to one ride."""
+
+from datetime import datetime, timedelta
+
+from analytics import query
+from conftest import ride
+from ingest import pull_queue_times
+
+T0 = datetime(2025, 7, 4, 18, 0)  # UTC
+
+
+def test_ride_filled_matches_raw_filled(raw):
+    for i in range(12):
+        ts = T0 + timedelta(minutes=5 * i)
+        rides = {
+            "dl": [ride(1, 10 + 5 * (i // 3), ts), ride(2, None if i % 4 else 30, ts)],
+            "dca": [ride(101, 20, T0)] + ([ride(102, 5 * i, ts)] if i >= 4 else []),
+        }
+        for park, payload in rides.items():
+            table = pull_queue_times.flat([{"rides": payload}], park, ts)
+            pull_queue_times.save(table, park, ts)
+
+    columns = "timestamp, park, ride_id, ride_name, status, posted_wait"
+    with query.connect() as con:
+        for rid, name in ((1, "ride 1"), (2, "ride 2"), (101, "ride 101"), (102, "ride 102")):
+            expected = con.execute(
+                f"SELECT {columns} FROM raw_filled WHERE ride_id = {rid} ORDER BY timestamp"
+            ).fetchall()
+            assert len(expected) == (8 if rid == 102 else 12)
+            for args in ((rid, None), (None, name)):
+                got = con.execute(
+                    f"SELECT {columns} FROM ride_filled(?, ?) ORDER BY timestamp", args
+                ).fetchall()
+                assert got == expected
+
+    history = query.ride_history("102")
+    assert history["samples"].to_pylist() == [2, 6]  # 18:20–18:25, then 18:30–18:55
+    assert query.ride_history("ride 102").equals(history)
@@ -0,0 +1,69 @@
+# training/labels.py
+"""
+Horizon labels looked up by timestamp rather than by row offset.
+
+For each anchor ``(ride_id, t)`` the label for horizon ``h`` is the
+``posted_wait`` of that ride's observation nearest to ``t + h``, provided it
+lies within ``tolerance``; otherwise it is NaN.  All rides are searched at
+once: observations are sorted by (ride_id, timestamp) and packed into one
+int64 key, ``ride_rank << 34 | epoch_seconds``, so a single ``searchsorted``
+per horizon finds every anchor's neighbours and the packing keeps the hits
+inside the anchor's own ride.  Cost is O((anchors + observations) · log n)
+per horizon, independent of how many calendar hours the data spans.
+"""
+
+import numpy as np
+import pandas as pd
+
+HORIZONS = (15, 30, 60, 120)  # minutes
+TOLERANCE = pd.Timedelta(minutes=10)
+_SHIFT = 34  # epoch seconds fit in 34 bits until 2514
+
+
+def _seconds(ts: pd.Series) -> np.ndarray:
+    return ts.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def label_column(horizon: int) -> str:
+    return f"target_{horizon}m"
+
+
+def horizon_labels(
+    anchors: pd.DataFrame,
+    obs: pd.DataFrame,
+    horizons=HORIZONS,
+    tolerance: pd.Timedelta = TOLERANCE,
+    time_col: str = "event_timestamp",
+) -> pd.DataFrame:
+    """One ``target_<h>m`` column per horizon, aligned with ``anchors``' index.
+
+    ``anchors`` needs ``ride_id`` and ``time_col``; ``obs`` needs ``ride_id``,
+    ``timestamp`` and ``posted_wait``.  Both timestamps must be naive UTC.
+    """
+    obs = obs.sort_values(["ride_id", "timestamp"], kind="stable")
+    rides, obs_rank = np.unique(obs["ride_id"].to_numpy(), return_inverse=True)
+    obs_key = (obs_rank.astype(np.int64) << _SHIFT) | _seconds(obs["timestamp"])
+    values = obs["posted_wait"].to_numpy(dtype=np.float64)
+    out = {label_column(h): np.full(len(anchors), np.nan) for h in horizons}
+    if not len(obs_key):
+        return pd.DataFrame(out, index=anchors.index)
+
+    anchor_rank = np.searchsorted(rides, anchors["ride_id"].to_numpy())
+    known = (anchor_rank < len(rides)) & (
+        rides[np.minimum(anchor_rank, len(rides) - 1)] == anchors["ride_id"].to_numpy()
+    )
+    anchor_base = anchor_rank.astype(np.int64) << _SHIFT
+    anchor_sec = _seconds(anchors[time_col])
+    tol = int(tolerance.total_seconds())
+
+    for h in horizons:
+        want = anchor_base | (anchor_sec + h * 60)
+        right = np.searchsorted(obs_key, want)
+        left = np.maximum(right - 1, 0)
+        right = np.minimum(right, len(obs_key) - 1)
+        # neighbours from another ride are ≥ 2**34 s away, so the tolerance rejects them
+        d_left, d_right = np.abs(want - obs_key[left]), np.abs(obs_key[right] - want)
+        best = np.where(d_right < d_left, right, left)
+        hit = known & (np.minimum(d_left, d_right) <= tol)
+        out[label_column(h)][hit] = values[best[hit]]
+    return pd.DataFrame(out, index=anchors.index)
@@ -1,63 +1,203 @@
 """
-Pull two months of hourly features from Feast and
-build a training set whose label is the posted wait 60 minutes ahead.
+Pull two months of hourly features and build a training set whose labels
+are the posted wait 15/30/60/120 minutes ahead (``target`` is the 60-min one).
+
+One row per harvested observation in the window – there is no ride × time
+grid, so overnight hours with no data cost nothing.  Labels come from
+``training.labels``: the ride's observation nearest to t + h within a
+tolerance, not a fixed row offset.
+
+Features come from one of two engines that implement the same point-in-time
+rule (latest feature row at or before each entity timestamp, no TTL):
+
+  native – sorted merge_asof per ride over the raw parquet and the weather
+           files (default; no Feast, memory ∝ observations)
+  feast  – store.get_historical_features on the file offline store
+
+They are meant to agree, but on real data nothing guarantees it (Feast reads
+the change-only rows without forward-filling, picks among same-timestamp
+weather rows by itself and returns Int32/Float32).  tests/test_make_dataset.py
+checks them against each other on a small full-tick fixture; ``--verify``
+runs both on the same entity rows of the real window and fails on any
+difference.
+
+    python -m training.make_dataset [--engine native|feast] [--verify] [--start …] [--end …]
 """
 
 from pathlib import Path
-import glob
 import numpy as np
 import pandas as pd
-from feast import FeatureStore
+import pyarrow.parquet as pq
+import typer
+
+from ingest.dedup import forward_fill
+from ingest.manifest import raw_files
+from ingest.reader import read_raw
+from ingest.schema import PARK_IDS
+from training.labels import HORIZONS, TOLERANCE, horizon_labels, label_column
 
 # ── config ────────────────────────────────────────────────────────────────
 HISTORY_START = "2025-04-01"
 HISTORY_END   = "2025-05-31 23:30"
-HORIZON_ROWS  = 2                         # 2 × 30-min rows → 60-min horizon
+TARGET        = 60                        # horizon copied into ``target``
 OUTFILE       = "training/hourly_train.parquet"
-Path("training").mkdir(exist_ok=True)
+ROW_GROUP     = 100_000                   # rows per parquet row group (streamed training)
+WEATHER_GLOB  = "data/weather/weather_*.parquet"
+FEATURES      = [
+    "queue_hourly:posted_wait",
+    "weather_hourly:temp_f",
+    "weather_hourly:precip_prob",
+]
 # ───────────────────────────────────────────────────────────────────────────
 
-store = FeatureStore("feature_repo")
+app = typer.Typer(add_completion=False)
+
+
+# ── feature engines ───────────────────────────────────────────────────────
+def feast_features(entity_df: pd.DataFrame) -> pd.DataFrame:
+    from feast import FeatureStore
+
+    store = FeatureStore("feature_repo")
+    return store.get_historical_features(entity_df=entity_df, features=FEATURES).to_df()
+
+
+def compare_engines(entity_df: pd.DataFrame, obs: pd.DataFrame) -> pd.DataFrame:
+    """Entity rows missing from either engine or with any feature differing between them."""
+    keys = ["ride_id", "event_timestamp"]
+    columns = [f.split(":", 1)[1] for f in FEATURES]
+    native = native_features(entity_df, obs)
+    feast = feast_features(entity_df)
+    feast["event_timestamp"] = _naive_utc(feast["event_timestamp"])
+    both = native[keys + columns].merge(
+        feast[keys + columns], on=keys, how="outer", suffixes=("", "_feast"), indicator=True
+    )
+    differs = both["_merge"] != "both"
+    for c in columns:
+        a, b = both[c].astype("float64"), both[f"{c}_feast"].astype("float64")
+        differs |= ~np.isclose(a, b, rtol=1e-6, equal_nan=True)  # Feast returns Float32
+    return both[differs].drop(columns="_merge")
+
+
+def _naive_utc(s: pd.Series) -> pd.Series:
+    s = pd.to_datetime(s)
+    if s.dt.tz is not None:
+        s = s.dt.tz_convert("UTC").dt.tz_localize(None)
+    return s.astype("datetime64[ns]")
+
 
-# ── collect unique ride_id values from a few raw parquet parts ────────────
-sample_parts = glob.glob("data/raw/*.parquet/park=*/*.parquet")
-if not sample_parts:
-    raise RuntimeError(
-        "No raw parquet parts found – run the harvester or git pull binary-db-updates"
+def load_queue(start, end) -> pd.DataFrame:
+    """Observations with ``start <= timestamp < end``, naive UTC, one per ride per tick."""
+    start, end = pd.Timestamp(start).to_pydatetime(), pd.Timestamp(end).to_pydatetime()
+    # from the start day's keyframe, so rides that have not moved since still get a value
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    table = read_raw(
+        raw_files(start=start.date(), end=end.date()),
+        ["ride_id", "park", "timestamp", "posted_wait"],
+        start=midnight,
+        end=end,
     )
+    df = table.to_pandas()
+    df["timestamp"] = _naive_utc(df["timestamp"])
+    df["ride_id"] = df["ride_id"].astype("int64")
+    df["park_id"] = df.pop("park").astype(str).map(PARK_IDS).astype("int64")
+    # the harvester writes only changed rides; labels need every tick back
+    df = forward_fill(df, ticks_by="park_id")
+    return df[df["timestamp"] >= pd.Timestamp(start)]
 
-ride_ids = set()
-for p in sample_parts[:10]:                           # 10 parts is enough
-    ride_ids.update(
-        pd.read_parquet(p, columns=["ride_id"])["ride_id"].unique()
+
+def entity_frame(obs: pd.DataFrame, start=HISTORY_START, end=HISTORY_END) -> pd.DataFrame:
+    """The observations themselves, in ``[start, end]``, as Feast entity rows.
+
+    ``park_id`` rides along as an extra entity column (Feast passes it through).
+    """
+    in_window = (obs["timestamp"] >= pd.Timestamp(start)) & (
+        obs["timestamp"] <= pd.Timestamp(end)
     )
-ride_ids = sorted(ride_ids)
-print(f"Found {len(ride_ids)} unique ride_id values")
-
-# ── build entity dataframe (cartesian product) ────────────────────────────
-timestamps = (
-    pd.date_range(HISTORY_START, HISTORY_END, freq="30min", tz="UTC")
-      .tz_localize(None)
-)
-entity_df = pd.DataFrame({
-    "ride_id": np.repeat(ride_ids, len(timestamps)),
-    "event_timestamp": np.tile(timestamps, len(ride_ids)),
-})
-
-# ── pull historical features from Feast ───────────────────────────────────
-training_df = store.get_historical_features(
-    entity_df=entity_df,
-    features=[
-        "queue_weather_hourly:posted_wait",
-    ],
-).to_df()
-
-# ── create 60-min-ahead target ────────────────────────────────────────────
-training_df = training_df.sort_values(["ride_id", "event_timestamp"])
-training_df["target"] = (
-    training_df.groupby("ride_id")["posted_wait"].shift(-HORIZON_ROWS)
-)
-training_df = training_df.dropna(subset=["target"])
-
-training_df.to_parquet(OUTFILE, index=False)
-print(f"✅ wrote {len(training_df):,} rows → {OUTFILE}")
+    return (
+        obs.loc[in_window, ["ride_id", "park_id", "timestamp"]]
+        .rename(columns={"timestamp": "event_timestamp"})
+        .reset_index(drop=True)
+    )
+
+
+def load_weather() -> pd.DataFrame:
+    files = sorted(Path().glob(WEATHER_GLOB))
+    frames = [
+        pq.read_table(f, columns=["timestamp", "temp_f", "precip_prob"]).to_pandas()
+        for f in files
+        if {"temp_f", "precip_prob"} <= set(pq.read_schema(f).names)
+    ]
+    if not frames:
+        return pd.DataFrame(columns=["timestamp", "temp_f", "precip_prob"])
+    wdf = pd.concat(frames, ignore_index=True)
+    wdf["timestamp"] = _naive_utc(wdf["timestamp"])
+    # later forecast files supersede earlier ones for the same hour
+    wdf = wdf.drop_duplicates("timestamp", keep="last")
+    return wdf.sort_values("timestamp", kind="stable")
+
+
+def native_features(entity_df: pd.DataFrame, obs: pd.DataFrame) -> pd.DataFrame:
+    df = pd.merge_asof(
+        entity_df.sort_values("event_timestamp", kind="stable"),
+        obs.drop(columns="park_id"),
+        left_on="event_timestamp",
+        right_on="timestamp",
+        by="ride_id",
+        direction="backward",
+    ).drop(columns="timestamp")
+    df = pd.merge_asof(
+        df,
+        load_weather(),
+        left_on="event_timestamp",
+        right_on="timestamp",
+        direction="backward",
+    ).drop(columns="timestamp")
+    return df
+
+
+# ── horizon labels ────────────────────────────────────────────────────────
+def add_labels(training_df: pd.DataFrame, obs: pd.DataFrame, horizons=HORIZONS) -> pd.DataFrame:
+    training_df = training_df.sort_values(["ride_id", "event_timestamp"], ignore_index=True)
+    labels = horizon_labels(training_df, obs, horizons)
+    training_df = training_df.join(labels)
+    training_df["target"] = training_df[label_column(TARGET)]
+    return training_df.dropna(subset=list(labels.columns), how="all")
+
+
+def build(
+    engine: str = "native", start=HISTORY_START, end=HISTORY_END, verify: bool = False
+) -> pd.DataFrame:
+    # labels look up to max(horizon) + tolerance past the last entity row
+    lookahead = pd.Timedelta(minutes=max(HORIZONS)) + TOLERANCE + pd.Timedelta(seconds=1)
+    obs = load_queue(start, pd.Timestamp(end) + lookahead)
+    entity_df = entity_frame(obs, start, end)
+    print(f"{len(entity_df):,} observations between {start} and {end}")
+    if verify:
+        diff = compare_engines(entity_df, obs)
+        if len(diff):
+            raise RuntimeError(f"feast and native differ on {len(diff):,} rows\n{diff}")
+        print("✅ feast and native features agree")
+    if engine == "feast":
+        training_df = feast_features(entity_df)
+    else:
+        training_df = native_features(entity_df, obs)
+    return add_labels(training_df, obs)
+
+
+@app.command()
+def main(
+    engine: str = typer.Option("native", help="native or feast"),
+    verify: bool = typer.Option(False, help="run both engines and fail on any difference"),
+    start: str = typer.Option(HISTORY_START, help="first observation (UTC)"),
+    end: str = typer.Option(HISTORY_END, help="last observation (UTC)"),
+):
+    Path("training").mkdir(exist_ok=True)
+    training_df = build(engine, start, end, verify)
+    # time order, so train_baseline can hold out the newest rows as a contiguous block
+    training_df = training_df.sort_values(["event_timestamp", "ride_id"], ignore_index=True)
+    training_df.to_parquet(OUTFILE, index=False, row_group_size=ROW_GROUP)
+    print(f"✅ wrote {len(training_df):,} rows → {OUTFILE}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,135 @@
+# training/train_all.py
+"""
+Train one wait model per (park, horizon) in parallel and write a registry.
+
+Each combination runs in its own worker process.  The thread budget
+(``--threads``, default all cores) is split so that
+``workers × num_threads ≈ threads``: LightGBM's OpenMP threads never
+oversubscribe the cores, and with at least as many workers as jobs the
+wall time approaches that of the slowest single model.
+
+Models go to ``models/lgbm_wait_<park>_<h>m.joblib``; ``models/registry.json``
+lists each with its validation MAE, best round, row counts and timings.
+
+    python -m training.train_all [--park dl --park dca] [--horizon 60] [--threads 8]
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import typer
+
+from ingest.schema import PARK_IDS
+from training import train_baseline
+from training.labels import HORIZONS, label_column
+
+app = typer.Typer(add_completion=False)
+MODELS = Path("models")
+REGISTRY = MODELS / "registry.json"
+
+
+def model_path(park: str, horizon: int) -> Path:
+    return MODELS / f"lgbm_wait_{park}_{horizon}m.joblib"
+
+
+def thread_budget(jobs: int, threads: int, workers: int | None = None) -> tuple[int, int]:
+    """``(workers, num_threads)`` with ``workers × num_threads <= threads``."""
+    workers = max(1, min(workers or jobs, jobs, threads))
+    return workers, max(1, threads // workers)
+
+
+def train_one(park: str, horizon: int, infile: str, num_threads: int, cache: str) -> dict:
+    """Fit one model and return its registry entry (runs in a worker)."""
+    train_baseline.CACHE = Path(cache)
+    t0 = time.perf_counter()
+    train_data, valid_data = train_baseline.subset_datasets(
+        Path(infile), label_column(horizon), PARK_IDS[park], num_threads=num_threads
+    )
+    prepared = time.perf_counter() - t0
+    model = train_baseline.fit(train_data, valid_data, dict(num_threads=num_threads))
+    out = model_path(park, horizon)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    joblib.dump(model, tmp)
+    os.replace(tmp, out)
+    return {
+        "park": park,
+        "horizon_min": horizon,
+        "path": str(out),
+        "valid_mae": round(model.best_score["valid"]["l1"], 4),
+        "best_iteration": model.best_iteration,
+        "rows_train": train_data.num_data(),
+        "rows_valid": valid_data.num_data(),
+        "num_threads": num_threads,
+        "dataset_seconds": round(prepared, 3),
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def _write_registry(registry: dict) -> None:
+    tmp = REGISTRY.with_suffix(".tmp")
+    tmp.write_text(json.dumps(registry, indent=2))
+    os.replace(tmp, REGISTRY)
+
+
+@app.command()
+def main(
+    park: list[str] = typer.Option(list(PARK_IDS), help="park(s) to train"),
+    horizon: list[int] = typer.Option(list(HORIZONS), help="horizon(s) in minutes"),
+    infile: Path = typer.Option(train_baseline.INFILE),
+    threads: int = typer.Option(os.cpu_count() or 1, help="total cores to use"),
+    workers: int = typer.Option(None, help="worker processes (default: one per model)"),
+):
+    jobs = [(p, h) for p in park for h in horizon]
+    workers, num_threads = thread_budget(len(jobs), threads, workers)
+    print(f"{len(jobs)} models on {workers} workers × {num_threads} threads")
+
+    t0 = time.perf_counter()
+    entries, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(train_one, p, h, str(infile), num_threads, str(train_baseline.CACHE)): (
+                p,
+                h,
+            )
+            for p, h in jobs
+        }
+        for future in as_completed(futures):
+            p, h = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"[WARN] {p} {h}m failed: {e}")
+                failed.append({"park": p, "horizon_min": h, "error": str(e)})
+                continue
+            entries.append(entry)
+            print(
+                f"{p:<4}{h:>5}m  MAE {entry['valid_mae']:.3f}  "
+                f"round {entry['best_iteration']:>4}  {entry['seconds']:.2f}s"
+            )
+    wall = time.perf_counter() - t0
+
+    slowest = max((e["seconds"] for e in entries), default=0.0)
+    _write_registry(
+        {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "input": str(infile),
+            "workers": workers,
+            "num_threads": num_threads,
+            "wall_seconds": round(wall, 3),
+            "models": sorted(entries, key=lambda e: (e["park"], e["horizon_min"])),
+            "failed": failed,
+        }
+    )
+    print(f"✅ {len(entries)} models in {wall:.2f}s (slowest {slowest:.2f}s) → {REGISTRY}")
+    if failed:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -1,20 +1,56 @@
 # training/train_baseline.py
+"""
+Train the 60-min wait model with a time-ordered validation split.
+
+The newest ``--valid-fraction`` of rows (by ``event_timestamp``; make_dataset
+writes the file in time order) is held out, and boosting stops once
+validation MAE has not improved for ``--patience`` rounds.
+
+  stream – (default) the LightGBM Datasets are built from the parquet file
+           one row group at a time through ``lgb.Sequence``; only the
+           current row group and the binned data are ever resident
+  memory – whole file → pandas → Dataset
+
+Binned train/valid datasets are saved under ``training/cache/`` keyed by a
+hash of the input file (path, size, mtime) and the dataset-shaping params
+(features, binning, split).  Any later run on the same data – including
+every config of ``sweep`` – loads them and skips sampling and binning.
+
+``ride_id`` and ``park_id`` are native LightGBM categoricals.
+
+    python -m training.train_baseline train [--mode stream|memory]
+    python -m training.train_baseline sweep [--num-leaves 31 63] [--learning-rate 0.05 0.1]
+"""
+
+import hashlib
+import json
+import os
+import time
+from bisect import bisect_right
 from pathlib import Path
 
 import joblib
 import lightgbm as lgb
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+import typer
 
 INFILE = Path("training/hourly_train.parquet")
 MODEL = Path("models/lgbm_wait_1h.joblib")
-MODEL.parent.mkdir(parents=True, exist_ok=True)
+FEATURES = ["posted_wait", "temp_f", "precip_prob", "ride_id", "park_id"]
+CATEGORICAL = ["ride_id", "park_id"]
+LABEL = "target"
+TIME = "event_timestamp"
+CACHE = Path("training/cache")
+VALID_FRACTION = 0.2
+MAX_ROUNDS = 2000
+PATIENCE = 50
 
-df = pd.read_parquet(INFILE)
+app = typer.Typer(add_completion=False)
 
-X = df[["posted_wait", "temp_f", "precip_prob"]]
-y = df["target"]
-
-train_data = lgb.Dataset(X, label=y)
+# params that change the binned Dataset – part of the cache key
+dataset_params = dict(max_bin=255, min_data_in_bin=3, verbose=-1)
 
 params = dict(
     objective="regression",
@@ -24,7 +60,287 @@ params = dict(
     verbose=-1,
 )
 
-model = lgb.train(params, train_data, num_boost_round=400)
-joblib.dump(model, MODEL)
-print("✅ saved model →", MODEL)
-print("MAE (train):", model.best_score["training"]["l1"])
+
+# --- Streaming input: one parquet row group resident at a time ---
+class RowGroupSequence(lgb.Sequence):
+    """Rows of ``columns`` as float64, decoded a row group at a time.
+
+    LightGBM samples rows in ascending order and then pushes ``batch_size``
+    slices front to back, so caching the last decoded group means each
+    group is decoded once per pass.  ``rows`` (ascending file row numbers)
+    exposes just those rows, e.g. one park's, instead of ``[lo, hi)``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        columns: list[str],
+        lo: int = 0,
+        hi: int | None = None,
+        rows: np.ndarray | None = None,
+    ):
+        self.file = pq.ParquetFile(path)
+        self.columns = columns
+        meta = self.file.metadata
+        sizes = [meta.row_group(i).num_rows for i in range(meta.num_row_groups)]
+        self.starts = np.concatenate([[0], np.cumsum(sizes)]).astype(int).tolist()
+        self.lo, self.hi = lo, self.starts[-1] if hi is None else hi  # file rows [lo, hi)
+        self.rows = rows
+        self.batch_size = max(sizes, default=1)
+        self._group, self._rows = -1, None
+
+    def __len__(self) -> int:
+        return self.hi - self.lo if self.rows is None else len(self.rows)
+
+    def _load(self, group: int) -> np.ndarray:
+        if group != self._group:
+            table = self.file.read_row_group(group, columns=self.columns)
+            self._rows = np.column_stack(
+                [
+                    table[c].to_numpy(zero_copy_only=False).astype(np.float64)
+                    for c in self.columns
+                ]
+            )
+            self._group = group
+        return self._rows
+
+    def _take(self, rows: np.ndarray) -> np.ndarray:
+        """File rows ``rows`` (ascending), one row group decoded at a time."""
+        groups = np.searchsorted(self.starts, rows, side="right") - 1
+        parts = [
+            self._load(group)[rows[groups == group] - self.starts[group]]
+            for group in np.unique(groups)
+        ]
+        return np.vstack(parts) if parts else np.empty((0, len(self.columns)))
+
+    def __getitem__(self, idx):
+        if self.rows is not None and not isinstance(idx, list):
+            picked = self._take(np.atleast_1d(self.rows[idx]))
+            return picked if isinstance(idx, slice) else picked[0]
+        if isinstance(idx, slice):
+            start, stop, _ = idx.indices(len(self))
+            start, stop = start + self.lo, stop + self.lo
+            parts = []
+            while start < stop:
+                group = bisect_right(self.starts, start) - 1
+                end = min(stop, self.starts[group + 1])
+                offset = self.starts[group]
+                parts.append(self._load(group)[start - offset : end - offset])
+                start = end
+            return np.vstack(parts) if parts else np.empty((0, len(self.columns)))
+        if isinstance(idx, list):
+            return np.array([self[i] for i in idx])
+        idx += self.lo
+        group = bisect_right(self.starts, idx) - 1
+        return self._load(group)[idx - self.starts[group]]
+
+
+def _labeled(y: np.ndarray, rows: np.ndarray, split: int) -> tuple[np.ndarray, np.ndarray]:
+    """File rows of ``rows`` with a label, cut at position ``split``: (train, valid).
+
+    Rows without one are left out of both Datasets, as memory mode's dropna
+    does, so both modes bin and evaluate the same rows.
+    """
+    has_label = ~np.isnan(y.astype(np.float64))
+    return rows[:split][has_label[:split]], rows[split:][has_label[split:]]
+
+
+def _split_index(ts: np.ndarray, valid_fraction: float, source) -> int:
+    """First row of the validation block: the newest ``valid_fraction`` of time."""
+    ts = ts.astype("datetime64[s]").astype(np.int64)
+    if len(ts) and (np.diff(ts) < 0).any():
+        raise ValueError(f"{source} is not in {TIME} order – rebuild it with make_dataset")
+    if not len(ts):
+        return 0
+    cutoff = np.quantile(ts, 1 - valid_fraction).astype(np.int64)
+    # a timestamp never straddles the split, so no hour is in both sets
+    return int(np.searchsorted(ts, cutoff, side="left"))
+
+
+def split_row(path: Path, valid_fraction: float = VALID_FRACTION) -> int:
+    ts = pq.read_table(path, columns=[TIME])[TIME].to_numpy()
+    return _split_index(ts, valid_fraction, path)
+
+
+def cache_key(path: Path, valid_fraction: float, label: str = LABEL, park_id=None) -> str:
+    st = path.stat()
+    ident = {
+        "file": [str(path.resolve()), st.st_size, st.st_mtime_ns],
+        "features": FEATURES,
+        "categorical": CATEGORICAL,
+        "label": label,
+        "park_id": park_id,
+        "dataset_params": dataset_params,
+        "valid_fraction": valid_fraction,
+        "unlabeled": "dropped",  # were weight 0 before; older cached bins kept them
+    }
+    return hashlib.sha256(json.dumps(ident, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _save(dataset: lgb.Dataset, out: Path) -> None:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    dataset.save_binary(str(tmp))
+    os.replace(tmp, out)
+
+
+def _from_cache(key: str, params=None) -> tuple[lgb.Dataset, lgb.Dataset] | None:
+    train, valid = CACHE / f"{key}.train.bin", CACHE / f"{key}.valid.bin"
+    if not (train.exists() and valid.exists()):
+        return None
+    print(f"reusing binned datasets {key}")
+    params = params or dataset_params
+    train_data = lgb.Dataset(str(train), params=params)
+    return train_data, lgb.Dataset(str(valid), reference=train_data, params=params)
+
+
+def stream_datasets(path: Path, valid_fraction=VALID_FRACTION):
+    key = cache_key(path, valid_fraction)
+    cached = _from_cache(key)
+    if cached:
+        return cached
+
+    split = split_row(path, valid_fraction)
+    y = pq.read_table(path, columns=[LABEL])[LABEL].to_numpy(zero_copy_only=False)
+    y = y.astype(np.float64)
+    train_rows, valid_rows = _labeled(y, np.arange(len(y)), split)
+    common = dict(feature_name=FEATURES, categorical_feature=CATEGORICAL, params=dataset_params)
+    train_data = lgb.Dataset(
+        RowGroupSequence(path, FEATURES, rows=train_rows),
+        label=y[train_rows],
+        **common,
+    ).construct()
+    valid_data = lgb.Dataset(
+        RowGroupSequence(path, FEATURES, rows=valid_rows),
+        label=y[valid_rows],
+        reference=train_data,
+        **common,
+    ).construct()
+    _save(train_data, CACHE / f"{key}.train.bin")
+    _save(valid_data, CACHE / f"{key}.valid.bin")
+    return train_data, valid_data
+
+
+def subset_datasets(
+    path: Path,
+    label: str,
+    park_id: int,
+    valid_fraction=VALID_FRACTION,
+    num_threads: int | None = None,
+):
+    """Train/valid datasets for one park's rows and one label column (cached).
+
+    Streamed like ``stream_datasets``: only the time, park and label columns
+    are read whole; features come through ``RowGroupSequence`` over the
+    park's rows.  ``num_threads`` caps LightGBM's threads while binning too.
+    """
+    key = cache_key(path, valid_fraction, label, park_id)
+    params = {**dataset_params, "num_threads": num_threads} if num_threads else dataset_params
+    cached = _from_cache(key, params)
+    if cached:
+        return cached
+
+    table = pq.read_table(path, columns=[TIME, "park_id", label])
+    rows = np.flatnonzero(table["park_id"].to_numpy(zero_copy_only=False) == park_id)
+    split = _split_index(table[TIME].to_numpy()[rows], valid_fraction, path)
+    y = table[label].to_numpy(zero_copy_only=False).astype(np.float64)
+    del table
+    train_rows, valid_rows = _labeled(y[rows], rows, split)
+    common = dict(feature_name=FEATURES, categorical_feature=CATEGORICAL, params=params)
+    train_data = lgb.Dataset(
+        RowGroupSequence(path, FEATURES, rows=train_rows),
+        label=y[train_rows],
+        **common,
+    ).construct()
+    valid_data = lgb.Dataset(
+        RowGroupSequence(path, FEATURES, rows=valid_rows),
+        label=y[valid_rows],
+        reference=train_data,
+        **common,
+    ).construct()
+    _save(train_data, CACHE / f"{key}.train.bin")
+    _save(valid_data, CACHE / f"{key}.valid.bin")
+    return train_data, valid_data
+
+
+def memory_datasets(path: Path, valid_fraction=VALID_FRACTION):
+    split = split_row(path, valid_fraction)
+    df = pd.read_parquet(path)
+    train, valid = df.iloc[:split].dropna(subset=[LABEL]), df.iloc[split:].dropna(
+        subset=[LABEL]
+    )
+    common = dict(categorical_feature=CATEGORICAL, params=dataset_params)
+    train_data = lgb.Dataset(train[FEATURES], label=train[LABEL], **common)
+    valid_data = lgb.Dataset(
+        valid[FEATURES], label=valid[LABEL], reference=train_data, **common
+    )
+    return train_data, valid_data
+
+
+def fit(train_data, valid_data, overrides=None, max_rounds=MAX_ROUNDS, patience=PATIENCE):
+    return lgb.train(
+        {**params, **(overrides or {})},
+        train_data,
+        num_boost_round=max_rounds,
+        valid_sets=[valid_data],
+        valid_names=["valid"],
+        callbacks=[lgb.early_stopping(patience, verbose=False)],
+    )
+
+
+def _datasets(mode: str, infile: Path, valid_fraction: float):
+    if mode == "stream":
+        return stream_datasets(infile, valid_fraction)
+    return memory_datasets(infile, valid_fraction)
+
+
+@app.command()
+def train(
+    mode: str = typer.Option("stream", help="stream or memory"),
+    infile: Path = typer.Option(INFILE),
+    model_path: Path = typer.Option(MODEL, "--model"),
+    max_rounds: int = typer.Option(MAX_ROUNDS, help="upper bound on boosting rounds"),
+    patience: int = typer.Option(PATIENCE, help="early-stopping rounds on validation MAE"),
+    valid_fraction: float = typer.Option(VALID_FRACTION, help="newest share held out"),
+):
+    train_data, valid_data = _datasets(mode, infile, valid_fraction)
+    model = fit(train_data, valid_data, max_rounds=max_rounds, patience=patience)
+    # write-then-rename so the prediction service never loads half a file
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = model_path.with_suffix(".tmp")
+    joblib.dump(model, tmp)
+    os.replace(tmp, model_path)
+    print("✅ saved model →", model_path)
+    print(f"MAE (valid): {model.best_score['valid']['l1']:.3f} at round {model.best_iteration}")
+
+
+@app.command()
+def sweep(
+    num_leaves: list[int] = typer.Option([15, 31, 63], help="values to try"),
+    learning_rate: list[float] = typer.Option([0.05, 0.1], help="values to try"),
+    infile: Path = typer.Option(INFILE),
+    max_rounds: int = typer.Option(MAX_ROUNDS),
+    patience: int = typer.Option(PATIENCE),
+    valid_fraction: float = typer.Option(VALID_FRACTION),
+):
+    """Grid over booster params; the binned datasets are built (or loaded) once."""
+    train_data, valid_data = stream_datasets(infile, valid_fraction)
+    print(f"{'num_leaves':>10}{'lr':>7}{'rounds':>8}{'valid MAE':>11}{'seconds':>9}")
+    for leaves in num_leaves:
+        for lr in learning_rate:
+            t0 = time.perf_counter()
+            model = fit(
+                train_data,
+                valid_data,
+                dict(num_leaves=leaves, learning_rate=lr),
+                max_rounds,
+                patience,
+            )
+            print(
+                f"{leaves:>10}{lr:>7}{model.best_iteration:>8}"
+                f"{model.best_score['valid']['l1']:>11.3f}{time.perf_counter() - t0:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    app()
@@ -1,18 +1,192 @@
-import streamlit as st
-import pandas as pd
+# view_harvest.py
+"""
+Streamlit explorer for the harvested raw tree.
+
+* the day list and file list come from the cached raw manifest (or, with
+  ``DQT_RAW=s3://bucket/raw``, a listing through the shared object cache)
+* park, ride and hour filters are pushed into the parquet scan; each
+  file's columns are resolved on their own, so SQLite-export parts (no
+  ``ride_id``/``status``/``last_update``) show up with those left empty
+* the table is paged for real: rows are counted per file from the filter
+  columns, and a page decodes only the batches it shows, files taken in
+  order of their first tick (a compacted park is by ride, then time)
+* the wait-across-days chart reads the pre-aggregated ``data/rollup`` bins,
+  never raw observations
+
+    streamlit run view_harvest.py
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import streamlit as st
+
+from ingest.manifest import RAW, manifest, raw_files
+from ingest.objcache import ObjectCache, is_pinned
+from ingest.reader import count_raw, iter_raw, read_raw
+
+SOURCE = os.environ.get("DQT_RAW", "").rstrip("/")  # empty → local data/raw
+ROLLUP = Path("data/rollup")
+COLUMNS = ["timestamp", "park", "ride_id", "ride_name", "status", "posted_wait", "last_update"]
+ROLLUP_COLUMNS = ["park", "ride", "time_bin", "wait_mean", "wait_p90", "sample_size"]
+PAGE_ROWS = 200
+CHART_DAYS = 30
+TTL = 60  # seconds before the newest day is re-listed
+
+
+# --- Raw tree: listings and pushed-down scans ---
+@st.cache_resource
+def object_cache(url: str) -> ObjectCache:
+    return ObjectCache.for_url(url)
+
+
+@st.cache_data(ttl=TTL)
+def days() -> list[str]:
+    if SOURCE:
+        found = object_cache(SOURCE).glob(f"{SOURCE}/*.parquet")
+        names = {path.rstrip("/").rsplit("/", 1)[-1] for path in found}
+    else:
+        names = {key.split("/")[0] for key in manifest(RAW)}
+    return sorted((n.removesuffix(".parquet") for n in names), reverse=True)
+
+
+def day_files(day: str, parks: tuple[str, ...] = ()) -> list[Path]:
+    """The day's raw parts (local copies when reading a bucket), pruned to ``parks``."""
+    d = date.fromisoformat(day)
+    if not SOURCE:
+        return raw_files(RAW, start=d, end=d, parks=list(parks) or None)
+    objects = object_cache(SOURCE)
+    pinned = is_pinned(d) and objects.is_final(f"{SOURCE}/{day}.parquet")
+    listing = objects.glob(f"{SOURCE}/{day}.parquet/park=*/*.parquet", pinned)
+    wanted = [p for p in listing if not parks or any(f"/park={x}/" in p for x in parks)]
+    return [objects.fetch(p, listing[p], pinned) for p in wanted]
+
+
+@st.cache_data(ttl=TTL)
+def parks(day: str) -> list[str]:
+    return sorted({str(f).split("park=", 1)[1].split("/", 1)[0] for f in day_files(day)})
+
+
+@st.cache_data(ttl=TTL)
+def rides(day: str, parks: tuple[str, ...]) -> pd.DataFrame:
+    table = read_raw(day_files(day, parks), ["ride_id", "ride_name", "park"])
+    df = table.to_pandas().astype({"ride_name": str, "park": str}).drop_duplicates("ride_id")
+    return df.sort_values("ride_name", ignore_index=True)
+
+
+def _first_tick(path: Path) -> float:
+    """Earliest timestamp in the file's row-group statistics (epoch s; inf if none)."""
+    meta = pq.read_metadata(path)
+    if "timestamp" not in meta.schema.names:
+        return float("inf")
+    col = meta.schema.names.index("timestamp")
+    ticks = []
+    for i in range(meta.num_row_groups):
+        stats = meta.row_group(i).column(col).statistics
+        if stats is not None and stats.has_min_max and isinstance(stats.min, datetime):
+            first = stats.min
+            ticks.append(
+                (first if first.tzinfo else first.replace(tzinfo=timezone.utc)).timestamp()
+            )
+    return min(ticks, default=float("inf"))
+
+
+def _window(day: str, hours) -> dict:
+    midnight = datetime.fromisoformat(day).replace(tzinfo=timezone.utc)
+    return dict(
+        start=midnight + timedelta(hours=hours[0]), end=midnight + timedelta(hours=hours[1])
+    )
+
+
+@st.cache_data(ttl=TTL, max_entries=32)
+def scan_files(day: str, parks: tuple[str, ...], ride_ids: tuple[int, ...], hours):
+    """The day's files in tick order, with the rows each contributes under the filters."""
+    files = sorted(day_files(day, parks), key=_first_tick)
+    rides = list(ride_ids) or None
+    counts = [
+        count_raw([f], COLUMNS, rides=rides, partial=True, **_window(day, hours)) for f in files
+    ]
+    return [(f, n) for f, n in zip(files, counts) if n]
+
+
+@st.cache_data(ttl=TTL, max_entries=256)
+def page(day, parks, ride_ids, hours, number: int) -> pd.DataFrame:
+    """Rows ``number * PAGE_ROWS`` onwards; files before them are skipped unread."""
+    skip, files = number * PAGE_ROWS, []
+    for path, rows in scan_files(day, parks, ride_ids, hours):
+        if skip >= rows and not files:
+            skip -= rows
+            continue
+        files.append(path)
+    parts, have = [], 0
+    for part in iter_raw(
+        files, COLUMNS, rides=list(ride_ids) or None, partial=True, **_window(day, hours)
+    ):
+        if skip >= part.num_rows:
+            skip -= part.num_rows
+            continue
+        parts.append(part.slice(skip, PAGE_ROWS - have))
+        have, skip = have + parts[-1].num_rows, 0
+        if have >= PAGE_ROWS:
+            break
+    if not parts:
+        return pd.DataFrame(columns=COLUMNS)
+    table = pa.concat_tables(parts)
+    return table.sort_by([("timestamp", "ascending"), ("ride_id", "ascending")]).to_pandas()
+
+
+# --- Rollup: pre-aggregated bins for the chart ---
+@st.cache_data(ttl=TTL)
+def rollup_series(ride: str, park: str, last: str, n_days: int = CHART_DAYS) -> pd.DataFrame:
+    end = date.fromisoformat(last)
+    files = [ROLLUP / f"{end - timedelta(days=i):%Y-%m-%d}.parquet" for i in range(n_days)]
+    files = [str(f) for f in files if f.exists()]
+    if not files:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    table = ds.dataset(files, format="parquet").to_table(
+        columns=ROLLUP_COLUMNS,
+        filter=(ds.field("park") == park) & (ds.field("ride") == ride),
+    )
+    return table.to_pandas().sort_values("time_bin", ignore_index=True)
+
+
+# --- Page ---
 st.title("Harvested Queue Times Viewer")
 
-RAW = Path("data/raw")
-dates = sorted(p.name for p in RAW.glob("2025-*"))
+available = days()
+if not available:
+    st.warning("No harvested data.")
+    st.stop()
 
-selected_date = st.selectbox("Select Date", dates)
-parts = list((RAW / selected_date).rglob("*.parquet"))
+selected_date = st.selectbox("Date", available)
+chosen_parks = tuple(st.multiselect("Parks", parks(selected_date)))
+catalog = rides(selected_date, chosen_parks)
+names = dict(zip(catalog["ride_id"], catalog["ride_name"]))
+ride_parks = dict(zip(catalog["ride_id"], catalog["park"]))
+chosen_rides = tuple(
+    st.multiselect("Rides", list(names), format_func=lambda r: f"{names[r]} ({r})")
+)
+hours = st.slider("Hours (UTC)", 0, 24, (0, 24))
 
-if not parts:
-    st.warning("No data for this date.")
+total = sum(rows for _, rows in scan_files(selected_date, chosen_parks, chosen_rides, hours))
+if not total:
+    st.warning("No data for these filters.")
 else:
-    df = pd.concat(pd.read_parquet(p) for p in parts)
-    st.write(f"Loaded {len(df)} rows")
-    st.dataframe(df.head(100))
+    pages = -(-total // PAGE_ROWS)
+    number = st.number_input(f"Page (of {pages})", 1, pages, 1) - 1
+    st.write(f"{total:,} rows")
+    st.dataframe(page(selected_date, chosen_parks, chosen_rides, hours, number))
+
+if chosen_rides:
+    ride_id = st.selectbox("Chart ride", chosen_rides, format_func=names.get)
+    series = rollup_series(names[ride_id], ride_parks[ride_id], selected_date)
+    if series.empty:
+        st.info(f"No rollup bins for {names[ride_id]} in the last {CHART_DAYS} days.")
+    else:
+        st.subheader(f"{names[ride_id]} – 30-min bins, last {CHART_DAYS} days")
+        st.line_chart(series.set_index("time_bin")[["wait_mean", "wait_p90"]])